@@ -1,9 +1,13 @@
 """
 Serializers for the admin API.
 """
+from functools import cached_property
+
 from rest_framework import serializers
 from django.conf import settings
-from apps.game.models import Category, MediaPair, GameSession, GlobalStats
+from apps.game.models import Category, MediaPair, MediaUpload, GameSession
+from apps.game.payloads import admin_pair_payload, field_url, media_base_url, pair_stats_payload
+from apps.game.uploads import UPLOAD_SIDES
 
 
 class CategoryAdminSerializer(serializers.ModelSerializer):
@@ -18,75 +22,43 @@ class CategoryAdminSerializer(serializers.ModelSerializer):
 
 
 class MediaPairAdminSerializer(serializers.ModelSerializer):
+    """
+    Lecture seule : la représentation est construite par
+    ``payloads.admin_pair_payload`` ; les champs déclarés décrivent le schéma.
+    """
     category_name = serializers.CharField(source='category.name', read_only=True)
     stats = serializers.SerializerMethodField()
     real_media = serializers.SerializerMethodField()
     ai_media = serializers.SerializerMethodField()
     audio_media = serializers.SerializerMethodField()
+    media_info = serializers.JSONField(read_only=True)
 
     class Meta:
         model = MediaPair
         fields = [
             'id', 'category', 'category_name', 'real_media', 'ai_media', 'audio_media', 'is_real',
-            'media_type', 'difficulty', 'hint', 'is_active', 'stats', 'created_at'
+            'media_type', 'difficulty', 'hint', 'is_active', 'stats', 'media_info', 'created_at'
         ]
 
+    @cached_property
+    def media_base(self):
+        """Préfixe des URLs média, calculé une fois pour toute la liste."""
+        return media_base_url(self.context.get('request'))
+
+    def to_representation(self, instance):
+        return admin_pair_payload(instance, self.media_base)
+
     def get_stats(self, obj):
-        try:
-            stats = obj.global_stats
-            return {
-                'total_attempts': stats.total_attempts,
-                'correct_answers': stats.correct_answers,
-                'success_rate': stats.success_rate,
-            }
-        except GlobalStats.DoesNotExist:
-            return {
-                'total_attempts': 0,
-                'correct_answers': 0,
-                'success_rate': 0,
-            }
+        return pair_stats_payload(obj)
 
     def get_real_media(self, obj):
-        if obj.real_media:
-            request = self.context.get('request')
-            if request:
-                url = obj.real_media.url
-                if url.startswith('/'):
-                    scheme = request.scheme
-                    host = request.get_host()
-                    hostname = host.split(':')[0] if ':' in host else host
-                    return f"{scheme}://{hostname}:8080{url}"
-                return url
-            return obj.real_media.url if obj.real_media else None
-        return None
+        return field_url(self.media_base, obj.real_media)
 
     def get_ai_media(self, obj):
-        if obj.ai_media:
-            request = self.context.get('request')
-            if request:
-                url = obj.ai_media.url
-                if url.startswith('/'):
-                    scheme = request.scheme
-                    host = request.get_host()
-                    hostname = host.split(':')[0] if ':' in host else host
-                    return f"{scheme}://{hostname}:8080{url}"
-                return url
-            return obj.ai_media.url if obj.ai_media else None
-        return None
+        return field_url(self.media_base, obj.ai_media)
 
     def get_audio_media(self, obj):
-        if obj.audio_media:
-            request = self.context.get('request')
-            if request:
-                url = obj.audio_media.url
-                if url.startswith('/'):
-                    scheme = request.scheme
-                    host = request.get_host()
-                    hostname = host.split(':')[0] if ':' in host else host
-                    return f"{scheme}://{hostname}:8080{url}"
-                return url
-            return obj.audio_media.url if obj.audio_media else None
-        return None
+        return field_url(self.media_base, obj.audio_media)
 
 
 class MediaPairCreateSerializer(serializers.ModelSerializer):
@@ -95,6 +67,56 @@ class MediaPairCreateSerializer(serializers.ModelSerializer):
         fields = ['category', 'real_media', 'ai_media', 'audio_media', 'is_real', 'media_type', 'difficulty', 'hint', 'is_active']
 
 
+class MediaPairBulkActionSerializer(serializers.Serializer):
+    """Opération groupée sur une liste d'ids ou un filtre."""
+    ACTIONS = ['activate', 'deactivate', 'set_difficulty', 'set_category', 'delete']
+    FILTER_KEYS = {'category', 'media_type', 'difficulty', 'is_active'}
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    filter = serializers.DictField(required=False)
+    difficulty = serializers.ChoiceField(choices=MediaPair.Difficulty.choices, required=False)
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_filter(self, value):
+        unknown = set(value) - self.FILTER_KEYS
+        if unknown:
+            raise serializers.ValidationError(f"Filtres inconnus : {', '.join(sorted(unknown))}")
+        return value
+
+    def validate(self, data):
+        if not data.get('ids') and not data.get('filter'):
+            raise serializers.ValidationError("Indiquer des ids ou un filtre.")
+        if data['action'] == 'set_difficulty' and 'difficulty' not in data:
+            raise serializers.ValidationError({'difficulty': "Requis pour set_difficulty."})
+        if data['action'] == 'set_category' and 'category' not in data:
+            raise serializers.ValidationError({'category': "Requis pour set_category."})
+        return data
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MediaUpload
+        fields = ['id', 'filename', 'size', 'offset', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'offset', 'created_at', 'updated_at']
+
+
+class MediaUploadFinalizeSerializer(serializers.Serializer):
+    """Rattache un upload terminé à un côté d'une paire."""
+    pair = serializers.PrimaryKeyRelatedField(queryset=MediaPair.objects.select_related('category'))
+    side = serializers.ChoiceField(choices=UPLOAD_SIDES)
+
+
+class GameSessionAdminSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GameSession
+        fields = [
+            'id', 'session_key', 'pseudo', 'audience_type', 'score', 'streak_max',
+            'time_total_ms', 'total_pairs', 'is_completed', 'created_at'
+        ]
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     total_categories = serializers.IntegerField()
     total_pairs = serializers.IntegerField()
@@ -8,9 +8,11 @@ from . import views
 router = DefaultRouter()
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'media-pairs', views.MediaPairViewSet)
+router.register(r'uploads', views.MediaUploadViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
     path('stats/', views.dashboard_stats, name='dashboard-stats'),
+    path('sessions/', views.GameSessionListView.as_view(), name='session-list'),
     path('sessions/<int:session_id>/', views.delete_session, name='delete-session'),
 ]
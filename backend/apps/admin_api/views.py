@@ -1,32 +1,122 @@
 """
 Views for the admin API.
 """
-from django.db.models import Avg, Count
-from rest_framework import viewsets, status
-from rest_framework.decorators import api_view
+import json
+import zipfile
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.db.models import Avg, Count, Max
+from rest_framework import generics, viewsets, status
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 
-from apps.game.models import Category, MediaPair, GameSession, GlobalStats
+from apps.game.archive_import import ArchiveImporter, ArchiveImportError
+from apps.game.deletion import delete_pairs
+from apps.game.models import (
+    Category, MediaPair, MediaUpload, GameAnswer, GameSession, GlobalStats, media_pairs_changed,
+)
+from apps.game import response_cache
+from apps.game.pair_cards import pair_cards
+from apps.game.processing import process_pair_media
+from apps.game.renderers import FastJSONParser
+from apps.game.rollups import archived_stats
+from apps.game.versioning import PAIRS, conditional_response, get_versions, make_etag
+from apps.game.uploads import (
+    UploadError,
+    UploadOffsetMismatch,
+    abort_upload,
+    append_chunk,
+    create_upload,
+    finalize_upload,
+)
+from .pagination import KeysetPagination
 from .serializers import (
     CategoryAdminSerializer,
+    GameSessionAdminSerializer,
     MediaPairAdminSerializer,
+    MediaPairBulkActionSerializer,
     MediaPairCreateSerializer,
+    MediaUploadFinalizeSerializer,
+    MediaUploadSerializer,
     DashboardStatsSerializer,
 )
 
 
+async def iterate_in_thread(iterator):
+    """
+    Avance un itérateur synchrone élément par élément dans le thread de l'ORM.
+
+    Sous ASGI, StreamingHttpResponse consomme un itérateur synchrone d'un seul
+    bloc avant d'envoyer le premier octet : une progression doit être fournie
+    par un itérateur asynchrone.
+    """
+    step = sync_to_async(next)
+    done = object()
+    while (item := await step(iterator, done)) is not done:
+        yield item
+
+
+def apply_pair_filters(queryset, params):
+    """Filtres communs de la liste et des opérations groupées (query params ou JSON)."""
+    # Filter by category
+    category_id = params.get('category')
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+
+    # Filter by media type
+    media_type = params.get('media_type')
+    if media_type:
+        queryset = queryset.filter(media_type=media_type)
+
+    # Filter by difficulty
+    difficulty = params.get('difficulty')
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+
+    # Filter by active status
+    is_active = params.get('is_active')
+    if is_active is not None:
+        queryset = queryset.filter(is_active=str(is_active).lower() == 'true')
+
+    return queryset
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     """CRUD operations for categories."""
     queryset = Category.objects.all()
     serializer_class = CategoryAdminSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        # pairs_count dépend aussi des paires : même compteur
+        etag = make_etag('categories', *get_versions(PAIRS))
+        return conditional_response(request, etag, self.cached_list)
+
+    def cached_list(self):
+        def compute():
+            return self.get_serializer(self.get_queryset(), many=True).data
+
+        key = response_cache.cache_key(response_cache.CATEGORIES, 'category-list')
+        return Response(response_cache.get_or_compute(key, compute))
+
+    def perform_destroy(self, instance):
+        # Paires effacées en masse (delete_pairs, sans signal par paire) : seul
+        # le post_delete de la catégorie invalide les caches, toutes fiches comprises
+        with transaction.atomic():
+            delete_pairs(instance.media_pairs.all())
+            instance.delete()
+
 
 class MediaPairViewSet(viewsets.ModelViewSet):
     """CRUD operations for media pairs."""
-    queryset = MediaPair.objects.select_related('category').all()
+    queryset = MediaPair.objects.select_related('category', 'global_stats').all()
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -39,28 +129,217 @@ class MediaPairViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
+    def perform_create(self, serializer):
+        pair = serializer.save()
+        process_pair_media(pair)
+
+    def perform_update(self, serializer):
+        pair = serializer.save()
+        if {'real_media', 'ai_media', 'audio_media', 'media_type'} & set(serializer.validated_data):
+            process_pair_media(pair)
+
     def get_queryset(self):
         queryset = super().get_queryset()
-        
-        # Filter by category
-        category_id = self.request.query_params.get('category')
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-
-        # Filter by media type
-        media_type = self.request.query_params.get('media_type')
-        if media_type:
-            queryset = queryset.filter(media_type=media_type)
-
-        # Filter by difficulty
-        difficulty = self.request.query_params.get('difficulty')
-        if difficulty:
-            queryset = queryset.filter(difficulty=difficulty)
-
-        # Filter by active status
-        is_active = self.request.query_params.get('is_active')
-        if is_active is not None:
-            queryset = queryset.filter(is_active=is_active.lower() == 'true')
+        return apply_pair_filters(queryset, self.request.query_params)
+
+    def pairs_etag(self):
+        """
+        Version des paires et de leurs statistiques : compteur des paires et
+        dernière réponse enregistrée (les stats ne changent qu'avec une réponse).
+        """
+        last_answer = GameAnswer.objects.aggregate(last=Max('id'))['last'] or 0
+        return make_etag('pairs', *get_versions(PAIRS), last_answer)
+
+    def list(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.pairs_etag(), partial(super().list, request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_response(
+            request, self.pairs_etag(), partial(super().retrieve, request, *args, **kwargs)
+        )
+
+    @action(detail=False, methods=['post'], parser_classes=[FastJSONParser])
+    def bulk(self, request):
+        """
+        Opération groupée : activate, deactivate, set_difficulty, set_category
+        ou delete, sur ``ids`` et/ou ``filter``. Une seule requête UPDATE (ou
+        des DELETE directs, voir delete_pairs) et une seule invalidation des
+        caches ; ``dry_run`` retourne seulement le nombre de paires concernées.
+        """
+        serializer = MediaPairBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        queryset = MediaPair.objects.all()
+        if data.get('ids'):
+            queryset = queryset.filter(id__in=data['ids'])
+        if data.get('filter'):
+            queryset = apply_pair_filters(queryset, data['filter'])
+
+        if data['dry_run']:
+            return Response({'action': data['action'], 'count': queryset.count(), 'dry_run': True})
+
+        with transaction.atomic():
+            if data['action'] == 'delete':
+                pair_ids = delete_pairs(queryset)
+                count = len(pair_ids)
+            else:
+                changes = {
+                    'activate': {'is_active': True},
+                    'deactivate': {'is_active': False},
+                    'set_difficulty': {'difficulty': data.get('difficulty')},
+                    'set_category': {'category': data.get('category')},
+                }[data['action']]
+                count = queryset.update(**changes)
+                pair_ids = data.get('ids') if not data.get('filter') else None
+            if count:
+                transaction.on_commit(
+                    lambda: media_pairs_changed.send(sender=MediaPair, pair_ids=pair_ids)
+                )
+
+        return Response({'action': data['action'], 'count': count, 'dry_run': False})
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_archive(self, request):
+        """
+        Import d'une archive zip (champ ``archive``) organisée comme
+        media/pairs/ : real/<catégorie>/x.jpg, ai/<catégorie>/x_AI.jpg.
+
+        Répond en NDJSON, un événement de progression par ligne ; le dernier
+        (``done``) liste les fichiers non appariés. ``?stream=0`` retourne
+        seulement le bilan.
+        """
+        archive = request.FILES.get('archive')
+        if archive is None:
+            return Response({'error': "Champ 'archive' manquant"}, status=status.HTTP_400_BAD_REQUEST)
+        if not zipfile.is_zipfile(archive):
+            return Response({'error': "Le fichier n'est pas une archive zip"}, status=status.HTTP_400_BAD_REQUEST)
+        archive.seek(0)
+
+        importer = ArchiveImporter(archive)
+        if request.query_params.get('stream') == '0':
+            try:
+                events = list(importer.run())
+            except ArchiveImportError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(events[-1], status=status.HTTP_201_CREATED)
+
+        def stream():
+            try:
+                for event in importer.run():
+                    yield json.dumps(event, ensure_ascii=False) + '\n'
+            except ArchiveImportError as exc:
+                yield json.dumps({'event': 'error', 'error': str(exc)}, ensure_ascii=False) + '\n'
+
+        lines = stream()
+        if isinstance(request._request, ASGIRequest):
+            lines = iterate_in_thread(lines)  # Daphne : un événement par envoi
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['X-Accel-Buffering'] = 'no'  # Progression transmise sans tampon par nginx
+        return response
+
+
+class MediaUploadViewSet(viewsets.GenericViewSet):
+    """
+    Upload reprenable par morceaux (apps.game.uploads) :
+
+    - ``POST /uploads/`` ``{filename, size}`` ouvre l'upload ;
+    - ``HEAD`` ou ``GET /uploads/<id>/`` donne l'offset reçu (``Upload-Offset``) ;
+    - ``PATCH /uploads/<id>/`` envoie un morceau brut
+      (``application/offset+octet-stream``) à l'offset ``Upload-Offset`` ;
+    - ``POST /uploads/<id>/finalize/`` ``{pair, side}`` rattache le fichier ;
+    - ``DELETE /uploads/<id>/`` abandonne l'upload.
+    """
+    queryset = MediaUpload.objects.all()
+    serializer_class = MediaUploadSerializer
+    parser_classes = [FastJSONParser]
+    pagination_class = None
+
+    CHUNK_CONTENT_TYPE = 'application/offset+octet-stream'
+
+    def _upload_response(self, upload, status_code=status.HTTP_200_OK):
+        response = Response(MediaUploadSerializer(upload).data, status=status_code)
+        response['Upload-Offset'] = str(upload.offset)
+        response['Upload-Length'] = str(upload.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def list(self, request):
+        return Response(MediaUploadSerializer(self.get_queryset(), many=True).data)
+
+    def create(self, request):
+        serializer = MediaUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = create_upload(**serializer.validated_data)
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = self._upload_response(upload, status.HTTP_201_CREATED)
+        response['Location'] = request.build_absolute_uri(f'{upload.pk}/')
+        return response
+
+    def retrieve(self, request, pk=None):
+        return self._upload_response(self.get_object())
+
+    def partial_update(self, request, pk=None):
+        if request.content_type.split(';')[0].strip() != self.CHUNK_CONTENT_TYPE:
+            return Response(
+                {'error': f"Content-Type attendu : {self.CHUNK_CONTENT_TYPE}"},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response({'error': "En-tête Upload-Offset manquant ou invalide"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        upload = self.get_object()
+        try:
+            # Corps lu par morceaux depuis la requête, sans passer par request.data
+            upload = append_chunk(upload.pk, offset, request._request, length)
+        except UploadOffsetMismatch as exc:
+            response = Response({'error': str(exc), 'offset': exc.offset}, status=status.HTTP_409_CONFLICT)
+            response['Upload-Offset'] = str(exc.offset)
+            return response
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._upload_response(upload)
+
+    def destroy(self, request, pk=None):
+        abort_upload(self.get_object())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload = self.get_object()
+        serializer = MediaUploadFinalizeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            pair = finalize_upload(upload.pk, serializer.validated_data['pair'], serializer.validated_data['side'])
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(MediaPairAdminSerializer(pair, context={'request': request}).data)
+
+
+class GameSessionListView(generics.ListAPIView):
+    """Sessions de jeu, les plus récentes d'abord (pagination par clé)."""
+    queryset = GameSession.objects.all()
+    serializer_class = GameSessionAdminSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        is_completed = self.request.query_params.get('is_completed')
+        if is_completed is not None:
+            queryset = queryset.filter(is_completed=is_completed.lower() == 'true')
+
+        audience_type = self.request.query_params.get('audience_type')
+        if audience_type:
+            queryset = queryset.filter(audience_type=audience_type)
 
         return queryset
 
@@ -68,12 +347,15 @@ class MediaPairViewSet(viewsets.ModelViewSet):
 @api_view(['GET'])
 def dashboard_stats(request):
     """Get dashboard statistics."""
-    from apps.game.models import GameAnswer
     
     total_categories = Category.objects.count()
     total_pairs = MediaPair.objects.count()
-    total_sessions = GameSession.objects.count()
-    completed_sessions = GameSession.objects.filter(is_completed=True).count()
+    # Mois archivés (sessions et réponses supprimées, voir apps.game.rollups)
+    archived = archived_stats()
+    total_sessions = GameSession.objects.count() + sum(a['sessions_total'] for a in archived.values())
+    completed_sessions = GameSession.objects.filter(is_completed=True).count() + sum(
+        a['completed_total'] for a in archived.values()
+    )
 
     # Taux de réussite par type d'audience
     def calculate_success_rate(audience_type):
@@ -82,11 +364,12 @@ def dashboard_stats(request):
             is_completed=True,
             audience_type=audience_type
         )
-        total_answers = GameAnswer.objects.filter(session__in=sessions).count()
+        rollup = archived.get(audience_type, {})
+        total_answers = GameAnswer.objects.filter(session__in=sessions).count() + rollup.get('answers_total', 0)
         correct_answers = GameAnswer.objects.filter(
             session__in=sessions,
             is_correct=True
-        ).count()
+        ).count() + rollup.get('correct_total', 0)
         
         if total_answers == 0:
             return {
@@ -98,7 +381,7 @@ def dashboard_stats(request):
         
         return {
             'success_rate': round((correct_answers / total_answers) * 100, 1),
-            'total_sessions': sessions.count(),
+            'total_sessions': sessions.count() + rollup.get('completed_total', 0),
             'total_answers': total_answers,
             'correct_answers': correct_answers
         }
@@ -121,6 +404,8 @@ def dashboard_stats(request):
         'school_stats': school_stats,
         'public_stats': public_stats,
         'recent_sessions': recent_sessions,
+        # Cache des fiches de paires de ce worker
+        'pair_card_cache': pair_cards.stats(),
     }
 
     return Response(stats)
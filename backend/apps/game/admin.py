@@ -2,7 +2,13 @@
 Django admin configuration for game models.
 """
 from django.contrib import admin
-from .models import Category, MediaPair, GameSession, GameAnswer, GlobalStats
+from django.db import transaction
+
+from .deletion import delete_pairs
+from .models import (
+    Category, MediaPair, MediaDeletion, MediaUpload, GameSession, GameAnswer, GameStatsRollup, GlobalStats,
+    LeaderboardArchive, RoomArchive, media_pairs_changed,
+)
 
 
 @admin.register(Category)
@@ -11,6 +17,18 @@ class CategoryAdmin(admin.ModelAdmin):
     list_filter = ['is_active']
     search_fields = ['name', 'description']
 
+    # Paires effacées en masse (sans signal par paire) : le post_delete de la
+    # catégorie invalide les caches une fois
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            delete_pairs(obj.media_pairs.all())
+            obj.delete()
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            delete_pairs(MediaPair.objects.filter(category__in=queryset))
+            queryset.delete()
+
 
 @admin.register(MediaPair)
 class MediaPairAdmin(admin.ModelAdmin):
@@ -18,6 +36,28 @@ class MediaPairAdmin(admin.ModelAdmin):
     list_filter = ['category', 'media_type', 'difficulty', 'is_active']
     search_fields = ['hint']
 
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            pair_ids = delete_pairs(queryset)
+            if pair_ids:
+                transaction.on_commit(
+                    lambda: media_pairs_changed.send(sender=MediaPair, pair_ids=pair_ids)
+                )
+
+
+@admin.register(MediaDeletion)
+class MediaDeletionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'reason', 'created_at', 'processed_at']
+    list_filter = ['status']
+    search_fields = ['name', 'reason']
+    readonly_fields = ['name', 'reason', 'attempts', 'last_error', 'created_at', 'processed_at']
+
+
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'offset', 'size', 'created_at', 'updated_at']
+    readonly_fields = ['id', 'filename', 'size', 'offset', 'created_at', 'updated_at']
+
 
 @admin.register(GameSession)
 class GameSessionAdmin(admin.ModelAdmin):
@@ -33,7 +73,31 @@ class GameAnswerAdmin(admin.ModelAdmin):
     list_filter = ['is_correct']
 
 
+@admin.register(GameStatsRollup)
+class GameStatsRollupAdmin(admin.ModelAdmin):
+    list_display = ['month', 'audience_type', 'sessions', 'completed_sessions', 'answers', 'correct_answers']
+    list_filter = ['audience_type']
+    readonly_fields = ['month', 'audience_type', 'sessions', 'completed_sessions', 'answers', 'correct_answers']
+
+
+@admin.register(LeaderboardArchive)
+class LeaderboardArchiveAdmin(admin.ModelAdmin):
+    list_display = ['pseudo', 'score', 'streak_max', 'time_total_ms', 'audience_type', 'created_at']
+    search_fields = ['pseudo']
+
+
 @admin.register(GlobalStats)
 class GlobalStatsAdmin(admin.ModelAdmin):
     list_display = ['media_pair', 'total_attempts', 'correct_answers', 'success_rate']
     readonly_fields = ['total_attempts', 'correct_answers']
+
+
+@admin.register(RoomArchive)
+class RoomArchiveAdmin(admin.ModelAdmin):
+    list_display = ['room_code', 'reason', 'player_count', 'question_count', 'answer_count', 'created_at', 'archived_at']
+    list_filter = ['reason']
+    search_fields = ['room_code']
+    readonly_fields = [
+        'room_code', 'status', 'reason', 'question_count', 'player_count', 'answer_count',
+        'players', 'created_at', 'last_activity_at', 'archived_at',
+    ]
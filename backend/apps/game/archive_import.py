@@ -0,0 +1,199 @@
+"""
+Import d'une archive zip de paires, organisée comme media/pairs/ :
+
+    real/<catégorie>/x.jpg, ai/<catégorie>/x_AI.jpg, audio/<catégorie>/y.wav
+
+(un dossier racine englobant, ex. ``export/real/...``, est accepté).
+
+L'appariement se fait sur le répertoire central de l'archive, avec les règles
+de populate_pairs (apps.game.pairing), avant toute extraction : seuls les
+fichiers appariés sont extraits, un par un et par morceaux, vers le stockage
+des médias. L'archive n'est jamais chargée en mémoire. Les catégories et
+paires sont ensuite créées en bloc.
+
+``ArchiveImporter.run()`` produit une suite d'événements (dicts) pour suivre
+la progression ; le dernier, ``done``, contient le bilan.
+"""
+import posixpath
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+
+from .deletion import schedule_file_deletions
+from .models import Category, MediaPair, media_pairs_changed
+from .pairing import PAIR_TREES, classify_audio_files, match_category_files
+from .processing import process_pair_media
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+PROGRESS_EVERY = 20
+BULK_BATCH_SIZE = 500
+
+
+class ArchiveImportError(ValueError):
+    """Archive illisible ou hors limites."""
+
+
+def _entry_location(filename):
+    """``(type, catégorie, nom)`` d'une entrée de l'archive, ou None si ignorée."""
+    parts = [part for part in filename.split('/') if part]
+    if len(parts) < 3 or parts[0] == '__MACOSX':
+        return None
+    kind, category, name = parts[-3:]
+    if kind.lower() not in PAIR_TREES or any(part.startswith('.') for part in parts):
+        return None
+    return kind.lower(), category, name
+
+
+class ArchiveImporter:
+    """Apparie, extrait et enregistre les paires d'une archive zip."""
+
+    def __init__(self, fileobj, process=True, max_bytes=None):
+        self.fileobj = fileobj
+        self.process = process
+        self.max_bytes = max_bytes or getattr(settings, 'MEDIA_IMPORT_MAX_BYTES', DEFAULT_MAX_BYTES)
+        self.unmatched = []
+        self.ignored = []
+
+    def plan(self, archive):
+        """
+        Liste des paires à créer : ``(nom_catégorie, {'real': info, 'ai': info}
+        | {'audio': info}, media_type, is_real)``, à partir du seul répertoire
+        central de l'archive.
+        """
+        folders = {}  # { slug: {'name': dossier, 'real': {nom: ZipInfo}, ...} }
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            location = _entry_location(info.filename)
+            if location is None:
+                self.ignored.append(info.filename)
+                continue
+            kind, category, name = location
+            folder = folders.setdefault(category.lower(), {'name': category})
+            folder.setdefault(kind, {})[name] = info
+
+        planned = []
+        for _, folder in sorted(folders.items()):
+            category_name = folder['name'].capitalize()
+            real, ai = folder.get('real', {}), folder.get('ai', {})
+            pairs, unmatched, unknown = match_category_files(real, ai)
+            self.unmatched.extend(real[name].filename for name in unmatched)
+            self.ignored.extend(real[name].filename for name in unknown)
+            for real_name, ai_name, media_type in pairs:
+                planned.append((category_name, {'real': real[real_name], 'ai': ai[ai_name]}, media_type, None))
+
+            audio = folder.get('audio', {})
+            entries, unknown = classify_audio_files(audio)
+            self.ignored.extend(audio[name].filename for name in unknown)
+            for name, is_real in entries:
+                planned.append((category_name, {'audio': audio[name]}, 'audio', is_real))
+        return planned
+
+    def _extract(self, archive, info, kind, category_name):
+        """Copie une entrée vers le stockage par morceaux ; retourne le nom stocké."""
+        name = get_valid_filename(posixpath.basename(info.filename))
+        target = f"pairs/{kind}/{get_valid_filename(category_name.lower())}/{name}"
+        with archive.open(info) as source:
+            return default_storage.save(target, File(source, name=name))
+
+    def run(self):
+        try:
+            archive = zipfile.ZipFile(self.fileobj)
+        except (zipfile.BadZipFile, OSError) as exc:
+            raise ArchiveImportError(f"Archive zip illisible : {exc}") from exc
+
+        with archive:
+            planned = self.plan(archive)
+            total_bytes = sum(info.file_size for _, infos, _, _ in planned for info in infos.values())
+            if total_bytes > self.max_bytes:
+                raise ArchiveImportError(
+                    f"Archive trop volumineuse une fois décompressée "
+                    f"({total_bytes} octets, maximum {self.max_bytes})"
+                )
+            yield {'event': 'start', 'pairs': len(planned), 'bytes': total_bytes}
+
+            categories = {c.name.lower(): c for c in Category.objects.all()}
+            new_pairs = []
+            stored = []
+            try:
+                for index, (category_name, infos, media_type, is_real) in enumerate(planned, start=1):
+                    names = {
+                        kind: self._extract(archive, info, kind, category_name)
+                        for kind, info in infos.items()
+                    }
+                    stored.extend(names.values())
+                    new_pairs.append((category_name, names, media_type, is_real))
+                    if index % PROGRESS_EVERY == 0 or index == len(planned):
+                        yield {'event': 'extracted', 'done': index, 'total': len(planned)}
+            except (zipfile.BadZipFile, OSError, EOFError) as exc:
+                schedule_file_deletions(stored, reason="Import zip interrompu")
+                raise ArchiveImportError(f"Extraction impossible : {exc}") from exc
+
+        created, skipped, created_categories = self._save(categories, new_pairs)
+        yield {'event': 'saved', 'created': len(created), 'skipped': skipped}
+
+        if self.process:
+            for index, pair in enumerate(created, start=1):
+                process_pair_media(pair)
+                if index % PROGRESS_EVERY == 0 or index == len(created):
+                    yield {'event': 'processed', 'done': index, 'total': len(created)}
+
+        yield {
+            'event': 'done',
+            'pairs_created': len(created),
+            'pairs_skipped': skipped,
+            'categories_created': created_categories,
+            'unmatched': self.unmatched,
+            'ignored': self.ignored,
+        }
+
+    def _save(self, categories, new_pairs):
+        """Crée catégories et paires en bloc ; ignore les paires déjà présentes."""
+        created_categories = []
+        duplicates = []
+        with transaction.atomic():
+            for category_name, _, _, _ in new_pairs:
+                if category_name.lower() not in categories:
+                    category = Category.objects.create(name=category_name)
+                    categories[category_name.lower()] = category
+                    created_categories.append(category_name)
+
+            # Contenus identiques (stockage adressé par contenu) : même paire
+            stored = [name for _, names, _, _ in new_pairs for name in names.values()]
+            existing = set(
+                MediaPair.objects.filter(real_media__in=stored).values_list('real_media', 'ai_media')
+            ) | {
+                (audio, None)
+                for audio in MediaPair.objects.filter(audio_media__in=stored).values_list('audio_media', flat=True)
+            }
+
+            pairs = []
+            for category_name, names, media_type, is_real in new_pairs:
+                key = (names['audio'], None) if 'audio' in names else (names['real'], names['ai'])
+                if key in existing:
+                    duplicates.extend(names.values())
+                    continue
+                existing.add(key)
+                pairs.append(MediaPair(
+                    category=categories[category_name.lower()],
+                    real_media=names.get('real'),
+                    ai_media=names.get('ai'),
+                    audio_media=names.get('audio'),
+                    is_real=is_real,
+                    media_type=media_type,
+                    difficulty='medium',
+                    is_active=True,
+                ))
+            MediaPair.objects.bulk_create(pairs, batch_size=BULK_BATCH_SIZE)
+            if pairs:
+                pair_ids = [pair.pk for pair in pairs]
+                transaction.on_commit(
+                    lambda: media_pairs_changed.send(sender=MediaPair, pair_ids=pair_ids)
+                )
+            # Les doublons ont ajouté une référence aux fichiers : la libérer
+            schedule_file_deletions(duplicates, reason="Import zip : paire déjà présente")
+        return pairs, len(new_pairs) - len(pairs), created_categories
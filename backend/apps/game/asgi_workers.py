@@ -0,0 +1,57 @@
+"""
+Workers ASGI : plusieurs processus Daphne, un par port consécutif, derrière
+nginx (voir nginx/40-backend-upstream.sh).
+
+Les workers ne partagent rien en mémoire. Les groupes WebSocket passent par
+la channel layer Redis, l'état des rooms par la base et le cache Redis (voir
+room_state) : l'hôte et les joueurs d'une room peuvent être connectés à des
+workers différents.
+"""
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+
+def daphne_command(port, bind='0.0.0.0'):
+    return [sys.executable, '-m', 'daphne', '-b', bind, '-p', str(port), 'config.asgi:application']
+
+
+def start_workers(count, base_port, bind='0.0.0.0', env=None, stdout=None, stderr=None):
+    """Lance ``count`` workers sur les ports ``base_port`` à ``base_port + count - 1``."""
+    return [
+        subprocess.Popen(
+            daphne_command(base_port + index, bind), cwd=settings.BASE_DIR,
+            env=env, stdout=stdout, stderr=stderr,
+        )
+        for index in range(count)
+    ]
+
+
+def stop_workers(processes, timeout=10):
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def wait_ready(processes, base_port, host='127.0.0.1', timeout=30):
+    """Attend que chaque worker accepte les connexions ; RuntimeError sinon."""
+    deadline = time.monotonic() + timeout
+    for index, process in enumerate(processes):
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Le worker {index} s'est arrêté (code {process.returncode})")
+            try:
+                socket.create_connection((host, base_port + index), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Le worker {index} ne répond pas sur le port {base_port + index}")
+                time.sleep(0.2)
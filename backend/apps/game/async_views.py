@@ -0,0 +1,216 @@
+"""
+Versions asynchrones des endpoints chauds du jeu : création de session,
+réponse, classement et détail d'une room.
+
+Sous Daphne, les vues DRF de views.py s'exécutent une par une dans le thread
+réservé au code synchrone. Celles-ci restent dans la boucle d'événements et
+n'en sortent que pour l'ORM asynchrone (``aget``, ``acreate``, ``afirst``),
+le cache, la session et l'enregistrement atomique d'une réponse. Elles
+gardent les mêmes URLs, les mêmes corps de réponse et les mêmes erreurs.
+``GAME_ASYNC_VIEWS`` choisit l'une ou l'autre version (voir urls.py).
+"""
+import io
+import random
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import ParseError
+
+from . import response_cache
+from .manifest import build_session_manifest, preload_link_header
+from .models import GameSession, LeaderboardArchive, MediaPair, MultiplayerRoom
+from .pair_cards import pair_cards
+from .payloads import game_pairs_payload, media_base_url
+from .renderers import FastJSONParser, FastJSONRenderer
+from .rollups import merge_leaderboard
+from .scoring import AlreadyAnswered, answer_payload, check_answer, record_answer
+from .serializers import AnswerSubmitSerializer, GameSessionCreateSerializer, LeaderboardEntrySerializer
+from .versioning import LEADERBOARD, aconditional_response, aget_versions, make_etag
+
+_renderer = FastJSONRenderer()
+_parser = FastJSONParser()
+
+
+def json_response(data, status=200):
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+
+
+class AsyncAPIView(View):
+    """Base des vues asynchrones : corps JSON ou formulaire, exemptées de CSRF comme APIView."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    def validate(self, serializer_class, request):
+        """(données validées, None) ou (None, réponse 400) comme DRF."""
+        try:
+            if request.content_type == 'application/json':
+                data = _parser.parse(
+                    io.BytesIO(request.body), parser_context={'encoding': request.encoding or 'utf-8'}
+                ) if request.body else {}
+            else:
+                data = request.POST
+        except ParseError as exc:
+            return None, json_response({'detail': exc.detail}, status=400)
+        serializer = serializer_class(data=data)
+        if not serializer.is_valid():
+            return None, json_response(serializer.errors, status=400)
+        return serializer.validated_data, None
+
+
+class GameSessionView(AsyncAPIView):
+    """Create a new game session."""
+
+    async def post(self, request):
+        data, error = self.validate(GameSessionCreateSerializer, request)
+        if error:
+            return error
+
+        # Pick 10 random pairs : tirage sur les ids, puis chargement des seules paires tirées
+        active_ids = [pk async for pk in MediaPair.objects.filter(is_active=True).values_list('id', flat=True)]
+        chosen = random.sample(active_ids, min(10, len(active_ids)))
+        pairs_by_id = {
+            pair.pk: pair
+            async for pair in MediaPair.objects.select_related('category').filter(pk__in=chosen)
+        }
+        pairs = [pairs_by_id[pk] for pk in chosen if pk in pairs_by_id]
+
+        if len(pairs) < 1:
+            return json_response({'error': 'Pas assez de paires disponibles'}, status=400)
+
+        session = await GameSession.objects.acreate(
+            audience_type=data.get('audience_type', 'public'), total_pairs=len(pairs)
+        )
+
+        # Random positions for real media (left or right) - only for image/video
+        positions = {pair.id: random.choice(['left', 'right']) for pair in pairs if pair.media_type != 'audio'}
+        await sync_to_async(request.session.update)({
+            f'positions_{session.session_key}': positions,
+            f'pairs_{session.session_key}': [p.id for p in pairs],
+        })
+
+        media_base = media_base_url(request)
+        manifest = build_session_manifest(media_base, pairs, positions)
+        response = json_response({
+            'session_key': str(session.session_key),
+            'quiz_name': 'Mode Aléatoire',
+            'pairs': game_pairs_payload(media_base, pairs, positions),
+            'total_pairs': len(pairs),
+            'manifest': manifest,
+        }, status=201)
+        # Précharger la première paire pendant que le client traite la réponse
+        link = preload_link_header(manifest[0])
+        if link:
+            response['Link'] = link
+        return response
+
+
+class AnswerSubmitView(AsyncAPIView):
+    """Submit an answer for a game session."""
+
+    async def post(self, request, session_key):
+        try:
+            session = await GameSession.objects.aget(session_key=session_key, is_completed=False)
+        except GameSession.DoesNotExist:
+            return json_response({'error': 'Session non trouvée ou déjà terminée'}, status=404)
+
+        data, error = self.validate(AnswerSubmitSerializer, request)
+        if error:
+            return error
+        pair_id = data['pair_id']
+        response_time_ms = data['response_time_ms']
+
+        # Seules les paires tirées pour la session (voir GameSessionView)
+        drawn, positions = await sync_to_async(lambda: (
+            request.session.get(f'pairs_{session.session_key}', []),
+            request.session.get(f'positions_{session.session_key}', {}),
+        ))()
+        if pair_id not in drawn:
+            return json_response({'error': 'Paire non tirée pour cette session'}, status=400)
+
+        card = await pair_cards.aget(pair_id)
+        if card is None:
+            return json_response({'error': 'Paire non trouvée'}, status=404)
+
+        real_position = 'left'
+        if card.media_type != 'audio':
+            real_position = {int(k): v for k, v in positions.items()}.get(pair_id, 'left')
+        is_correct, ai_position = check_answer(card, data['choice'], real_position)
+
+        # Pas de transaction asynchrone dans Django : points et écritures
+        # (réponse, statistiques, session relue sous verrou) restent un bloc
+        # atomique, en un seul passage par le thread synchrone
+        try:
+            session, points_earned, global_stats = await sync_to_async(record_answer)(
+                session, card, is_correct, response_time_ms
+            )
+        except GameSession.DoesNotExist:
+            return json_response({'error': 'Session non trouvée ou déjà terminée'}, status=404)
+        except AlreadyAnswered:
+            return json_response({'error': 'Paire déjà répondue'}, status=409)
+        return json_response(answer_payload(card, session, is_correct, ai_position, points_earned, global_stats))
+
+
+class LeaderboardView(AsyncAPIView):
+    """Get leaderboard."""
+
+    async def get(self, request):
+        limit = int(request.GET.get('limit', 10))
+
+        async def compute():
+            sessions = GameSession.objects.filter(
+                is_completed=True,
+                pseudo__isnull=False,
+            ).exclude(pseudo='').order_by('-score', 'time_total_ms')[:limit]
+            archived = LeaderboardArchive.objects.all()[:limit]
+            entries = merge_leaderboard([s async for s in sessions], [a async for a in archived], limit)
+            return LeaderboardEntrySerializer(entries, many=True).data
+
+        async def build():
+            key = await response_cache.acache_key(response_cache.LEADERBOARD, 'leaderboard', str(limit))
+            return json_response(await response_cache.aget_or_compute(key, compute))
+
+        etag = make_etag('leaderboard', limit, *await aget_versions(LEADERBOARD))
+        return await aconditional_response(request, etag, build)
+
+
+class MultiplayerRoomDetailView(AsyncAPIView):
+    """Get multiplayer room details."""
+
+    async def get(self, request, room_code):
+        room_code = room_code.upper()
+        # Rooms terminées : servies depuis le cache, sans requête
+        cache_key = await response_cache.acache_key(response_cache.room_topic(room_code), 'room-detail')
+        cached = await response_cache.cache.aget(cache_key)
+        if cached is not None:
+            return await aconditional_response(request, cached['etag'], self._respond(cached['data']))
+
+        room = await MultiplayerRoom.objects.filter(room_code=room_code).annotate(
+            players_count=Count('players', filter=Q(players__is_connected=True))
+        ).afirst()
+        if room is None:
+            return json_response({'error': 'Room non trouvée'}, status=404)
+
+        etag = make_etag('room', room.id, room.status, room.players_count, room.updated_at.timestamp())
+        data = {
+            'id': room.id,
+            'room_code': room.room_code,
+            'quiz': None,
+            'status': room.status,
+            'players_count': room.players_count,
+            'created_at': room.created_at.isoformat(),
+        }
+        if room.status == MultiplayerRoom.RoomStatus.FINISHED:
+            await response_cache.cache.aset(cache_key, {'etag': etag, 'data': data}, response_cache.DEFAULT_TIMEOUT)
+        return await aconditional_response(request, etag, self._respond(data))
+
+    @staticmethod
+    def _respond(data):
+        async def build():
+            return json_response(data)
+        return build
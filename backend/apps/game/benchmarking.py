@@ -0,0 +1,178 @@
+"""
+Outils communs aux commandes de benchmark (bench_*).
+
+Mesure de latence, de requêtes SQL et d'allocations, agrégation en
+percentiles et comparaison à une baseline JSON.
+"""
+import json
+import math
+import platform
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.core.management.base import CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(sorted_values, pct):
+    """Percentile par interpolation linéaire sur une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(sorted_values[low])
+    weight = rank - low
+    return sorted_values[low] * (1 - weight) + sorted_values[high] * weight
+
+
+class Sample:
+    """Mesures brutes d'un point de mesure (un endpoint, un scénario)."""
+
+    def __init__(self):
+        self.latencies_ms = []
+        self.queries = []
+        self.alloc_peaks_kb = []
+
+    def summary(self):
+        latencies = sorted(self.latencies_ms)
+        count = len(latencies)
+        return {
+            'count': count,
+            'mean_ms': round(sum(latencies) / count, 3) if count else 0.0,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p90_ms': round(percentile(latencies, 90), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3) if count else 0.0,
+            'queries_mean': round(sum(self.queries) / len(self.queries), 2) if self.queries else 0.0,
+            'queries_max': max(self.queries) if self.queries else 0,
+            'alloc_peak_kb_mean': (
+                round(sum(self.alloc_peaks_kb) / len(self.alloc_peaks_kb), 1)
+                if self.alloc_peaks_kb else None
+            ),
+        }
+
+
+class Recorder:
+    """
+    Collecte les mesures par nom de point de mesure.
+
+    En mode ``trace_alloc`` seul le pic d'allocation est relevé : tracemalloc
+    fausse trop la latence pour que les deux soient mesurés ensemble.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.trace_alloc = False
+
+    def sample(self, name):
+        if name not in self.samples:
+            self.samples[name] = Sample()
+        return self.samples[name]
+
+    @contextmanager
+    def measure(self, name):
+        sample = self.sample(name)
+        if self.trace_alloc:
+            tracemalloc.start()
+            try:
+                yield
+            finally:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            sample.alloc_peaks_kb.append(peak / 1024)
+            return
+
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            yield
+            elapsed = time.perf_counter() - start
+        sample.latencies_ms.append(elapsed * 1000)
+        sample.queries.append(len(ctx.captured_queries))
+
+    def summaries(self):
+        return {name: sample.summary() for name, sample in self.samples.items()}
+
+
+def environment_info():
+    """Métadonnées utiles pour comparer deux résultats entre eux."""
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'db_vendor': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def discard_cached_responses():
+    """
+    À appeler après un benchmark exécuté dans une transaction annulée : les
+    invalidations des signaux attendent un commit qui n'arrive jamais, et les
+    réponses calculées sur les données du benchmark resteraient dans le cache
+    partagé sous la génération courante.
+    """
+    from . import response_cache
+    from .pair_cards import pair_cards
+
+    response_cache.invalidate_now(response_cache.CATEGORIES, response_cache.LEADERBOARD)
+    pair_cards.invalidate()
+
+
+def start_fake_redis():
+    """Serveur fakeredis local servi par un thread : (serveur, port)."""
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        raise CommandError("--fake-redis nécessite fakeredis : pip install 'fakeredis[lua]'")
+    server = TcpFakeServer(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+
+def write_results(path, payload):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(results, baseline, metric, max_regression_pct):
+    """
+    Compare deux listes de scénarios et retourne les régressions.
+
+    Les scénarios sont appariés par leur clé ``scenario``, les endpoints par
+    leur nom ; ceux absents de la baseline sont ignorés.
+    """
+    def key(scenario):
+        return json.dumps(scenario, sort_keys=True)
+
+    baseline_index = {key(item['scenario']): item for item in baseline.get('results', [])}
+    regressions = []
+    for item in results:
+        reference = baseline_index.get(key(item['scenario']))
+        if not reference:
+            continue
+        for endpoint, summary in item['endpoints'].items():
+            ref_summary = reference['endpoints'].get(endpoint)
+            if not ref_summary or not ref_summary.get(metric):
+                continue
+            before = ref_summary[metric]
+            after = summary[metric]
+            delta_pct = (after - before) / before * 100
+            if delta_pct > max_regression_pct:
+                regressions.append({
+                    'scenario': item['scenario'],
+                    'endpoint': endpoint,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'delta_pct': round(delta_pct, 1),
+                })
+    return regressions
@@ -0,0 +1,127 @@
+"""
+Compression des réponses JSON de l'API (brotli ou gzip selon
+``Accept-Encoding``).
+
+Seules les réponses JSON non streamées et d'au moins
+``API_COMPRESSION_MIN_BYTES`` octets sont compressées : en dessous, l'en-tête
+coûte plus qu'il ne rapporte. Brotli (si le module est installé) est préféré
+à gzip à préférence égale du client ; la réponse compressée n'est gardée que
+si elle est plus petite.
+"""
+import gzip
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # dépendance optionnelle
+    brotli = None
+
+DEFAULT_MIN_BYTES = 1024
+BROTLI_QUALITY = 5  # rapide, assez pour des réponses dynamiques
+GZIP_LEVEL = 6
+
+COMPRESSIBLE_TYPES = ('application/json',)
+
+
+def _brotli(content):
+    return brotli.compress(content, quality=BROTLI_QUALITY)
+
+
+def _gzip(content):
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def available_codings():
+    """Encodages disponibles, par ordre de préférence."""
+    codings = [('gzip', _gzip)]
+    if brotli is not None:
+        codings.insert(0, ('br', _brotli))
+    return codings
+
+
+def accepted_codings(header):
+    """{encodage: qualité} d'un en-tête Accept-Encoding (qualité 0 = refusé)."""
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header):
+    """(nom, fonction) de l'encodage à utiliser pour cet en-tête, ou None."""
+    accepted = accepted_codings(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for name, compress in available_codings():
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = (name, compress), quality
+    return best
+
+
+class CompressionMiddleware:
+    """Compresse les réponses JSON de l'API selon l'Accept-Encoding du client."""
+
+    # Utilisable dans une chaîne asynchrone sans repasser par un thread
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'API_COMPRESSION_MIN_BYTES', DEFAULT_MIN_BYTES)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.compress(request, response)
+
+    def compress(self, request, response):
+        # Les réponses streamées (progression NDJSON) doivent arriver au fil de l'eau
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < self.min_bytes:
+            return response
+        coding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is None:
+            return response
+
+        name, compress = coding
+        compressed = compress(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = name
+        # Le corps diffère octet par octet : un ETag fort devient faible
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
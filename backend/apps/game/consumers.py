@@ -4,10 +4,18 @@ WebSocket consumers for multiplayer game.
 import json
 import random
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from django.db import transaction
 from django.utils import timezone
 
+from . import room_state
 from .models import MultiplayerRoom, MultiplayerPlayer, MultiplayerAnswer, MediaPair
+from .pair_cards import pair_cards
+from .room_executor import room_sync_to_async
+
+
+def room_group(room_code):
+    """Groupe de channel layer des connexions d'une room."""
+    return f'multiplayer_{room_code}'
 
 
 class MultiplayerConsumer(AsyncWebsocketConsumer):
@@ -17,7 +25,7 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         """Handle WebSocket connection."""
         # Normalize room code to uppercase
         self.room_code = self.scope['url_route']['kwargs']['room_code'].upper()
-        self.room_group_name = f'multiplayer_{self.room_code}'
+        self.room_group_name = room_group(self.room_code)
         self.player_id = None
         self.is_host = False
         
@@ -177,8 +185,10 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
             await self.send_error("Game already started")
             return
         
-        # Start the game
-        await self.start_game()
+        # Start the game (another host connection may have started it first)
+        if not await self.start_game():
+            await self.send_error("Game already started")
+            return
         
         # Get first question data
         question_data = await self.get_current_question_data()
@@ -308,8 +318,7 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         )
         
         # Check if all players answered
-        all_answered = await self.check_all_answered()
-        if all_answered:
+        if result['all_answered']:
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
@@ -394,19 +403,22 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
             'podium': event['podium'],
         }))
     
+    async def room_closed(self, event):
+        """Room supprimée par le ramasse-miettes (voir room_gc)."""
+        await self.send_error("Cette room a expiré")
+        await self.close()
+    
     # ========================================
     # Database Operations
+    # (une file d'exécution par room, voir room_executor)
     # ========================================
     
-    @database_sync_to_async
+    @room_sync_to_async
     def get_room(self):
-        """Get the room by code."""
-        try:
-            return MultiplayerRoom.objects.get(room_code=self.room_code)
-        except MultiplayerRoom.DoesNotExist:
-            return None
+        """Get the room state by code (shared by all workers)."""
+        return room_state.load(self.room_code)
     
-    @database_sync_to_async
+    @room_sync_to_async
     def get_players_list(self):
         """Get list of connected players."""
         try:
@@ -423,7 +435,7 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         except MultiplayerRoom.DoesNotExist:
             return []
     
-    @database_sync_to_async
+    @room_sync_to_async
     def get_player_from_channel(self):
         """Get player ID from channel_name stored in database."""
         try:
@@ -436,7 +448,7 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         except MultiplayerRoom.DoesNotExist:
             return None
     
-    @database_sync_to_async
+    @room_sync_to_async
     def create_or_update_player(self, pseudo, room_status='waiting'):
         """Create a new player or update existing one."""
         try:
@@ -445,7 +457,7 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
             # Check if player was disconnected, reconnect them (allow reconnection anytime)
             player = room.players.filter(pseudo__iexact=pseudo).first()
             if player:
-                # Player exists - this is a reconnection
+                # Player exists - this is a reconnection (possibly on another worker)
                 player.is_connected = True
                 player.channel_name = self.channel_name
                 player.save()
@@ -474,111 +486,118 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         except MultiplayerRoom.DoesNotExist:
             return None, False, "Room not found"
     
-    @database_sync_to_async
+    @room_sync_to_async
     def mark_player_disconnected(self):
         """Mark the current player as disconnected."""
         if self.player_id:
             try:
-                player = MultiplayerPlayer.objects.get(id=self.player_id)
+                player = MultiplayerPlayer.objects.select_related('room').get(id=self.player_id)
+                # A newer connection (other tab, other worker) took the player over
+                if player.channel_name != self.channel_name:
+                    return
                 player.is_connected = False
                 player.save()
             except MultiplayerPlayer.DoesNotExist:
                 pass
     
-    @database_sync_to_async
+    @room_sync_to_async
     def start_game(self):
-        """Start the game and prepare questions."""
-        room = MultiplayerRoom.objects.get(room_code=self.room_code)
-        
-        # Get 10 random pairs
-        all_pairs = list(MediaPair.objects.filter(is_active=True))
-        pairs = random.sample(all_pairs, min(10, len(all_pairs)))
-        
-        room.pairs.set(pairs)
-        
-        # Generate random AI positions
-        positions = {}
-        for pair in pairs:
-            if pair.media_type != 'audio':
-                positions[str(pair.id)] = random.choice(['left', 'right'])
-        
-        room.ai_positions = positions
-        room.status = 'playing'
-        room.current_pair_index = 0
-        room.save()
+        """Start the game and prepare questions. Returns False if already started."""
+        with transaction.atomic():
+            room, state = room_state.locked(self.room_code)
+            if state.status != 'waiting':
+                return False
+            
+            # Get 10 random pairs
+            all_pairs = list(MediaPair.objects.filter(is_active=True))
+            pairs = random.sample(all_pairs, min(10, len(all_pairs)))
+            
+            room.pairs.set(pairs)
+            
+            # Generate random AI positions
+            positions = {}
+            for pair in pairs:
+                if pair.media_type != 'audio':
+                    positions[str(pair.id)] = random.choice(['left', 'right'])
+            
+            room.ai_positions = positions
+            room.status = 'playing'
+            room.current_pair_index = 0
+            room.save()
+        return True
     
-    @database_sync_to_async
+    @room_sync_to_async
     def get_current_question_data(self):
         """Get data for the current question."""
-        room = MultiplayerRoom.objects.get(room_code=self.room_code)
-        # Sort pairs by ID for consistent ordering
-        pairs = list(room.pairs.all().order_by('id'))
+        state = room_state.load(self.room_code)
+        card = self.get_current_card(state)
         
-        if room.current_pair_index >= len(pairs):
+        if card is None:
             return None
         
-        pair = pairs[room.current_pair_index]
-        # Default to 'right' if ai_position is not set (AI on right, real on left)
-        ai_position = room.ai_positions.get(str(pair.id), 'right')
+        ai_position = state.ai_position(card.id)
         
         # Build media URLs
         data = {
-            'pair_id': pair.id,
-            'question_number': room.current_pair_index + 1,
-            'total_questions': len(pairs),
-            'media_type': pair.media_type,
-            'category': pair.category.name if pair.category else 'Général',
-            'difficulty': pair.difficulty,
+            'pair_id': card.id,
+            'question_number': state.current_pair_index + 1,
+            'total_questions': state.total_questions,
+            'media_type': card.media_type,
+            'category': card.category_name,
+            'difficulty': card.difficulty,
         }
         
-        if pair.media_type == 'audio':
-            data['audio_media'] = pair.audio_media.url if pair.audio_media else None
-            data['is_real'] = pair.is_real
+        if card.media_type == 'audio':
+            data['audio_media'] = card.urls.get('audio')
+            data['audio_peaks'] = card.peaks_url
+            data['audio_info'] = card.info.get('audio')
+            data['is_real'] = card.is_real
         else:
             # Position real and AI media based on random position
-            if ai_position == 'left':
-                data['left_media'] = pair.ai_media.url if pair.ai_media else None
-                data['right_media'] = pair.real_media.url if pair.real_media else None
-            else:
-                data['left_media'] = pair.real_media.url if pair.real_media else None
-                data['right_media'] = pair.ai_media.url if pair.ai_media else None
+            left_side, right_side = ('ai', 'real') if ai_position == 'left' else ('real', 'ai')
+            data['left_media'] = card.urls.get(left_side)
+            data['right_media'] = card.urls.get(right_side)
+            data['left_info'] = card.info.get(left_side)
+            data['right_info'] = card.info.get(right_side)
+            if card.media_type == 'image':
+                data['left_srcset'] = card.srcsets.get(left_side, [])
+                data['right_srcset'] = card.srcsets.get(right_side, [])
         
         return data
     
-    @database_sync_to_async
+    @room_sync_to_async
     def advance_to_next_question(self):
         """Move to the next question. Returns True if there are more questions."""
-        room = MultiplayerRoom.objects.get(room_code=self.room_code)
-        room.current_pair_index += 1
-        room.status = 'playing'
-        room.save()
+        with transaction.atomic():
+            room, state = room_state.locked(self.room_code)
+            room.current_pair_index += 1
+            room.status = 'playing'
+            room.save()
         
-        return room.current_pair_index < room.pairs.count()
+        return room.current_pair_index < state.total_questions
     
-    @database_sync_to_async
+    @room_sync_to_async
     def set_room_status(self, status):
         """Set the room status."""
         room = MultiplayerRoom.objects.get(room_code=self.room_code)
         room.status = status
         room.save()
     
-    @database_sync_to_async
+    @room_sync_to_async
     def get_answer_data(self):
         """Get the correct answer data for the current question."""
-        room = MultiplayerRoom.objects.get(room_code=self.room_code)
-        # Sort pairs by ID for consistent ordering
-        pairs = list(room.pairs.all().order_by('id'))
+        state = room_state.load(self.room_code)
+        card = self.get_current_card(state)
         
-        if room.current_pair_index >= len(pairs):
+        if card is None:
             return None
         
-        pair = pairs[room.current_pair_index]
-        ai_position = room.ai_positions.get(str(pair.id), 'right')
+        ai_position = state.ai_position(card.id)
         
         # Get player scores for this question
         answers = MultiplayerAnswer.objects.filter(
-            player__room=room,
-            media_pair=pair
+            player__room_id=state.id,
+            media_pair_id=card.id
         ).select_related('player').order_by('answer_order')
         
         player_results = [
@@ -592,115 +611,97 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
         ]
         
         return {
-            'pair_id': pair.id,
-            'ai_position': ai_position if pair.media_type != 'audio' else ('ai' if not pair.is_real else 'real'),
-            'hint': pair.hint,
+            'pair_id': card.id,
+            'ai_position': ai_position if card.media_type != 'audio' else card.ai_position(None),
+            'hint': card.hint,
             'player_results': player_results,
         }
     
-    @database_sync_to_async
+    @room_sync_to_async
     def submit_answer(self, choice, response_time_ms):
         """Submit a player's answer."""
         try:
-            room = MultiplayerRoom.objects.get(room_code=self.room_code)
-            player = MultiplayerPlayer.objects.get(id=self.player_id)
-            # Sort pairs by ID for consistent ordering
-            pairs = list(room.pairs.all().order_by('id'))
-            
-            if room.current_pair_index >= len(pairs):
-                return {'error': 'No current question'}
-            
-            pair = pairs[room.current_pair_index]
-            
-            # Check if already answered
-            if MultiplayerAnswer.objects.filter(player=player, media_pair=pair).exists():
-                return {'error': 'Already answered'}
-            
-            # Determine if correct
-            if pair.media_type == 'audio':
-                is_correct = (
-                    (choice == 'real' and pair.is_real is True) or
-                    (choice == 'ai' and pair.is_real is False)
-                )
-            else:
-                ai_position = room.ai_positions.get(str(pair.id), 'right')
-                is_correct = (choice == ai_position)
-            
-            # Calculate points with position bonus
-            base_points = 100 if is_correct else 0
-            position_bonus = 0
-            
-            if is_correct:
-                # Count how many correct answers before this one
-                correct_before = MultiplayerAnswer.objects.filter(
+            # Room locked until commit: answers from players connected to
+            # other workers are counted one at a time (order, bonus)
+            with transaction.atomic():
+                room, state = room_state.locked(self.room_code)
+                player = room.players.get(id=self.player_id)
+                card = self.get_current_card(state)
+                
+                if card is None:
+                    return {'error': 'No current question'}
+                
+                # Check if already answered
+                if MultiplayerAnswer.objects.filter(player=player, media_pair_id=card.id).exists():
+                    return {'error': 'Already answered'}
+                
+                # Determine if correct
+                if card.media_type == 'audio':
+                    is_correct = (
+                        (choice == 'real' and card.is_real is True) or
+                        (choice == 'ai' and card.is_real is False)
+                    )
+                else:
+                    is_correct = (choice == state.ai_position(card.id))
+                
+                # Calculate points with position bonus
+                base_points = 100 if is_correct else 0
+                position_bonus = 0
+                
+                if is_correct:
+                    # Count how many correct answers before this one
+                    correct_before = MultiplayerAnswer.objects.filter(
+                        player__room=room,
+                        media_pair_id=card.id,
+                        is_correct=True
+                    ).count()
+                    
+                    # Bonus: 1st = +50, 2nd = +30, 3rd = +10
+                    if correct_before == 0:
+                        position_bonus = 50
+                    elif correct_before == 1:
+                        position_bonus = 30
+                    elif correct_before == 2:
+                        position_bonus = 10
+                
+                points_earned = base_points + position_bonus
+                
+                # Get answer order
+                answer_order = MultiplayerAnswer.objects.filter(
                     player__room=room,
-                    media_pair=pair,
-                    is_correct=True
-                ).count()
+                    media_pair_id=card.id
+                ).count() + 1
                 
-                # Bonus: 1st = +50, 2nd = +30, 3rd = +10
-                if correct_before == 0:
-                    position_bonus = 50
-                elif correct_before == 1:
-                    position_bonus = 30
-                elif correct_before == 2:
-                    position_bonus = 10
-            
-            points_earned = base_points + position_bonus
-            
-            # Get answer order
-            answer_order = MultiplayerAnswer.objects.filter(
-                player__room=room,
-                media_pair=pair
-            ).count() + 1
-            
-            # Create answer
-            MultiplayerAnswer.objects.create(
-                player=player,
-                media_pair=pair,
-                choice=choice,
-                is_correct=is_correct,
-                response_time_ms=response_time_ms,
-                points_earned=points_earned,
-                answer_order=answer_order,
-            )
-            
-            # Update player score
-            player.score += points_earned
-            player.save()
+                # Create answer
+                MultiplayerAnswer.objects.create(
+                    player=player,
+                    media_pair_id=card.id,
+                    choice=choice,
+                    is_correct=is_correct,
+                    response_time_ms=response_time_ms,
+                    points_earned=points_earned,
+                    answer_order=answer_order,
+                )
+                
+                # Update player score
+                player.score += points_earned
+                player.save()
+                
+                # Decided under the lock: only the last answer sees everyone answered
+                all_answered = self.count_unanswered(room, card) == 0
             
             return {
                 'is_correct': is_correct,
                 'points_earned': points_earned,
                 'total_score': player.score,
                 'pseudo': player.pseudo,
+                'all_answered': all_answered,
             }
             
         except Exception as e:
             return {'error': str(e)}
     
-    @database_sync_to_async
-    def check_all_answered(self):
-        """Check if all connected players have answered the current question."""
-        room = MultiplayerRoom.objects.get(room_code=self.room_code)
-        # Sort pairs by ID for consistent ordering
-        pairs = list(room.pairs.all().order_by('id'))
-        
-        if room.current_pair_index >= len(pairs):
-            return True
-        
-        pair = pairs[room.current_pair_index]
-        
-        connected_players = room.players.filter(is_connected=True).count()
-        answered = MultiplayerAnswer.objects.filter(
-            player__room=room,
-            player__is_connected=True,
-            media_pair=pair
-        ).count()
-        
-        return answered >= connected_players
-    
-    @database_sync_to_async
+    @room_sync_to_async
     def get_podium_data(self):
         """Get final podium/leaderboard data."""
         room = MultiplayerRoom.objects.get(room_code=self.room_code)
@@ -720,6 +721,21 @@ class MultiplayerConsumer(AsyncWebsocketConsumer):
     # Helpers
     # ========================================
     
+    def get_current_card(self, state):
+        """Fiche de la question courante de ``state``, ou None."""
+        pair_id = state.current_pair_id
+        return pair_cards.get(pair_id) if pair_id is not None else None
+    
+    def count_unanswered(self, room, card):
+        """Connected players who have not answered the current question yet."""
+        connected_players = room.players.filter(is_connected=True).count()
+        answered = MultiplayerAnswer.objects.filter(
+            player__room=room,
+            player__is_connected=True,
+            media_pair_id=card.id
+        ).count()
+        return max(connected_players - answered, 0)
+    
     async def send_error(self, message):
         """Send error message to client."""
         await self.send(text_data=json.dumps({
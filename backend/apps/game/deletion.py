@@ -0,0 +1,224 @@
+"""
+File d'attente des suppressions de fichiers médias.
+
+La suppression d'une paire n'efface plus ses fichiers dans le signal
+``post_delete`` : elle enregistre une ligne ``MediaDeletion`` par fichier dans
+la même transaction. Si la transaction est annulée, rien n'est supprimé ; une
+fois validée, ``transaction.on_commit`` réveille un thread de fond qui traite
+la file par lots, avec reprise exponentielle en cas d'échec. Les lignes
+traitées restent comme journal d'audit.
+
+La commande ``process_media_deletions`` traite la même file (cron, conteneur
+dédié, ou ``MEDIA_DELETION_WORKER = False`` pour désactiver le thread).
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = 30  # secondes, doublé à chaque nouvel échec
+WORKER_IDLE_INTERVAL = 60  # relance périodique pour les reprises différées
+
+
+_batch = threading.local()
+
+
+def schedule_file_deletions(names, reason=''):
+    """
+    Met en file la suppression des fichiers ``names`` (noms de stockage).
+
+    Un même nom peut apparaître plusieurs fois : chaque occurrence libère une
+    référence d'un fichier adressé par contenu.
+    """
+    from .models import MediaDeletion
+
+    entries = [MediaDeletion(name=name, reason=reason[:255]) for name in names if name]
+    if not entries:
+        return
+    pending = getattr(_batch, 'entries', None)
+    if pending is not None:
+        pending.extend(entries)  # Inséré à la sortie de batched_file_deletions()
+        return
+    MediaDeletion.objects.bulk_create(entries)
+    if getattr(settings, 'MEDIA_DELETION_WORKER', True):
+        transaction.on_commit(worker.wake)
+
+
+@contextmanager
+def batched_file_deletions():
+    """
+    Regroupe les mises en file du bloc (une par paire supprimée) en un seul
+    INSERT à la sortie. À utiliser dans la transaction de la suppression.
+    """
+    from .models import MediaDeletion
+
+    if getattr(_batch, 'entries', None) is not None:
+        yield  # Déjà dans un lot englobant
+        return
+    _batch.entries = []
+    try:
+        yield
+        entries = _batch.entries
+    finally:
+        _batch.entries = None
+    if entries:
+        MediaDeletion.objects.bulk_create(entries, batch_size=DEFAULT_BATCH_SIZE * 10)
+        if getattr(settings, 'MEDIA_DELETION_WORKER', True):
+            transaction.on_commit(worker.wake)
+
+
+def delete_pairs(queryset):
+    """
+    Supprime en masse les paires de ``queryset`` ; retourne leurs identifiants.
+
+    Réponses, statistiques, tirages des rooms puis paires sont effacés par des
+    DELETE directs (``_raw_delete``) : ni chargement des objets, ni Collector,
+    ni signaux par paire. Les fichiers sont mis en file en un seul INSERT à
+    partir d'une seule lecture des noms ; l'appelant envoie
+    ``media_pairs_changed`` une fois. À appeler dans une transaction.
+    """
+    from .imaging import pair_derivative_names
+    from .models import GameAnswer, GlobalStats, MediaPair, MultiplayerAnswer, MultiplayerRoom
+
+    rows = list(queryset.values_list('id', 'real_media', 'ai_media', 'audio_media', 'derivatives'))
+    if not rows:
+        return []
+    pair_ids = [row[0] for row in rows]
+    names = []
+    for _, real, ai, audio, derivatives in rows:
+        names.extend((real, ai, audio))
+        names.extend(pair_derivative_names(
+            MediaPair(real_media=real, ai_media=ai, audio_media=audio, derivatives=derivatives)
+        ))
+    schedule_file_deletions(names, reason=f"Suppression groupée de {len(pair_ids)} paire(s)")
+
+    Pairs = MultiplayerRoom.pairs.through
+    for related in (
+        GameAnswer.objects.filter(media_pair_id__in=pair_ids),
+        MultiplayerAnswer.objects.filter(media_pair_id__in=pair_ids),
+        GlobalStats.objects.filter(media_pair_id__in=pair_ids),
+        Pairs.objects.filter(mediapair_id__in=pair_ids),
+        MediaPair.objects.filter(id__in=pair_ids),
+    ):
+        related._raw_delete(related.db)
+    return pair_ids
+
+
+def _referenced_names(names):
+    """Parmi ``names``, ceux encore référencés par une paire."""
+    from .models import MediaPair
+
+    if not names:
+        return set()
+    referenced = set()
+    rows = MediaPair.objects.filter(
+        Q(real_media__in=names) | Q(ai_media__in=names) | Q(audio_media__in=names)
+    ).values_list('real_media', 'ai_media', 'audio_media')
+    for row in rows:
+        referenced.update(row)
+    return referenced & set(names)
+
+
+def process_pending_deletions(batch_size=DEFAULT_BATCH_SIZE, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Traite un lot de suppressions échues ; retourne le nombre de lignes traitées.
+
+    Les fichiers hérités encore référencés par une autre paire sont conservés
+    (statut ``skipped``) ; les fichiers adressés par contenu passent par le
+    compteur de références du stockage.
+    """
+    from .models import MediaDeletion
+
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            MediaDeletion.objects.select_for_update(skip_locked=True)
+            .filter(status=MediaDeletion.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        shared = _referenced_names([d.name for d in batch if not is_content_addressed(d.name)])
+        for deletion in batch:
+            deletion.attempts += 1
+            if deletion.name in shared:
+                deletion.status = MediaDeletion.Status.SKIPPED
+                deletion.processed_at = now
+                continue
+            try:
+                default_storage.delete(deletion.name)
+            except Exception as exc:
+                deletion.last_error = f"{type(exc).__name__}: {exc}"
+                if deletion.attempts >= max_attempts:
+                    deletion.status = MediaDeletion.Status.FAILED
+                    deletion.processed_at = now
+                    logger.error("Suppression abandonnée pour %s : %s", deletion.name, exc)
+                else:
+                    delay = RETRY_BASE_DELAY * 2 ** (deletion.attempts - 1)
+                    deletion.next_attempt_at = now + timedelta(seconds=delay)
+                continue
+            deletion.status = MediaDeletion.Status.DONE
+            deletion.processed_at = now
+
+        MediaDeletion.objects.bulk_update(
+            batch, ['status', 'attempts', 'last_error', 'next_attempt_at', 'processed_at']
+        )
+    return len(batch)
+
+
+def purge_deletion_log(days):
+    """Efface du journal les suppressions terminées depuis plus de ``days`` jours."""
+    from .models import MediaDeletion
+
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = MediaDeletion.objects.filter(
+        status__in=[MediaDeletion.Status.DONE, MediaDeletion.Status.SKIPPED],
+        processed_at__lt=cutoff,
+    ).delete()
+    return deleted
+
+
+class DeletionWorker:
+    """Thread de fond qui vide la file, réveillé après chaque commit."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='media-deletion-worker', daemon=True
+                )
+                self._thread.start()
+        self._event.set()
+
+    def _run(self):
+        while True:
+            self._event.wait(WORKER_IDLE_INTERVAL)
+            self._event.clear()
+            try:
+                while process_pending_deletions():
+                    pass
+            except Exception:
+                logger.exception("Erreur du traitement des suppressions de médias")
+            finally:
+                close_old_connections()
+
+
+worker = DeletionWorker()
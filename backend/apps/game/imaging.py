@@ -0,0 +1,151 @@
+"""
+Dérivés responsives des images (WebP redimensionnés).
+
+Les dérivés sont écrits dans le stockage des médias sous le nom demandé par
+``derivative_name`` (sous-dossier ``_derivatives/`` à côté de l'original).
+Avec le stockage par défaut (``ContentAddressedStorage``), ce nom ne donne que
+l'extension : le fichier est rangé sous ``cas/`` selon son empreinte, comme
+les uploads ; seul un stockage hérité (FileSystemStorage) l'écrit à côté de
+l'original. Le nom de stockage réel est référencé dans
+``MediaPair.derivatives``.
+
+Les deux côtés d'une paire reçoivent exactement le même traitement : mêmes
+largeurs (limitées par la plus petite des deux images), même qualité, mêmes
+métadonnées supprimées. Aucune différence de poids ou de netteté ne doit
+trahir l'image IA.
+"""
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = '_derivatives'
+DEFAULT_WIDTHS = (480, 960, 1600)
+DEFAULT_QUALITY = 80
+
+
+def derivative_widths():
+    return tuple(sorted(getattr(settings, 'MEDIA_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def derivative_quality():
+    return getattr(settings, 'MEDIA_DERIVATIVE_QUALITY', DEFAULT_QUALITY)
+
+
+def derivative_name(original_name, width):
+    """``pairs/real/art/Image_1.jpg`` → ``pairs/real/art/_derivatives/Image_1.480w.webp``."""
+    directory, filename = posixpath.split(original_name)
+    stem = filename.rsplit('.', 1)[0]
+    return posixpath.join(directory, DERIVATIVES_DIR, f'{stem}.{width}w.webp')
+
+
+def _open_image(field):
+    from PIL import Image, ImageOps
+
+    field.open('rb')
+    try:
+        image = Image.open(io.BytesIO(field.read()))
+        image.load()
+    finally:
+        field.close()
+    image = ImageOps.exif_transpose(image)
+    # Même mode pour les deux côtés : pas d'alpha ni de profil qui diffère
+    return image.convert('RGB')
+
+
+def _encode(image, width, quality):
+    from PIL import Image
+
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, 'WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def _store(field, name, data):
+    storage = field.storage
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(data))
+
+
+def generate_pair_derivatives(pair, save=True):
+    """
+    Génère les dérivés WebP d'une paire image et met à jour ``pair.derivatives``.
+
+    Retourne le dictionnaire ``{'real': [...], 'ai': [...]}`` (vide si la paire
+    n'est pas une image ou si un fichier est illisible).
+    """
+    if pair.media_type != 'image' or not pair.real_media or not pair.ai_media:
+        return {}
+
+    try:
+        images = {'real': _open_image(pair.real_media), 'ai': _open_image(pair.ai_media)}
+    except Exception:
+        logger.exception("Impossible de lire les images de la paire #%s", pair.pk)
+        return {}
+
+    # Largeurs communes : aucune image n'est agrandie, et les deux côtés
+    # exposent la même liste de variantes.
+    smallest = min(image.width for image in images.values())
+    widths = [width for width in derivative_widths() if width < smallest]
+    quality = derivative_quality()
+
+    fields = {'real': pair.real_media, 'ai': pair.ai_media}
+    derivatives = {}
+    for side, image in images.items():
+        variants = []
+        for width in widths:
+            name = _store(fields[side], derivative_name(fields[side].name, width), _encode(image, width, quality))
+            variants.append({'width': width, 'name': name})
+        derivatives[side] = variants
+
+    remove_pair_derivatives(pair, keep=derivatives)
+    pair.derivatives = derivatives
+    if save and pair.pk:
+        type(pair).objects.filter(pk=pair.pk).update(derivatives=derivatives)
+    return derivatives
+
+
+def derivative_urls(pair, side):
+    """URLs (relatives au stockage) des dérivés d'un côté : [{'url', 'width'}]."""
+    variants = (pair.derivatives or {}).get(side) or []
+    storage = (pair.real_media if side == 'real' else pair.ai_media).storage
+    return [{'url': storage.url(v['name']), 'width': v['width']} for v in variants]
+
+
+def _derivative_files(pair, derivatives):
+    """(storage, name) de chaque fichier dérivé référencé dans ``derivatives``."""
+    fields = {'real': pair.real_media, 'ai': pair.ai_media, 'peaks': pair.audio_media}
+    for key, value in (derivatives or {}).items():
+        field = fields.get(key)
+        if field is None:
+            continue
+        for entry in (value if isinstance(value, list) else [value]):
+            yield field.storage, entry['name']
+
+
+def pair_derivative_names(pair):
+    """Noms de stockage de tous les dérivés référencés par la paire."""
+    return [name for _, name in _derivative_files(pair, pair.derivatives)]
+
+
+def remove_pair_derivatives(pair, keep=None):
+    """Supprime du stockage les dérivés référencés par la paire (sauf ``keep``)."""
+    kept = {name for _, name in _derivative_files(pair, keep)}
+    for storage, name in _derivative_files(pair, pair.derivatives):
+        # Un dérivé adressé par contenu régénéré à l'identique a reçu une
+        # nouvelle référence : l'ancienne doit tout de même être libérée.
+        if name in kept and not is_content_addressed(name):
+            continue
+        try:
+            storage.delete(name)
+        except Exception:
+            pass  # Ignorer les erreurs de suppression
@@ -0,0 +1,71 @@
+"""
+Management command archiving old monthly partitions of game sessions and
+answers (voir apps.game.partitions et apps.game.rollups).
+
+Pour chaque mois antérieur aux ``--keep-months`` derniers : compteurs du
+tableau de bord et meilleures sessions reportés dans les agrégats, export des
+partitions (CSV gzip, ou Parquet si pyarrow est installé) dans
+``--output-dir``, puis suppression des partitions. Un mois est traité dans une
+transaction : en cas d'erreur, rien n'est supprimé.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.game.partitions import (
+    EXPORT_FORMATS,
+    add_months,
+    archivable_months,
+    archive_month,
+    default_format,
+    is_supported,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = "Exporte puis supprime les partitions mensuelles anciennes des sessions et réponses (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=settings.PARTITION_RETENTION_MONTHS,
+            help=f"Mois gardés en base, mois courant compris (défaut : {settings.PARTITION_RETENTION_MONTHS}).",
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=settings.PARTITION_ARCHIVE_DIR,
+            help="Dossier des exports (défaut : PARTITION_ARCHIVE_DIR).",
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            help="Format des exports : csv (gzip) ou parquet (défaut : parquet si pyarrow est installé).",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Liste les mois à archiver sans rien exporter ni supprimer.",
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError("Partitionnement disponible uniquement sur PostgreSQL")
+        if options['keep_months'] < 1:
+            raise CommandError("--keep-months doit être au moins 1")
+        fmt = options['format'] or default_format()
+        if fmt == 'parquet' and default_format() != 'parquet':
+            raise CommandError("--format parquet nécessite pyarrow : pip install pyarrow")
+
+        cutoff = add_months(month_start(timezone.now()), 1 - options['keep_months'])
+        months = archivable_months(cutoff)
+        if options['dry_run']:
+            listed = ', '.join(f"{month:%Y-%m}" for month in months) or "aucun"
+            self.stdout.write(self.style.SUCCESS(f"📊 Mois antérieurs à {cutoff:%Y-%m} : {listed}"))
+            return
+
+        for month in months:
+            for name, path, rows in archive_month(month, options['output_dir'], fmt):
+                self.stdout.write(f"  ✅ {name} : {rows} ligne(s) → {path}")
+        self.stdout.write(self.style.SUCCESS(f"🗄️  {len(months)} mois archivé(s) (avant {cutoff:%Y-%m})"))
@@ -0,0 +1,159 @@
+"""
+Management command benchmarking JSON rendering, parsing and compression of
+API payloads.
+
+Sur un catalogue synthétique (transaction annulée à la fin), récupère deux
+réponses types :
+  - ``session_create`` : POST /api/game/sessions/ (10 paires et manifeste) ;
+  - ``admin_list`` : GET /api/admin/media-pairs/?page_size=100.
+
+Pour chacune, mesure le rendu (JSONRenderer de DRF contre FastJSONRenderer),
+la lecture (JSONParser contre FastJSONParser) et la compression (gzip,
+brotli si installé) : temps par appel et taille transmise.
+"""
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.game import compression
+from apps.game.benchmarking import (
+    discard_cached_responses,
+    environment_info,
+    percentile,
+    write_results,
+)
+from apps.game.models import MediaPair
+from apps.game.renderers import FastJSONParser, FastJSONRenderer, orjson
+from apps.game.synthetic import SyntheticDataGenerator
+
+
+class _Rollback(Exception):
+    """Force l'annulation de la transaction du benchmark."""
+
+
+def time_call(func, iterations, repeat):
+    """Médiane et p95 (ms par appel) sur ``iterations`` mesures de ``repeat`` appels."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        timings.append((time.perf_counter() - start) * 1000 / repeat)
+    timings.sort()
+    return {'p50_ms': round(percentile(timings, 50), 4), 'p95_ms': round(percentile(timings, 95), 4)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark du rendu, de la lecture et de la compression JSON des réponses "
+        "de création de session et de liste des paires de l'admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--catalog-size', type=int, default=1000, help="Paires du catalogue synthétique.")
+        parser.add_argument('--iterations', type=int, default=30, help="Mesures par variante.")
+        parser.add_argument('--repeat', type=int, default=20, help="Appels par mesure.")
+        parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire.")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson non installé : FastJSONRenderer retombe sur DRF"))
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli non installé : seul gzip est mesuré"))
+
+        try:
+            with transaction.atomic():
+                payloads = self.collect_payloads(options['catalog_size'], options['seed'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            discard_cached_responses()
+
+        results = {}
+        for name, data in payloads.items():
+            results[name] = self.measure_payload(data, options['iterations'], options['repeat'])
+            self.report(name, results[name])
+
+        if options['output']:
+            write_results(options['output'], {
+                'benchmark': 'api_payloads',
+                'environment': environment_info(),
+                'options': {key: options[key] for key in ('catalog_size', 'iterations', 'repeat', 'seed')},
+                'results': results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def collect_payloads(self, catalog_size, seed):
+        """Données (avant rendu) des deux réponses mesurées."""
+        generator = SyntheticDataGenerator(seed=seed)
+        MediaPair.objects.update(is_active=False)
+        categories = generator.create_categories(3, prefix='__bench_payloads')
+        generator.create_pairs(
+            catalog_size, categories,
+            type_weights={'image': 80, 'video': 15, 'audio': 5},
+            difficulty_weights={'easy': 30, 'medium': 50, 'hard': 20},
+        )
+        generator.reset_sequences()
+
+        client = Client(HTTP_HOST='localhost')
+        responses = {
+            'session_create': client.post(
+                '/api/game/sessions/', {'audience_type': 'public'}, content_type='application/json'
+            ),
+            'admin_list': client.get('/api/admin/media-pairs/', {'page_size': 100}),
+        }
+        for name, response in responses.items():
+            if response.status_code not in (200, 201):
+                raise CommandError(f"{name} : statut {response.status_code} : {response.content[:200]!r}")
+        return {name: response.data for name, response in responses.items()}
+
+    def measure_payload(self, data, iterations, repeat):
+        drf_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        body = drf_renderer.render(data)
+        fast_body = fast_renderer.render(data)
+        if JSONParser().parse(io.BytesIO(fast_body)) != JSONParser().parse(io.BytesIO(body)):
+            raise CommandError("FastJSONRenderer ne produit pas le même JSON que DRF")
+
+        def parse_with(parser):
+            return lambda: parser.parse(io.BytesIO(body), parser_context={'encoding': 'utf-8'})
+
+        result = {
+            'bytes': len(body),
+            'render': {
+                'drf': time_call(lambda: drf_renderer.render(data), iterations, repeat),
+                'fast': time_call(lambda: fast_renderer.render(data), iterations, repeat),
+            },
+            'parse': {
+                'drf': time_call(parse_with(JSONParser()), iterations, repeat),
+                'fast': time_call(parse_with(FastJSONParser()), iterations, repeat),
+            },
+            'compression': {},
+        }
+        for coding, compress in compression.available_codings():
+            compressed = compress(body)
+            result['compression'][coding] = {
+                'bytes': len(compressed),
+                'ratio': round(len(body) / len(compressed), 2),
+                **time_call(lambda: compress(body), iterations, max(1, repeat // 4)),
+            }
+        return result
+
+    def report(self, name, result):
+        self.stdout.write(self.style.SUCCESS(f"\n{name} ({result['bytes']} octets)"))
+        self.stdout.write(f"  {'étape':<22}{'p50 ms':>10}{'p95 ms':>10}{'octets':>10}")
+        for step in ('render', 'parse'):
+            for variant in ('drf', 'fast'):
+                timing = result[step][variant]
+                self.stdout.write(f"  {step + ' ' + variant:<22}{timing['p50_ms']:>10.3f}{timing['p95_ms']:>10.3f}")
+        for coding, entry in result['compression'].items():
+            self.stdout.write(
+                f"  {'compress ' + coding:<22}{entry['p50_ms']:>10.3f}{entry['p95_ms']:>10.3f}"
+                f"{entry['bytes']:>10}  (×{entry['ratio']})"
+            )
@@ -0,0 +1,210 @@
+"""
+Management command measuring group_send fan-out on each channel layer.
+
+Pour chaque backend de CHANNEL_LAYER_BACKENDS (``redis`` : files Redis,
+``pubsub`` : Redis Pub/Sub, ``memory`` : en mémoire) et chaque taille de
+groupe, reproduit la diffusion d'un événement de room à tous ses membres :
+  - ``--members`` canaux rejoignent un groupe dans une instance « worker des
+    joueurs » de la layer ;
+  - une seconde instance (« worker de l'hôte ») envoie ``--messages``
+    group_send, un par un : latence de diffusion = envoi jusqu'à la réception
+    par le dernier membre ;
+  - puis les mêmes messages d'un coup, lus en parallèle par tous les
+    membres : débit en livraisons/s et livraisons perdues (capacité des
+    canaux dépassée, message expiré).
+
+La layer ``memory`` ne traverse pas les processus : ses deux instances sont
+la même, la mesure ne vaut que pour un seul worker. Les layers Redis utilisent
+le Redis configuré (``--redis-host``/``--redis-port``) ou un serveur fakeredis
+local (``--fake-redis``) avec le préfixe ``bench-layers`` : les canaux du jeu
+ne sont pas touchés.
+"""
+import asyncio
+import copy
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from apps.game.benchmarking import environment_info, percentile, start_fake_redis, write_results
+
+PREFIX = 'bench-layers'
+RECEIVE_TIMEOUT = 5
+
+
+def parse_levels(value):
+    try:
+        return sorted({int(v) for v in value.split(',') if v.strip()})
+    except ValueError:
+        raise CommandError(f"Liste de niveaux invalide : {value}")
+
+
+def make_layer(backend, redis_host, redis_port):
+    config = copy.deepcopy(settings.CHANNEL_LAYER_BACKENDS[backend])
+    options = config.get('CONFIG', {})
+    if 'hosts' in options:
+        options.update(hosts=[(redis_host, redis_port)], prefix=PREFIX)
+    return import_string(config['BACKEND'])(**options)
+
+
+async def close_layer(layer):
+    await layer.flush()
+    if hasattr(layer, 'close_pools'):
+        await layer.close_pools()
+
+
+class Command(BaseCommand):
+    help = "Latence et débit des diffusions de groupe (group_send) de chaque channel layer."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends', default=','.join(settings.CHANNEL_LAYER_BACKENDS),
+            help="Layers testées, séparées par des virgules (voir CHANNEL_LAYER_BACKENDS).",
+        )
+        parser.add_argument(
+            '--members', default='10,50,100,500',
+            help="Tailles de groupe, séparées par des virgules.",
+        )
+        parser.add_argument('--messages', type=int, default=50, help="Diffusions par mesure.")
+        parser.add_argument('--redis-host', default=settings.REDIS_HOST, help="Hôte Redis.")
+        parser.add_argument('--redis-port', type=int, default=settings.REDIS_PORT, help="Port Redis.")
+        parser.add_argument(
+            '--fake-redis', action='store_true',
+            help="Utiliser un serveur fakeredis local au lieu de Redis (pip install 'fakeredis[lua]').",
+        )
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+
+    def handle(self, *args, **options):
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+        unknown = set(backends) - set(settings.CHANNEL_LAYER_BACKENDS)
+        if unknown:
+            raise CommandError(f"Layers inconnues : {', '.join(sorted(unknown))}")
+        levels = parse_levels(options['members'])
+        if options['messages'] < 1:
+            raise CommandError("--messages doit être au moins 1")
+
+        redis_host, redis_port = options['redis_host'], options['redis_port']
+        fake_server = None
+        if options['fake_redis']:
+            fake_server, redis_port = start_fake_redis()
+            redis_host = '127.0.0.1'
+
+        results = []
+        try:
+            for backend in backends:
+                self.stdout.write(self.style.SUCCESS(f"\nLayer {backend}"))
+                for members in levels:
+                    result = asyncio.run(self.run_level(
+                        backend, members, options['messages'], redis_host, redis_port,
+                    ))
+                    result.update({'backend': backend, 'members': members})
+                    results.append(result)
+                    self.report(result)
+        finally:
+            if fake_server is not None:
+                fake_server.shutdown()
+                fake_server.server_close()
+
+        self.summarize(results, levels)
+        if options['output']:
+            write_results(options['output'], {
+                'benchmark': 'channel_layers',
+                'environment': environment_info(),
+                'options': {
+                    'backends': backends, 'members': levels, 'messages': options['messages'],
+                    'redis': 'fakeredis' if fake_server else f"{redis_host}:{redis_port}",
+                    'capacity': settings.CHANNEL_LAYER_CAPACITY,
+                    'expiry': settings.CHANNEL_LAYER_EXPIRY,
+                },
+                'results': results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    # ------------------------------------------------------------------
+    # Mesures
+    # ------------------------------------------------------------------
+
+    async def run_level(self, backend, members, messages, redis_host, redis_port):
+        receiver = make_layer(backend, redis_host, redis_port)
+        sender = receiver if backend == 'memory' else make_layer(backend, redis_host, redis_port)
+        group = f'bench-{members}'
+        try:
+            channels = [await receiver.new_channel() for _ in range(members)]
+            for channel in channels:
+                await receiver.group_add(group, channel)
+            # Première diffusion hors mesure : connexions et abonnements établis
+            await self.broadcast(sender, receiver, group, channels, 1)
+
+            fanout_ms = []
+            send_ms = []
+            for _ in range(messages):
+                start = time.perf_counter()
+                await sender.group_send(group, {'type': 'bench.message', 'payload': 'x' * 200})
+                sent = time.perf_counter()
+                await asyncio.gather(*(receiver.receive(channel) for channel in channels))
+                send_ms.append((sent - start) * 1000)
+                fanout_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            delivered = await self.broadcast(sender, receiver, group, channels, messages)
+            elapsed = time.perf_counter() - start
+
+            for channel in channels:
+                await receiver.group_discard(group, channel)
+        finally:
+            await close_layer(receiver)
+            if sender is not receiver:
+                await close_layer(sender)
+
+        fanout_ms.sort()
+        send_ms.sort()
+        expected = members * messages
+        return {
+            'fanout_p50_ms': round(percentile(fanout_ms, 50), 2),
+            'fanout_p95_ms': round(percentile(fanout_ms, 95), 2),
+            'send_p50_ms': round(percentile(send_ms, 50), 2),
+            'deliveries_per_s': round(delivered / elapsed, 1),
+            'delivered': delivered,
+            'lost': expected - delivered,
+        }
+
+    async def broadcast(self, sender, receiver, group, channels, messages):
+        """Envoie ``messages`` diffusions d'un coup ; nombre de livraisons reçues."""
+        async def drain(channel):
+            received = 0
+            while received < messages:
+                try:
+                    await asyncio.wait_for(receiver.receive(channel), RECEIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                received += 1
+            return received
+
+        readers = [asyncio.ensure_future(drain(channel)) for channel in channels]
+        for _ in range(messages):
+            await sender.group_send(group, {'type': 'bench.message', 'payload': 'x' * 200})
+        return sum(await asyncio.gather(*readers))
+
+    # ------------------------------------------------------------------
+    # Rapport
+    # ------------------------------------------------------------------
+
+    def report(self, result):
+        lost = f"  ⚠️  {result['lost']} perdues" if result['lost'] else ''
+        self.stdout.write(
+            f"  {result['members']:>4} membres : diffusion p50 {result['fanout_p50_ms']:>8.2f} ms  "
+            f"p95 {result['fanout_p95_ms']:>8.2f} ms  envoi p50 {result['send_p50_ms']:>7.2f} ms  "
+            f"{result['deliveries_per_s']:>9.1f} livraisons/s{lost}"
+        )
+
+    def summarize(self, results, levels):
+        backends = list(dict.fromkeys(r['backend'] for r in results))
+        if len(backends) < 2:
+            return
+        by_key = {(r['backend'], r['members']): r for r in results}
+        self.stdout.write(self.style.SUCCESS("\nMeilleure layer (débit)"))
+        for members in levels:
+            ranked = sorted(backends, key=lambda b: by_key[(b, members)]['deliveries_per_s'], reverse=True)
+            line = '  '.join(f"{b} {by_key[(b, members)]['deliveries_per_s']:.0f}/s" for b in ranked)
+            self.stdout.write(f"  {members:>4} membres : {line}")
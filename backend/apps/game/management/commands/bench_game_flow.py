@@ -0,0 +1,241 @@
+"""
+Management command benchmarking the solo game HTTP flow.
+
+Pour chaque scénario (taille du catalogue × taille de la table des sessions),
+joue des parties complètes via le client de test Django :
+  - POST /api/game/sessions/
+  - POST /api/game/sessions/{key}/answer/  (×10)
+  - GET/POST /api/game/sessions/{key}/result/
+  - GET /api/game/leaderboard/
+
+Les données synthétiques sont créées dans une transaction annulée à la fin
+de chaque catalogue : la base n'est pas modifiée.
+"""
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from apps.game.benchmarking import (
+    Recorder,
+    compare_to_baseline,
+    discard_cached_responses,
+    environment_info,
+    write_results,
+)
+from apps.game.models import MediaPair
+from apps.game.synthetic import SyntheticDataGenerator
+
+
+ENDPOINTS = ['session_create', 'answer_submit', 'result_get', 'result_post', 'leaderboard_get']
+
+
+def parse_sizes(value):
+    try:
+        return sorted({int(v) for v in value.split(',') if v.strip()})
+    except ValueError:
+        raise CommandError(f"Liste de tailles invalide : {value}")
+
+
+class _Rollback(Exception):
+    """Force l'annulation de la transaction d'un scénario."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark du parcours de jeu solo (création de session, 10 réponses, "
+        "résultat, classement) sur des catalogues synthétiques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--catalog-sizes', default='100,10000,100000',
+            help="Tailles de catalogue (paires actives), séparées par des virgules.",
+        )
+        parser.add_argument(
+            '--session-sizes', default='1000,100000,1000000',
+            help="Nombre de sessions terminées pré-existantes, séparées par des virgules.",
+        )
+        parser.add_argument(
+            '--answers-per-session', type=int, default=10,
+            help="Réponses créées pour chaque session pré-existante.",
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=30,
+            help="Nombre de parties complètes mesurées par scénario.",
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help="Parties jouées avant la mesure (non comptées).",
+        )
+        parser.add_argument(
+            '--alloc-iterations', type=int, default=3,
+            help="Parties jouées sous tracemalloc pour mesurer les allocations (0 pour désactiver).",
+        )
+        parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire.")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+        parser.add_argument('--baseline', help="Fichier JSON de référence à comparer.")
+        parser.add_argument(
+            '--max-regression', type=float, default=10.0,
+            help="Régression maximale tolérée en %% par rapport à la baseline.",
+        )
+        parser.add_argument(
+            '--metric', default='p95_ms',
+            choices=['mean_ms', 'p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'queries_mean'],
+            help="Métrique comparée à la baseline.",
+        )
+
+    def handle(self, *args, **options):
+        catalog_sizes = parse_sizes(options['catalog_sizes'])
+        session_sizes = parse_sizes(options['session_sizes'])
+        self.rng = random.Random(options['seed'])
+        self.generator = SyntheticDataGenerator(seed=options['seed'])
+        self.client = Client(HTTP_HOST='localhost')
+
+        results = []
+        for catalog_size in catalog_sizes:
+            try:
+                with transaction.atomic():
+                    self.seed_catalog(catalog_size)
+                    seeded_sessions = 0
+                    for session_size in session_sizes:
+                        self.seed_sessions(session_size - seeded_sessions, options['answers_per_session'])
+                        seeded_sessions = session_size
+                        results.append(self.run_scenario(catalog_size, session_size, options))
+                    raise _Rollback
+            except _Rollback:
+                pass
+            finally:
+                discard_cached_responses()
+
+        payload = {
+            'benchmark': 'game_flow',
+            'environment': environment_info(),
+            'options': {
+                key: options[key]
+                for key in ('catalog_sizes', 'session_sizes', 'answers_per_session', 'iterations', 'warmup', 'seed')
+            },
+            'results': results,
+        }
+        if options['output']:
+            write_results(options['output'], payload)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            regressions = compare_to_baseline(
+                results, baseline, options['metric'], options['max_regression']
+            )
+            if regressions:
+                for reg in regressions:
+                    self.stdout.write(self.style.ERROR(
+                        f"  {reg['endpoint']} {reg['scenario']} : {reg['metric']} "
+                        f"{reg['baseline']} → {reg['current']} (+{reg['delta_pct']}%)"
+                    ))
+                raise CommandError(
+                    f"{len(regressions)} régression(s) au-delà de {options['max_regression']}%"
+                )
+            self.stdout.write(self.style.SUCCESS("Aucune régression par rapport à la baseline."))
+
+    # ------------------------------------------------------------------
+    # Données synthétiques
+    # ------------------------------------------------------------------
+
+    def seed_catalog(self, size):
+        """Désactive le catalogue existant et crée `size` paires actives."""
+        started = time.perf_counter()
+        MediaPair.objects.update(is_active=False)
+        categories = self.generator.create_categories(1, prefix=f'__bench_{size}')
+        self.pairs = self.generator.create_pairs(
+            size, categories,
+            type_weights={'image': 80, 'video': 15, 'audio': 5},
+            difficulty_weights={'easy': 30, 'medium': 50, 'hard': 20},
+        )
+        self.generator.reset_sequences()
+        self.stdout.write(f"Catalogue de {size} paires créé en {time.perf_counter() - started:.1f}s")
+
+    def seed_sessions(self, count, answers_per_session):
+        """Ajoute `count` sessions (avec leurs réponses) qui alimentent le classement."""
+        if count <= 0:
+            return
+        started = time.perf_counter()
+        self.generator.create_sessions(
+            count, self.pairs, answers_per_session=answers_per_session,
+            completed_ratio=1.0, named_ratio=0.8,
+        )
+        self.generator.reset_sequences()
+        self.stdout.write(f"{count} sessions ajoutées en {time.perf_counter() - started:.1f}s")
+
+    # ------------------------------------------------------------------
+    # Mesures
+    # ------------------------------------------------------------------
+
+    def run_scenario(self, catalog_size, session_size, options):
+        recorder = Recorder()
+        for _ in range(options['warmup']):
+            self.play_game(Recorder())
+        for _ in range(options['iterations']):
+            self.play_game(recorder)
+        recorder.trace_alloc = True
+        for _ in range(options['alloc_iterations']):
+            self.play_game(recorder)
+
+        summaries = recorder.summaries()
+        scenario = {'pairs': catalog_size, 'sessions': session_size}
+        self.stdout.write(self.style.SUCCESS(f"\nScénario {scenario}"))
+        self.stdout.write(f"  {'endpoint':<16}{'p50':>9}{'p95':>9}{'p99':>9}{'req.':>7}{'alloc KB':>10}")
+        for name in ENDPOINTS:
+            s = summaries.get(name)
+            if not s:
+                continue
+            alloc = s['alloc_peak_kb_mean']
+            self.stdout.write(
+                f"  {name:<16}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}"
+                f"{s['queries_mean']:>7.1f}{alloc if alloc is not None else '-':>10}"
+            )
+        return {'scenario': scenario, 'endpoints': summaries}
+
+    def play_game(self, recorder):
+        """Joue une partie complète en mesurant chaque appel."""
+        with recorder.measure('session_create'):
+            response = self.client.post(
+                '/api/game/sessions/', {'audience_type': 'public'}, content_type='application/json'
+            )
+        self.check_status(response, 201)
+        game = response.json()
+        session_key = game['session_key']
+
+        for pair in game['pairs']:
+            choice = self.rng.choice(['real', 'ai'] if pair['media_type'] == 'audio' else ['left', 'right'])
+            with recorder.measure('answer_submit'):
+                response = self.client.post(
+                    f'/api/game/sessions/{session_key}/answer/',
+                    {'pair_id': pair['id'], 'choice': choice, 'response_time_ms': self.rng.randint(500, 9000)},
+                    content_type='application/json',
+                )
+            self.check_status(response, 200)
+
+        with recorder.measure('result_get'):
+            response = self.client.get(f'/api/game/sessions/{session_key}/result/')
+        self.check_status(response, 200)
+
+        with recorder.measure('result_post'):
+            response = self.client.post(
+                f'/api/game/sessions/{session_key}/result/', {'pseudo': 'bench'}, content_type='application/json'
+            )
+        self.check_status(response, 200)
+
+        with recorder.measure('leaderboard_get'):
+            response = self.client.get('/api/game/leaderboard/', {'limit': 10})
+        self.check_status(response, 200)
+
+    def check_status(self, response, expected):
+        if response.status_code != expected:
+            raise CommandError(
+                f"{response.request['PATH_INFO']} : statut {response.status_code} "
+                f"(attendu {expected}) : {response.content[:200]!r}"
+            )
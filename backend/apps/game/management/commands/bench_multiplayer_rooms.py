@@ -0,0 +1,253 @@
+"""
+Management command measuring multiplayer throughput across concurrent rooms.
+
+Pour chaque mode d'exécution SQL du consumer (``shared`` : thread partagé de
+Channels ; ``lanes`` : files par room, voir apps.game.room_executor) et
+chaque nombre de rooms, joue en parallèle des parties complètes via le
+WebSocket (communicateurs de Channels, couche en mémoire) :
+  - host.join, player.join (×N joueurs), game.start
+  - pour chaque question : player.answer (×N), game.show_answer,
+    game.next_question
+
+Mesure le débit (actions/s), la latence des actions jusqu'à leur réponse et
+la durée des parties. ``--db-latency-ms`` ajoute un délai à chaque requête
+SQL pour reproduire l'aller-retour réseau vers Postgres sur une base locale.
+
+Les rooms créées sont supprimées à la fin ; les paires actives existantes
+servent de questions.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from apps.game.benchmarking import environment_info, percentile, write_results
+from apps.game.models import MediaPair, MultiplayerRoom
+from apps.game.room_executor import room_executor
+from apps.game.routing import websocket_urlpatterns
+
+MODES = ('shared', 'lanes')
+ACTIONS = ['player_join', 'player_answer', 'show_answer', 'next_question']
+RECEIVE_TIMEOUT = 30
+
+
+def parse_levels(value):
+    try:
+        return sorted({int(v) for v in value.split(',') if v.strip()})
+    except ValueError:
+        raise CommandError(f"Liste de niveaux invalide : {value}")
+
+
+class SimulatedLatency:
+    """Délai ajouté à chaque requête SQL, sur toutes les connexions ouvertes pendant le bloc."""
+
+    def __init__(self, delay_ms):
+        self.delay = delay_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.delay)
+        return execute(sql, params, many, context)
+
+    def install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    @contextlib.contextmanager
+    def active(self):
+        if not self.delay:
+            yield
+            return
+        connection_created.connect(self.install)
+        try:
+            yield
+        finally:
+            connection_created.disconnect(self.install)
+
+
+class Command(BaseCommand):
+    help = (
+        "Débit du jeu multijoueur sur des rooms simultanées : thread SQL partagé "
+        "contre files d'exécution par room."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='shared,lanes', help="Modes testés : shared, lanes.")
+        parser.add_argument(
+            '--rooms', default='1,10,50',
+            help="Nombres de rooms jouées simultanément, séparés par des virgules.",
+        )
+        parser.add_argument('--players', type=int, default=5, help="Joueurs par room.")
+        parser.add_argument('--lanes', type=int, default=8, help="Files d'exécution du mode lanes.")
+        parser.add_argument(
+            '--db-latency-ms', type=float, default=0.0,
+            help="Délai ajouté à chaque requête SQL (aller-retour réseau simulé).",
+        )
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Modes inconnus : {', '.join(sorted(unknown))}")
+        levels = parse_levels(options['rooms'])
+        if not MediaPair.objects.filter(is_active=True).exists():
+            raise CommandError("Aucune paire active : lancer generate_synthetic_data d'abord")
+
+        application = URLRouter(websocket_urlpatterns)
+        initial_lanes = room_executor.lanes
+        rooms = []
+        results = []
+        try:
+            with override_settings(CHANNEL_LAYERS={
+                'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer', 'CONFIG': {'capacity': 10000}},
+            }), SimulatedLatency(options['db_latency_ms']).active():
+                for mode in modes:
+                    room_executor.configure(options['lanes'] if mode == 'lanes' else 0)
+                    self.stdout.write(self.style.SUCCESS(f"\nMode {mode} ({room_executor.lanes} files)"))
+                    for count in levels:
+                        codes = [MultiplayerRoom.objects.create().room_code for _ in range(count)]
+                        rooms.extend(codes)
+                        result = self.run_level(application, codes, options['players'])
+                        result.update({'mode': mode, 'rooms': count})
+                        results.append(result)
+                        self.report(result)
+        finally:
+            room_executor.configure(initial_lanes)
+            MultiplayerRoom.objects.filter(room_code__in=rooms).delete()
+
+        self.summarize(results, levels)
+        if options['output']:
+            write_results(options['output'], {
+                'benchmark': 'multiplayer_rooms',
+                'environment': environment_info(),
+                'options': {key: options[key] for key in ('modes', 'rooms', 'players', 'lanes', 'db_latency_ms')},
+                'results': results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    # ------------------------------------------------------------------
+    # Parties
+    # ------------------------------------------------------------------
+
+    def run_level(self, application, codes, players):
+        latencies = {name: [] for name in ACTIONS}
+        durations = []
+
+        async def run():
+            started = time.perf_counter()
+            await asyncio.gather(*(self.play_room(application, code, players, latencies, durations) for code in codes))
+            return time.perf_counter() - started
+
+        # Les traces [WS]/[DB] du consumer fausseraient la mesure et la sortie
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            elapsed = asyncio.run(run())
+
+        actions = sorted(value for values in latencies.values() for value in values)
+        durations.sort()
+        return {
+            'actions': len(actions),
+            'elapsed_s': round(elapsed, 2),
+            'actions_per_s': round(len(actions) / elapsed, 1),
+            'p50_ms': round(percentile(actions, 50), 2),
+            'p95_ms': round(percentile(actions, 95), 2),
+            'game_p50_s': round(percentile(durations, 50), 2),
+            'game_max_s': round(durations[-1], 2),
+            'by_action': {
+                name: {
+                    'count': len(values),
+                    'p50_ms': round(percentile(sorted(values), 50), 2),
+                    'p95_ms': round(percentile(sorted(values), 95), 2),
+                }
+                for name, values in latencies.items()
+            },
+        }
+
+    async def play_room(self, application, code, players, latencies, durations):
+        started = time.perf_counter()
+        path = f'/ws/multiplayer/{code}/'
+        host = WebsocketCommunicator(application, path)
+        clients = [WebsocketCommunicator(application, path) for _ in range(players)]
+        for communicator in [host, *clients]:
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise CommandError(f"Connexion WebSocket refusée pour la room {code}")
+
+        async def act(name, communicator, payload, expected, waiting=None):
+            start = time.perf_counter()
+            await communicator.send_to(text_data=json.dumps(payload))
+            message = await self.expect(communicator, expected)
+            for other in waiting or ():
+                await self.expect(other, expected)
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            return message
+
+        try:
+            await host.send_to(text_data=json.dumps({'action': 'host.join'}))
+            await self.expect(host, {'host.joined'})
+            await asyncio.gather(*(
+                act('player_join', client, {'action': 'player.join', 'pseudo': f'joueur{index}'}, {'player.joined'})
+                for index, client in enumerate(clients)
+            ))
+            await host.send_to(text_data=json.dumps({'action': 'game.start'}))
+            await self.expect(host, {'game.started'})
+            question = await self.expect(clients[0], {'game.started'})
+            for client in clients[1:]:
+                await self.expect(client, {'game.started'})
+
+            while True:
+                choice = 'ai' if question['question']['media_type'] == 'audio' else 'left'
+                await asyncio.gather(*(
+                    act('player_answer', client, {'action': 'player.answer', 'choice': choice,
+                                                  'response_time_ms': 2000}, {'answer.submitted'})
+                    for client in clients
+                ))
+                await act('show_answer', host, {'action': 'game.show_answer'}, {'game.answer_revealed'})
+                question = await act(
+                    'next_question', host, {'action': 'game.next_question'},
+                    {'game.new_question', 'game.finished'}, waiting=clients,
+                )
+                if question['type'] == 'game.finished':
+                    break
+        finally:
+            for communicator in [host, *clients]:
+                await communicator.disconnect()
+        durations.append(time.perf_counter() - started)
+
+    @staticmethod
+    async def expect(communicator, types):
+        """Premier message de type ``types`` reçu (les autres diffusions sont ignorées)."""
+        while True:
+            message = json.loads(await communicator.receive_from(timeout=RECEIVE_TIMEOUT))
+            if message['type'] in types:
+                return message
+            if message['type'] == 'error':
+                raise CommandError(f"Erreur du consumer : {message['message']}")
+
+    # ------------------------------------------------------------------
+    # Rapport
+    # ------------------------------------------------------------------
+
+    def report(self, result):
+        self.stdout.write(
+            f"  {result['rooms']:>4} rooms : {result['actions_per_s']:>8.1f} actions/s  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"partie p50 {result['game_p50_s']:>6.2f} s  max {result['game_max_s']:>6.2f} s"
+        )
+
+    def summarize(self, results, levels):
+        by_key = {(r['mode'], r['rooms']): r for r in results}
+        if not all(('shared', c) in by_key and ('lanes', c) in by_key for c in levels):
+            return
+        self.stdout.write(self.style.SUCCESS("\nlanes / shared (débit)"))
+        for count in levels:
+            shared = by_key[('shared', count)]['actions_per_s']
+            lanes = by_key[('lanes', count)]['actions_per_s']
+            ratio = f"×{lanes / shared:.2f}" if shared else '-'
+            self.stdout.write(f"  {count:>4} rooms : {lanes:>8.1f} / {shared:>8.1f} actions/s  {ratio}")
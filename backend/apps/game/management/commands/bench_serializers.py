@@ -0,0 +1,277 @@
+"""
+Management command micro-benchmarking pair serialization.
+
+Compare, pour N paires construites en mémoire (aucune requête SQL) :
+  - ``game`` : paires d'une session (POST /api/game/sessions/) ;
+  - ``admin`` : liste des paires de l'admin (GET /api/admin/media-pairs/).
+
+Pour chacune, le chemin de référence (serializers DRF champ par champ, URL
+média recalculée depuis la requête pour chaque champ) est mesuré contre le
+chemin rapide de ``apps.game.payloads``. Les deux sorties sont comparées
+avant la mesure. Les temps sont ramenés à 1000 paires.
+"""
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework import serializers
+
+from apps.admin_api.serializers import MediaPairAdminSerializer
+from apps.game.benchmarking import Recorder, environment_info, write_results
+from apps.game.imaging import derivative_urls
+from apps.game.metadata import layout_info
+from apps.game.models import Category, GlobalStats, MediaPair
+from apps.game.payloads import game_pairs_payload, media_base_url
+from apps.game.serializers import CategorySerializer
+from apps.game.waveform import peaks_url
+
+
+# ----------------------------------------------------------------------
+# Chemin de référence : serializers champ par champ
+# ----------------------------------------------------------------------
+
+def _reference_url(request, url):
+    if url.startswith('/'):
+        host = request.get_host()
+        hostname = host.split(':')[0] if ':' in host else host
+        return f"{request.scheme}://{hostname}:8080{url}"
+    return url
+
+
+def _reference_field_url(request, media_field):
+    return _reference_url(request, media_field.url) if media_field else None
+
+
+class ReferenceGameSerializer(serializers.ModelSerializer):
+    category = CategorySerializer(read_only=True)
+    left_media = serializers.SerializerMethodField()
+    right_media = serializers.SerializerMethodField()
+    left_srcset = serializers.SerializerMethodField()
+    right_srcset = serializers.SerializerMethodField()
+    audio_media = serializers.SerializerMethodField()
+    audio_peaks = serializers.SerializerMethodField()
+    left_info = serializers.SerializerMethodField()
+    right_info = serializers.SerializerMethodField()
+    audio_info = serializers.SerializerMethodField()
+    real_position = serializers.SerializerMethodField()
+    is_real = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaPair
+        fields = [
+            'id', 'category', 'media_type', 'difficulty', 'left_media', 'right_media',
+            'left_srcset', 'right_srcset', 'audio_media', 'audio_peaks', 'left_info',
+            'right_info', 'audio_info', 'real_position', 'is_real',
+        ]
+
+    def side(self, obj, slot):
+        pos = self.context.get('positions', {}).get(obj.id, 'left')
+        return 'real' if pos == slot else 'ai'
+
+    def get_left_media(self, obj):
+        if obj.media_type == 'audio':
+            return None
+        return _reference_field_url(self.context.get('request'), getattr(obj, f"{self.side(obj, 'left')}_media"))
+
+    def get_right_media(self, obj):
+        if obj.media_type == 'audio':
+            return None
+        return _reference_field_url(self.context.get('request'), getattr(obj, f"{self.side(obj, 'right')}_media"))
+
+    def get_left_srcset(self, obj):
+        if obj.media_type != 'image':
+            return []
+        request = self.context.get('request')
+        return [
+            {'url': _reference_url(request, v['url']), 'width': v['width']}
+            for v in derivative_urls(obj, self.side(obj, 'left'))
+        ]
+
+    def get_right_srcset(self, obj):
+        if obj.media_type != 'image':
+            return []
+        request = self.context.get('request')
+        return [
+            {'url': _reference_url(request, v['url']), 'width': v['width']}
+            for v in derivative_urls(obj, self.side(obj, 'right'))
+        ]
+
+    def get_audio_media(self, obj):
+        if obj.media_type != 'audio':
+            return None
+        return _reference_field_url(self.context.get('request'), obj.audio_media)
+
+    def get_audio_peaks(self, obj):
+        if obj.media_type != 'audio':
+            return None
+        url = peaks_url(obj)
+        return _reference_url(self.context.get('request'), url) if url else None
+
+    def get_left_info(self, obj):
+        return None if obj.media_type == 'audio' else layout_info(obj, self.side(obj, 'left'))
+
+    def get_right_info(self, obj):
+        return None if obj.media_type == 'audio' else layout_info(obj, self.side(obj, 'right'))
+
+    def get_audio_info(self, obj):
+        return layout_info(obj, 'audio') if obj.media_type == 'audio' else None
+
+    def get_is_real(self, obj):
+        return None
+
+    def get_real_position(self, obj):
+        return None
+
+
+class ReferenceAdminSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    stats = serializers.SerializerMethodField()
+    real_media = serializers.SerializerMethodField()
+    ai_media = serializers.SerializerMethodField()
+    audio_media = serializers.SerializerMethodField()
+    media_info = serializers.JSONField(read_only=True)
+
+    class Meta:
+        model = MediaPair
+        fields = MediaPairAdminSerializer.Meta.fields
+
+    def get_stats(self, obj):
+        stats = obj.global_stats
+        return {
+            'total_attempts': stats.total_attempts,
+            'correct_answers': stats.correct_answers,
+            'success_rate': stats.success_rate,
+        }
+
+    def get_real_media(self, obj):
+        return _reference_field_url(self.context.get('request'), obj.real_media)
+
+    def get_ai_media(self, obj):
+        return _reference_field_url(self.context.get('request'), obj.ai_media)
+
+    def get_audio_media(self, obj):
+        return _reference_field_url(self.context.get('request'), obj.audio_media)
+
+
+# ----------------------------------------------------------------------
+# Commande
+# ----------------------------------------------------------------------
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark de la sérialisation des paires (jeu et admin) : "
+        "serializers DRF champ par champ contre le chemin rapide, pour 1000 paires."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=1000, help="Nombre de paires sérialisées par mesure.")
+        parser.add_argument('--iterations', type=int, default=20, help="Nombre de mesures par variante.")
+        parser.add_argument('--warmup', type=int, default=3, help="Mesures non comptées avant la mesure.")
+        parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire.")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+
+    def handle(self, *args, **options):
+        if options['pairs'] < 1:
+            raise CommandError("--pairs doit être positif")
+        rng = random.Random(options['seed'])
+        pairs = self.build_pairs(options['pairs'], rng)
+        positions = {
+            pair.id: rng.choice(['left', 'right']) for pair in pairs if pair.media_type != 'audio'
+        }
+        request = RequestFactory().get('/', HTTP_HOST='localhost:8000')
+
+        variants = {
+            'game_reference': lambda: ReferenceGameSerializer(
+                pairs, many=True, context={'request': request, 'positions': positions}
+            ).data,
+            'game_fast': lambda: game_pairs_payload(media_base_url(request), pairs, positions),
+            'admin_reference': lambda: ReferenceAdminSerializer(
+                pairs, many=True, context={'request': request}
+            ).data,
+            'admin_fast': lambda: MediaPairAdminSerializer(
+                pairs, many=True, context={'request': request}
+            ).data,
+        }
+
+        for kind in ('game', 'admin'):
+            if variants[f'{kind}_reference']() != variants[f'{kind}_fast']():
+                raise CommandError(f"Sorties différentes pour '{kind}' entre référence et chemin rapide")
+
+        recorder = Recorder()
+        for name, run in variants.items():
+            for _ in range(options['warmup']):
+                run()
+            for _ in range(options['iterations']):
+                with recorder.measure(name):
+                    run()
+
+        scale = 1000 / len(pairs)
+        summaries = recorder.summaries()
+        results = {}
+        self.stdout.write(f"\n  {'variante':<18}{'p50 ms':>10}{'p95 ms':>10}   (pour 1000 paires)")
+        for name in variants:
+            s = summaries[name]
+            results[name] = {key: round(s[key] * scale, 3) for key in ('mean_ms', 'p50_ms', 'p95_ms')}
+            self.stdout.write(f"  {name:<18}{results[name]['p50_ms']:>10.2f}{results[name]['p95_ms']:>10.2f}")
+        for kind in ('game', 'admin'):
+            before = results[f'{kind}_reference']['p50_ms']
+            after = results[f'{kind}_fast']['p50_ms']
+            self.stdout.write(self.style.SUCCESS(
+                f"  {kind} : ×{before / after:.1f} plus rapide" if after else f"  {kind} : -"
+            ))
+
+        if options['output']:
+            write_results(options['output'], {
+                'benchmark': 'serializers',
+                'environment': environment_info(),
+                'options': {key: options[key] for key in ('pairs', 'iterations', 'warmup', 'seed')},
+                'results': results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    def build_pairs(self, count, rng):
+        """Paires non enregistrées, proches du catalogue réel (80 % images, 15 % vidéos, 5 % audios)."""
+        category = Category(id=1, name='Animaux', description='Catégorie de benchmark')
+        now = timezone.now()
+        pairs = []
+        for pk in range(1, count + 1):
+            media_type = rng.choices(['image', 'video', 'audio'], weights=[80, 15, 5])[0]
+            pair = MediaPair(
+                id=pk, category=category, media_type=media_type,
+                difficulty=rng.choice(['easy', 'medium', 'hard']),
+                hint='Regardez les détails', is_active=True, created_at=now,
+            )
+            if media_type == 'audio':
+                pair.audio_media = f'pairs/audio/bench/{pk}.wav'
+                pair.is_real = rng.random() < 0.5
+                pair.media_info = {'audio': self.info('audio/x-wav', duration_ms=8000)}
+                pair.derivatives = {'peaks': {'name': f'pairs/audio/bench/_derivatives/{pk}.peaks'}}
+            else:
+                ext, mime = ('jpg', 'image/jpeg') if media_type == 'image' else ('mp4', 'video/mp4')
+                pair.real_media = f'pairs/real/bench/{pk}.{ext}'
+                pair.ai_media = f'pairs/ai/bench/{pk}_AI.{ext}'
+                pair.media_info = {
+                    'real': self.info(mime, width=1200, height=800),
+                    'ai': self.info(mime, width=1024, height=1024),
+                }
+                if media_type == 'image':
+                    pair.derivatives = {
+                        side: [
+                            {'width': width, 'name': f'pairs/{side}/bench/_derivatives/{pk}.{width}w.webp'}
+                            for width in (480, 960)
+                        ]
+                        for side in ('real', 'ai')
+                    }
+            attempts = rng.randint(0, 500)
+            pair.global_stats = GlobalStats(
+                media_pair=pair, total_attempts=attempts, correct_answers=rng.randint(0, attempts),
+            )
+            pairs.append(pair)
+        return pairs
+
+    def info(self, mime, width=None, height=None, duration_ms=None):
+        return {
+            'bytes': 250_000, 'mime': mime, 'width': width, 'height': height,
+            'duration_ms': duration_ms, 'sha256': '0' * 64,
+        }
@@ -0,0 +1,57 @@
+"""
+Management command to (re)generate pair derivatives: responsive WebP variants
+for image pairs and waveform peaks for audio pairs.
+
+Utile pour la bibliothèque existante ou après un changement de
+MEDIA_DERIVATIVE_WIDTHS / MEDIA_DERIVATIVE_QUALITY.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.game.imaging import generate_pair_derivatives
+from apps.game.models import MediaPair
+from apps.game.waveform import generate_pair_peaks
+
+
+class Command(BaseCommand):
+    help = "Génère les dérivés WebP des paires d'images et les pics des paires audio."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Régénère aussi les paires qui ont déjà des dérivés.",
+        )
+        parser.add_argument(
+            '--pair',
+            type=int,
+            action='append',
+            dest='pair_ids',
+            help="Limite le traitement à cette paire (option répétable).",
+        )
+
+    def handle(self, *args, **options):
+        pairs = MediaPair.objects.filter(media_type__in=['image', 'audio']).order_by('id')
+        if options['pair_ids']:
+            pairs = pairs.filter(id__in=options['pair_ids'])
+        if not options['force']:
+            pairs = pairs.filter(derivatives={})
+
+        processed = 0
+        failed = 0
+        for pair in pairs.iterator():
+            if pair.media_type == 'audio':
+                entry = generate_pair_peaks(pair)
+                detail = f"pics, {entry['duration_ms']} ms" if entry else None
+            else:
+                derivatives = generate_pair_derivatives(pair)
+                detail = (', '.join(str(v['width']) for v in derivatives['real']) or '-') if derivatives else None
+            if detail:
+                processed += 1
+                self.stdout.write(f"  ✅ Paire #{pair.id} : {detail}")
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"  ⚠️  Paire #{pair.id} : fichiers illisibles"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 {processed} paire(s) traitée(s), {failed} en échec"
+        ))
@@ -0,0 +1,351 @@
+"""
+Management command checking a multiplayer game across several ASGI workers.
+
+Lance ``--workers`` processus Daphne partageant Redis (le Redis configuré, ou
+un serveur fakeredis local avec ``--fake-redis``) et la channel layer
+``--layer`` (redis ou pubsub), connecte l'hôte au premier
+worker et répartit les joueurs sur les autres, puis joue une partie complète
+en vérifiant :
+  - la diffusion des événements d'un worker à l'autre (arrivée des joueurs,
+    questions, réponses, révélation, fin de partie) ;
+  - le score : ordre des réponses sans doublon, bonus de position (+50, +30,
+    +10) attribués une seule fois malgré des réponses simultanées sur des
+    workers différents, total de chaque joueur égal à la somme de ses points ;
+  - la reconnexion d'un joueur sur un autre worker en cours de partie ;
+  - un seul événement « tous ont répondu » par question ;
+  - l'invalidation des fiches de paires d'un worker par une modification
+    faite ailleurs (ici, par ce processus) : l'indice révélé à la première
+    question est celui enregistré après l'envoi de la question.
+
+Sort en erreur au premier contrôle qui échoue. La room créée est supprimée à
+la fin, et l'indice modifié rétabli ; les paires actives existantes servent de
+questions.
+"""
+import asyncio
+import base64
+import json
+import os
+import struct
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.game.asgi_workers import start_workers, stop_workers, wait_ready
+from apps.game.benchmarking import start_fake_redis
+from apps.game.models import MediaPair, MultiplayerAnswer, MultiplayerRoom
+
+RECEIVE_TIMEOUT = 15
+POSITION_BONUS = [50, 30, 10]
+
+
+class CheckFailed(Exception):
+    pass
+
+
+class WebSocket:
+    """Client WebSocket minimal (trames texte JSON), un par connexion simulée."""
+
+    def __init__(self, name, port):
+        self.name, self.port = name, port
+        self.reader = self.writer = None
+        self.received = []
+
+    async def connect(self, path):
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{self.port}\r\nUpgrade: websocket\r\n'
+            f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        status = await self.reader.readline()
+        if b' 101 ' not in status:
+            raise CheckFailed(f"{self.name} : handshake refusé ({status.decode().strip()})")
+        while (await self.reader.readline()).strip():
+            pass
+
+    async def send(self, payload):
+        await self._send_frame(0x1, json.dumps(payload).encode())
+
+    async def _send_frame(self, opcode, data):
+        # Trames client masquées (RFC 6455)
+        header = bytes([0x80 | opcode])
+        if len(data) < 126:
+            header += bytes([0x80 | len(data)])
+        elif len(data) < 65536:
+            header += bytes([0x80 | 126]) + struct.pack('!H', len(data))
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('!Q', len(data))
+        mask = os.urandom(4)
+        self.writer.write(header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(data)))
+        await self.writer.drain()
+
+    async def receive(self):
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack('!H', await self.reader.readexactly(2))
+            elif length == 127:
+                length, = struct.unpack('!Q', await self.reader.readexactly(8))
+            data = await self.reader.readexactly(length)
+            opcode = first & 0x0F
+            if opcode == 0x9:
+                await self._send_frame(0xA, data)
+            elif opcode == 0x8:
+                raise CheckFailed(f"{self.name} : connexion fermée par le serveur")
+            elif opcode == 0x1:
+                message = json.loads(data)
+                self.received.append(message)
+                return message
+
+    async def expect(self, *types):
+        """Premier message d'un des ``types`` (les autres sont gardés dans ``received``)."""
+        try:
+            while True:
+                message = await asyncio.wait_for(self.receive(), RECEIVE_TIMEOUT)
+                if message['type'] in types:
+                    return message
+                if message['type'] == 'error':
+                    raise CheckFailed(f"{self.name} : erreur du consumer : {message['message']}")
+        except asyncio.TimeoutError:
+            raise CheckFailed(f"{self.name} : {' ou '.join(types)} non reçu en {RECEIVE_TIMEOUT}s")
+
+    def count(self, message_type):
+        return sum(1 for message in self.received if message['type'] == message_type)
+
+    async def close(self):
+        if self.writer is not None:
+            try:
+                await self._send_frame(0x8, struct.pack('!H', 1000))
+            except OSError:
+                pass
+            self.writer.close()
+            self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie une partie multijoueur répartie sur plusieurs workers ASGI "
+        "(diffusion des événements, score, reconnexion)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Nombre de workers Daphne.")
+        parser.add_argument('--players', type=int, default=4, help="Nombre de joueurs.")
+        parser.add_argument('--port', type=int, default=8780, help="Port du premier worker.")
+        parser.add_argument(
+            '--fake-redis', action='store_true',
+            help="Utiliser un serveur fakeredis local au lieu du Redis configuré (pip install 'fakeredis[lua]').",
+        )
+        parser.add_argument(
+            '--layer', choices=('redis', 'pubsub'), default='redis',
+            help="Channel layer des workers (voir CHANNEL_LAYER_BACKEND).",
+        )
+        parser.add_argument('--verbose-workers', action='store_true', help="Afficher la sortie des workers.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 2:
+            raise CommandError("--workers doit être au moins 2")
+        if options['players'] < 1:
+            raise CommandError("--players doit être au moins 1")
+        if not MediaPair.objects.filter(is_active=True).exists():
+            raise CommandError("Aucune paire active : lancer generate_synthetic_data d'abord")
+
+        redis_host, redis_port = settings.REDIS_HOST, settings.REDIS_PORT
+        fake_server = None
+        if options['fake_redis']:
+            fake_server, redis_port = start_fake_redis()
+            redis_host = '127.0.0.1'
+
+        env = dict(
+            os.environ, REDIS_HOST=redis_host, REDIS_PORT=str(redis_port),
+            # Channel layer et cache partagés : sans eux, les workers ne se voient pas
+            CHANNEL_LAYER_BACKEND=options['layer'], USE_MEMORY_CHANNEL_LAYER='false', USE_MEMORY_CACHE='false',
+        )
+        # Cache des workers (comme config/settings.py) : les modifications de
+        # paires faites par ce processus doivent y invalider les fiches
+        self.shared_caches = {'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f'redis://{redis_host}:{redis_port}/1',
+            'KEY_PREFIX': 'realvsai',
+        }}
+        self.edited_hints = {}
+        output = None if options['verbose_workers'] else subprocess.DEVNULL
+        processes = start_workers(
+            options['workers'], options['port'], bind='127.0.0.1', env=env, stdout=output, stderr=output,
+        )
+        # Ce processus ne fait que préparer et relire la base : cache local
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            room = MultiplayerRoom.objects.create()
+            try:
+                wait_ready(processes, options['port'])
+                self.stdout.write(f"🔁 {options['workers']} workers ({options['layer']}), Redis {redis_host}:{redis_port}, room {room.room_code}")
+                asyncio.run(self.play(room, options['workers'], options['players'], options['port']))
+            except (CheckFailed, RuntimeError) as exc:
+                raise CommandError(str(exc))
+            finally:
+                stop_workers(processes)
+                room.delete()
+                for pair_id, hint in self.edited_hints.items():
+                    self.save_hint(pair_id, hint)
+                if fake_server is not None:
+                    fake_server.shutdown()
+                    fake_server.server_close()
+        self.stdout.write(self.style.SUCCESS("✅ Partie multi-workers conforme"))
+
+    def ok(self, message):
+        self.stdout.write(f"  ✅ {message}")
+
+    # ------------------------------------------------------------------
+    # Partie
+    # ------------------------------------------------------------------
+
+    async def play(self, room, workers, players, base_port):
+        path = f'/ws/multiplayer/{room.room_code}/'
+        host = WebSocket('hôte', base_port)
+        # Joueurs sur les autres workers que l'hôte
+        clients = [
+            WebSocket(f'joueur{index}', base_port + 1 + index % (workers - 1))
+            for index in range(players)
+        ]
+        try:
+            for ws in [host, *clients]:
+                await ws.connect(path)
+            await host.send({'action': 'host.join'})
+            await host.expect('host.joined')
+
+            for index, client in enumerate(clients):
+                await client.send({'action': 'player.join', 'pseudo': client.name})
+                await client.expect('player.joined')
+            while True:
+                update = await host.expect('players.updated')
+                if len(update['players']) == players:
+                    break
+            self.ok(f"{players} joueurs (workers 1-{workers - 1}) visibles par l'hôte (worker 0)")
+
+            await host.send({'action': 'game.start'})
+            question = (await host.expect('game.started'))['question']
+            for client in clients:
+                await client.expect('game.started')
+            self.ok("game.started reçu sur tous les workers")
+
+            answered_questions = 0
+            while True:
+                if answered_questions == 1:
+                    # Reconnexion du premier joueur sur le worker de l'hôte, question en cours
+                    clients[0] = await self.reconnect(clients[0], path, base_port)
+
+                await self.play_question(room, host, clients, question, edit_hint=answered_questions == 0)
+                answered_questions += 1
+
+                await host.send({'action': 'game.next_question'})
+                message = await host.expect('game.new_question', 'game.finished')
+                for client in clients:
+                    await client.expect(message['type'])
+                if message['type'] == 'game.finished':
+                    break
+                question = message['question']
+
+            await asyncio.to_thread(self.check_final, room, message['podium'], host, answered_questions)
+        finally:
+            for ws in [host, *clients]:
+                await ws.close()
+
+    async def play_question(self, room, host, clients, question, edit_hint=False):
+        number = question['question_number']
+        choices = ('ai', 'real') if question['media_type'] == 'audio' else ('left', 'right')
+
+        async def answer(index, client):
+            # Une moitié des joueurs sur chaque choix : des réponses justes sur plusieurs workers
+            await client.send({'action': 'player.answer', 'choice': choices[index % 2], 'response_time_ms': 1000})
+            return await client.expect('answer.submitted')
+
+        results = await asyncio.gather(*(answer(index, client) for index, client in enumerate(clients)))
+        notified = set()
+        while len(notified) < len(clients):
+            notified.add((await host.expect('player.answered'))['pseudo'])
+        await host.expect('game.all_answered')
+
+        if edit_hint:
+            # Fiche déjà lue par le worker de l'hôte pour envoyer la question
+            pair_id = question['pair_id']
+            original = await asyncio.to_thread(lambda: MediaPair.objects.get(pk=pair_id).hint)
+            self.edited_hints.setdefault(pair_id, original)
+            hint = f'{original} (check_multiworker)'.strip()
+            await asyncio.to_thread(self.save_hint, pair_id, hint)
+
+        await host.send({'action': 'game.show_answer'})
+        revealed = (await host.expect('game.answer_revealed'))['answer']
+        for client in clients:
+            await client.expect('game.answer_revealed')
+        if edit_hint:
+            if revealed['hint'] != hint:
+                raise CheckFailed(f"Fiche périmée sur le worker 0 : indice « {revealed['hint']} » au lieu de « {hint} »")
+            self.ok(f"question {number} : indice modifié par un autre processus révélé à jour par le worker 0")
+
+        await asyncio.to_thread(self.check_question, room, question['pair_id'], clients, results, revealed)
+        self.ok(f"question {number} : {len(clients)} réponses simultanées comptées une fois, bonus corrects")
+
+    def save_hint(self, pair_id, hint):
+        with override_settings(CACHES=self.shared_caches):
+            pair = MediaPair.objects.get(pk=pair_id)
+            pair.hint = hint
+            pair.save(update_fields=['hint'])
+
+    def check_question(self, room, pair_id, clients, results, revealed):
+        answers = list(
+            MultiplayerAnswer.objects.filter(player__room=room, media_pair_id=pair_id)
+            .select_related('player').order_by('answer_order')
+        )
+        if [a.answer_order for a in answers] != list(range(1, len(clients) + 1)):
+            raise CheckFailed(f"Ordre des réponses incorrect : {[a.answer_order for a in answers]}")
+
+        correct_rank = 0
+        for answer in answers:
+            expected = 0
+            if answer.is_correct:
+                bonus = POSITION_BONUS[correct_rank] if correct_rank < len(POSITION_BONUS) else 0
+                expected = 100 + bonus
+                correct_rank += 1
+            if answer.points_earned != expected:
+                raise CheckFailed(
+                    f"{answer.player.pseudo} : {answer.points_earned} points au lieu de {expected}"
+                )
+
+        by_pseudo = {a.player.pseudo: a for a in answers}
+        for client, result in zip(clients, results):
+            answer = by_pseudo[client.name]
+            if (result['is_correct'], result['points_earned']) != (answer.is_correct, answer.points_earned):
+                raise CheckFailed(f"{client.name} : réponse envoyée différente de la base")
+        if [r['pseudo'] for r in revealed['player_results']] != [a.player.pseudo for a in answers]:
+            raise CheckFailed("Résultats révélés différents de la base")
+
+    async def reconnect(self, client, path, base_port):
+        await client.close()
+        moved = WebSocket(client.name, base_port)
+        await moved.connect(path)
+        await moved.send({'action': 'player.join', 'pseudo': client.name})
+        await moved.expect('player.joined')
+        await moved.expect('game.started')  # question en cours renvoyée au joueur reconnecté
+        self.ok(f"{client.name} reconnecté du worker {client.port - base_port} au worker 0 en cours de partie")
+        return moved
+
+    def check_final(self, room, podium, host, questions):
+        players = {p.pseudo: p for p in room.players.all()}
+        for entry in podium:
+            player = players[entry['pseudo']]
+            total = sum(a.points_earned for a in player.answers.all())
+            if entry['score'] != player.score or player.score != total:
+                raise CheckFailed(
+                    f"{player.pseudo} : podium {entry['score']}, base {player.score}, somme des réponses {total}"
+                )
+        if not all(p.is_connected for p in players.values()):
+            raise CheckFailed("Un joueur reconnecté est resté marqué déconnecté")
+        self.ok(f"podium conforme à la base ({len(podium)} joueurs)")
+
+        all_answered = host.count('game.all_answered')
+        if all_answered != questions:
+            raise CheckFailed(f"{all_answered} événements « tous ont répondu » pour {questions} questions")
+        self.ok(f"un seul « tous ont répondu » par question ({questions} questions)")
@@ -0,0 +1,135 @@
+"""
+Management command to extract file metadata (size, MIME type, dimensions,
+duration, SHA-256) of every pair into MediaPair.media_info.
+
+Les fichiers sont sondés en parallèle dans un ProcessPoolExecutor (Pillow pour
+les images, en-têtes MP4/WAV pour les vidéos et audios). Avec --verify, les
+empreintes stockées sont comparées aux fichiers sans rien modifier.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.game.metadata import pair_media_paths, probe_file
+from apps.game.models import MediaPair, media_pairs_changed
+
+UPDATE_BATCH_SIZE = 500
+
+
+def _probe_job(job):
+    """Exécuté dans un processus fils : (pair_id, côté, infos, erreur)."""
+    pair_id, side, path = job
+    try:
+        return pair_id, side, probe_file(path), None
+    except OSError as exc:
+        return pair_id, side, None, str(exc)
+
+
+class Command(BaseCommand):
+    help = "Extrait en parallèle les métadonnées des fichiers des paires (taille, type, dimensions, durée, empreinte)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Réextrait aussi les paires qui ont déjà des métadonnées.",
+        )
+        parser.add_argument(
+            '--pair',
+            type=int,
+            action='append',
+            dest='pair_ids',
+            help="Limite le traitement à cette paire (option répétable).",
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Nombre de processus de sondage (défaut : nombre de CPU).",
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help="Compare les fichiers aux empreintes stockées sans rien modifier.",
+        )
+
+    def handle(self, *args, **options):
+        verify = options['verify']
+        pairs = MediaPair.objects.order_by('id').only(
+            'id', 'real_media', 'ai_media', 'audio_media', 'media_info'
+        )
+        if options['pair_ids']:
+            pairs = pairs.filter(id__in=options['pair_ids'])
+        if verify:
+            pairs = pairs.exclude(media_info={})
+        elif not options['force']:
+            pairs = pairs.filter(media_info={})
+
+        pairs = {pair.id: pair for pair in pairs}
+        jobs = []
+        missing = 0
+        for pair in pairs.values():
+            paths = pair_media_paths(pair)
+            expected = {side for side in ('real', 'ai', 'audio') if getattr(pair, f'{side}_media')}
+            for side in sorted(expected - set(paths)):
+                missing += 1
+                self.stdout.write(self.style.WARNING(f"  ⚠️  Paire #{pair.id} ({side}) : fichier introuvable"))
+            jobs.extend((pair.id, side, path) for side, path in paths.items())
+
+        self.stdout.write(f"🔎 {len(jobs)} fichier(s) à sonder pour {len(pairs)} paire(s)")
+
+        results = {pair_id: {} for pair_id in pairs}
+        failed = 0
+        for pair_id, side, info, error in self._run(jobs, max(1, options['workers'])):
+            if error:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"  ⚠️  Paire #{pair_id} ({side}) : {error}"))
+            else:
+                results[pair_id][side] = info
+
+        if verify:
+            self._report_verification(pairs, results, missing, failed)
+            return
+
+        changed = []
+        for pair_id, media_info in results.items():
+            pair = pairs[pair_id]
+            if media_info != pair.media_info:
+                pair.media_info = media_info
+                changed.append(pair)
+        MediaPair.objects.bulk_update(changed, ['media_info'], batch_size=UPDATE_BATCH_SIZE)
+        if changed:
+            media_pairs_changed.send(sender=MediaPair, pair_ids=[pair.pk for pair in changed])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 {len(changed)} paire(s) mise(s) à jour, "
+            f"{missing} fichier(s) introuvable(s), {failed} en échec"
+        ))
+
+    def _run(self, jobs, workers):
+        if workers == 1 or len(jobs) < 2:
+            yield from map(_probe_job, jobs)
+            return
+        # Ne pas partager les connexions ouvertes avec les processus fils
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_probe_job, jobs, chunksize=16)
+
+    def _report_verification(self, pairs, results, missing, failed):
+        mismatches = 0
+        for pair_id, probed in results.items():
+            stored = pairs[pair_id].media_info
+            for side, info in probed.items():
+                expected = stored.get(side, {}).get('hash')
+                if expected != info['hash']:
+                    mismatches += 1
+                    self.stdout.write(self.style.WARNING(
+                        f"  ❌ Paire #{pair_id} ({side}) : contenu modifié depuis l'extraction"
+                    ))
+        style = self.style.SUCCESS if not (mismatches or missing or failed) else self.style.WARNING
+        self.stdout.write(style(
+            f"📊 {mismatches} fichier(s) modifié(s), "
+            f"{missing} introuvable(s), {failed} illisible(s)"
+        ))
@@ -0,0 +1,55 @@
+"""
+Management command to move the MP4 `moov` box ahead of `mdat` in place.
+
+Parcourt media/pairs/ et réécrit les vidéos (et audios M4A) dont l'index est
+placé en fin de fichier, pour que la lecture démarre sans attendre la fin
+du téléchargement.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.game.mp4 import FASTSTART_EXTENSIONS, MP4Error, faststart, needs_faststart
+
+
+class Command(BaseCommand):
+    help = "Réécrit en « faststart » les MP4/MOV de media/pairs/ dont moov est après mdat."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Liste les fichiers à réécrire sans les modifier.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        root = Path(settings.MEDIA_ROOT) / 'pairs'
+
+        rewritten = 0
+        already_ok = 0
+        failed = []
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or path.suffix.lower() not in FASTSTART_EXTENSIONS:
+                continue
+            rel = path.relative_to(settings.MEDIA_ROOT)
+            try:
+                if not needs_faststart(path):
+                    already_ok += 1
+                    continue
+                if dry_run:
+                    self.stdout.write(f"  [DRY-RUN] Réécrirait : {rel}")
+                else:
+                    faststart(path)
+                    self.stdout.write(self.style.SUCCESS(f"  ✅ Réécrit : {rel}"))
+                rewritten += 1
+            except (MP4Error, OSError) as e:
+                failed.append(rel)
+                self.stdout.write(self.style.WARNING(f"  ⚠️  {rel} : {e}"))
+
+        prefix = "[DRY-RUN] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}📊 Résumé :"))
+        self.stdout.write(f"   Fichiers réécrits  : {rewritten}")
+        self.stdout.write(f"   Déjà optimisés     : {already_ok}")
+        self.stdout.write(f"   En échec           : {len(failed)}")
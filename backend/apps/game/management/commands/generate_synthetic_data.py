@@ -0,0 +1,131 @@
+"""
+Management command to bulk-generate production-sized synthetic data.
+
+Crée catégories, paires, sessions solo et leurs réponses, GlobalStats et
+rooms multijoueur terminées, par lots (bulk_create ou COPY sous PostgreSQL).
+À réserver aux bases de test : les données s'ajoutent à l'existant.
+"""
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game.models import Category, MediaPair
+from apps.game.synthetic import SyntheticDataGenerator, parse_weights
+from apps.game.versioning import LEADERBOARD, PAIRS, bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des données synthétiques volumineuses (catégories, paires, "
+        "sessions, réponses, statistiques, rooms) pour les tests de charge."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=10, help="Catégories à créer.")
+        parser.add_argument('--pairs', type=int, default=1000, help="Paires à créer (0 : utiliser les paires actives existantes).")
+        parser.add_argument('--sessions', type=int, default=10000, help="Sessions solo à créer.")
+        parser.add_argument('--answers-per-session', type=int, default=10, help="Réponses par session terminée.")
+        parser.add_argument('--rooms', type=int, default=0, help="Rooms multijoueur terminées à créer.")
+        parser.add_argument('--players-per-room', type=int, default=25, help="Joueurs par room.")
+        parser.add_argument('--pairs-per-room', type=int, default=10, help="Paires jouées par room.")
+        parser.add_argument(
+            '--media-types', default='image=80,video=15,audio=5',
+            help="Distribution des types de média (type=poids,...).",
+        )
+        parser.add_argument(
+            '--difficulties', default='easy=30,medium=50,hard=20',
+            help="Distribution des difficultés (difficulté=poids,...).",
+        )
+        parser.add_argument(
+            '--audiences', default='school=50,public=50',
+            help="Distribution des types d'audience (audience=poids,...).",
+        )
+        parser.add_argument('--completed-ratio', type=float, default=0.9, help="Part des sessions terminées.")
+        parser.add_argument('--named-ratio', type=float, default=0.5, help="Part des sessions terminées avec pseudo.")
+        parser.add_argument('--correct-rate', type=float, default=0.6, help="Taux de bonnes réponses.")
+        parser.add_argument('--days', type=int, default=365, help="Étalement des dates de création (jours).")
+        parser.add_argument(
+            '--base-date', type=date.fromisoformat,
+            help="Date de référence AAAA-MM-JJ : dates tirées dans les --days jours précédents "
+                 "(défaut : aujourd'hui ; à fixer avec --seed pour reproduire un jeu de données).",
+        )
+        parser.add_argument(
+            '--placeholder-files', action='store_true',
+            help="Écrit un petit fichier par paire au lieu de références partagées.",
+        )
+        parser.add_argument('--batch-size', type=int, default=10000, help="Taille des lots d'insertion.")
+        parser.add_argument('--no-copy', action='store_true', help="Utilise bulk_create même sous PostgreSQL.")
+        parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire.")
+        parser.add_argument(
+            '--allow-production', action='store_true',
+            help="Autorise l'exécution quand DEBUG est désactivé.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow_production']:
+            raise CommandError("DEBUG est désactivé : relancer avec --allow-production pour confirmer.")
+
+        try:
+            type_weights = parse_weights(options['media_types'])
+            difficulty_weights = parse_weights(options['difficulties'])
+            audience_weights = parse_weights(options['audiences'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        unknown = set(type_weights) - set(MediaPair.MediaType.values)
+        if unknown:
+            raise CommandError(f"Types de média inconnus : {', '.join(sorted(unknown))}")
+
+        started = time.perf_counter()
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            use_copy=not options['no_copy'],
+            days=options['days'],
+            base_date=options['base_date'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(
+            f"Écriture par {'COPY' if generator.use_copy else 'bulk_create'}, "
+            f"lots de {options['batch_size']}"
+        )
+
+        if options['pairs']:
+            categories = generator.create_categories(options['categories'])
+            if not categories:
+                categories = list(Category.objects.all())
+            pairs = generator.create_pairs(
+                options['pairs'], categories, type_weights, difficulty_weights,
+                placeholder_files=options['placeholder_files'],
+            )
+        else:
+            pairs = list(MediaPair.objects.filter(is_active=True).values_list('id', 'media_type'))
+        if not pairs and (options['sessions'] or options['rooms']):
+            raise CommandError("Aucune paire disponible pour générer des réponses.")
+
+        if options['sessions']:
+            attempts, corrects = generator.create_sessions(
+                options['sessions'], pairs,
+                answers_per_session=options['answers_per_session'],
+                completed_ratio=options['completed_ratio'],
+                named_ratio=options['named_ratio'],
+                correct_rate=options['correct_rate'],
+                audience_weights=audience_weights,
+            )
+            generator.apply_global_stats(attempts, corrects)
+
+        if options['rooms']:
+            generator.create_rooms(
+                options['rooms'], pairs,
+                players_per_room=options['players_per_room'],
+                pairs_per_room=options['pairs_per_room'],
+                correct_rate=options['correct_rate'],
+            )
+
+        generator.reset_sequences()
+        # Écritures en masse sans signaux : invalider les ETag à la main
+        bump_version(PAIRS, LEADERBOARD)
+        self.stdout.write(self.style.SUCCESS(
+            f"Données synthétiques générées en {time.perf_counter() - started:.1f}s"
+        ))
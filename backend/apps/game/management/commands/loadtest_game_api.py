@@ -0,0 +1,291 @@
+"""
+Management command load-testing the hot game endpoints on one Daphne process.
+
+Pour chaque mode (vues asynchrones, vues DRF synchrones), lance un processus
+Daphne avec ``GAME_ASYNC_VIEWS`` correspondant, puis, pour chaque niveau de
+concurrence, fait jouer en boucle N joueurs simultanés pendant une durée
+fixe :
+  - POST /api/game/sessions/
+  - POST /api/game/sessions/{key}/answer/  (×10)
+  - GET /api/game/leaderboard/
+  - GET /api/game/multiplayer/rooms/{code}/
+
+Mesure le débit (requêtes/s), les percentiles de latence et les erreurs.
+
+À lancer sur une base de développement : les sessions créées sont supprimées
+à la fin, mais les statistiques globales des paires jouées sont incrémentées.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game.benchmarking import environment_info, percentile, write_results
+from apps.game.models import GameSession, MultiplayerRoom
+
+MODES = {'async': '1', 'sync': '0'}
+ENDPOINTS = ['session_create', 'answer_submit', 'leaderboard_get', 'room_get']
+
+
+def parse_levels(value):
+    try:
+        return sorted({int(v) for v in value.split(',') if v.strip()})
+    except ValueError:
+        raise CommandError(f"Liste de niveaux invalide : {value}")
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Connection:
+    """Client HTTP/1.1 minimal avec keep-alive et cookies (un par joueur simulé)."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+        self.cookies = {}
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Accept: application/json']
+        if self.cookies:
+            lines.append('Cookie: ' + '; '.join(f'{k}={v}' for k, v in self.cookies.items()))
+        if payload is not None:
+            lines += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+        try:
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+            await self.writer.drain()
+            return await self.read_response()
+        except (OSError, asyncio.IncompleteReadError, HTTPError):
+            self.close()
+            raise
+
+    async def read_response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HTTPError("Connexion fermée par le serveur")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name, value = name.strip().lower(), value.strip()
+            if name == 'set-cookie':
+                cookie, _, _ = value.partition(';')
+                key, _, val = cookie.partition('=')
+                self.cookies[key.strip()] = val.strip()
+            headers[name] = value
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            self.close()
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge des endpoints chauds du jeu sur un processus Daphne : "
+        "vues asynchrones contre vues DRF synchrones, à plusieurs niveaux de concurrence."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='async,sync', help="Modes testés : async, sync.")
+        parser.add_argument(
+            '--concurrency', default='1,10,50,100',
+            help="Nombres de joueurs simultanés, séparés par des virgules.",
+        )
+        parser.add_argument('--duration', type=float, default=10.0, help="Durée de chaque niveau (secondes).")
+        parser.add_argument('--port', type=int, default=8765, help="Port local du processus Daphne.")
+        parser.add_argument('--output', help="Fichier JSON où écrire les résultats.")
+
+    def handle(self, *args, **options):
+        modes = [m.strip() for m in options['modes'].split(',') if m.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Modes inconnus : {', '.join(sorted(unknown))}")
+        levels = parse_levels(options['concurrency'])
+
+        room = MultiplayerRoom.objects.create()
+        self.session_keys = set()
+        results = []
+        try:
+            for mode in modes:
+                with self.server(mode, options['port']):
+                    for concurrency in levels:
+                        result = asyncio.run(self.run_level(
+                            options['port'], room.room_code, concurrency, options['duration']
+                        ))
+                        result.update({'mode': mode, 'concurrency': concurrency})
+                        results.append(result)
+                        self.report(result)
+        finally:
+            GameSession.objects.filter(session_key__in=self.session_keys).delete()
+            room.delete()
+
+        self.summarize(results, levels)
+        if options['output']:
+            write_results(options['output'], {
+                'benchmark': 'loadtest_game_api',
+                'environment': environment_info(),
+                'options': {key: options[key] for key in ('modes', 'concurrency', 'duration')},
+                'results': results,
+            })
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+    # ------------------------------------------------------------------
+    # Serveur
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def server(self, mode, port):
+        """Processus Daphne dédié au mode, arrêté à la sortie du bloc."""
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'config.asgi:application'],
+            cwd=settings.BASE_DIR, env=dict(os.environ, GAME_ASYNC_VIEWS=MODES[mode]),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.wait_ready(process, port)
+            self.stdout.write(self.style.SUCCESS(f"\nDaphne démarré (mode {mode}, pid {process.pid})"))
+            yield process
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def wait_ready(self, process, port, timeout=30):
+        async def probe():
+            conn = Connection('127.0.0.1', port)
+            try:
+                status, _ = await conn.request('GET', '/api/game/leaderboard/')
+                return status == 200
+            finally:
+                conn.close()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Daphne s'est arrêté (code {process.returncode})")
+            try:
+                if asyncio.run(probe()):
+                    return
+            except (OSError, HTTPError):
+                pass
+            time.sleep(0.2)
+        process.kill()
+        raise CommandError("Daphne ne répond pas")
+
+    # ------------------------------------------------------------------
+    # Charge
+    # ------------------------------------------------------------------
+
+    async def run_level(self, port, room_code, concurrency, duration):
+        latencies = {name: [] for name in ENDPOINTS}
+        errors = {'count': 0}
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def call(conn, name, method, path, expected, payload=None):
+            start = time.perf_counter()
+            try:
+                status, body = await conn.request(method, path, payload)
+            except (OSError, asyncio.IncompleteReadError, HTTPError):
+                errors['count'] += 1
+                return None
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if status != expected:
+                errors['count'] += 1
+                return None
+            return body
+
+        async def player():
+            conn = Connection('127.0.0.1', port)
+            try:
+                while time.perf_counter() < deadline:
+                    body = await call(conn, 'session_create', 'POST', '/api/game/sessions/', 201,
+                                      {'audience_type': 'public'})
+                    if body is None:
+                        await asyncio.sleep(0.05)
+                        continue
+                    game = json.loads(body)
+                    self.session_keys.add(game['session_key'])
+                    for pair in game['pairs']:
+                        choice = 'ai' if pair['media_type'] == 'audio' else 'left'
+                        await call(conn, 'answer_submit', 'POST',
+                                   f"/api/game/sessions/{game['session_key']}/answer/", 200,
+                                   {'pair_id': pair['id'], 'choice': choice, 'response_time_ms': 2000})
+                    await call(conn, 'leaderboard_get', 'GET', '/api/game/leaderboard/?limit=10', 200)
+                    await call(conn, 'room_get', 'GET', f'/api/game/multiplayer/rooms/{room_code}/', 200)
+            finally:
+                conn.close()
+
+        await asyncio.gather(*(player() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        all_latencies = sorted(value for values in latencies.values() for value in values)
+        return {
+            'requests': len(all_latencies),
+            'errors': errors['count'],
+            'elapsed_s': round(elapsed, 2),
+            'rps': round(len(all_latencies) / elapsed, 1),
+            'p50_ms': round(percentile(all_latencies, 50), 2),
+            'p95_ms': round(percentile(all_latencies, 95), 2),
+            'p99_ms': round(percentile(all_latencies, 99), 2),
+            'endpoints': {
+                name: {
+                    'count': len(values),
+                    'p50_ms': round(percentile(sorted(values), 50), 2),
+                    'p95_ms': round(percentile(sorted(values), 95), 2),
+                }
+                for name, values in latencies.items()
+            },
+        }
+
+    def report(self, result):
+        self.stdout.write(
+            f"  {result['concurrency']:>4} joueurs : {result['rps']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  erreurs {result['errors']}"
+        )
+
+    def summarize(self, results, levels):
+        by_key = {(r['mode'], r['concurrency']): r for r in results}
+        if not all(('async', c) in by_key and ('sync', c) in by_key for c in levels):
+            return
+        self.stdout.write(self.style.SUCCESS("\nasync / sync (débit)"))
+        for concurrency in levels:
+            sync_rps = by_key[('sync', concurrency)]['rps']
+            async_rps = by_key[('async', concurrency)]['rps']
+            ratio = f"×{async_rps / sync_rps:.2f}" if sync_rps else '-'
+            self.stdout.write(f"  {concurrency:>4} joueurs : {async_rps:>8.1f} / {sync_rps:>8.1f} req/s  {ratio}")
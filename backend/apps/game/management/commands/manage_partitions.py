@@ -0,0 +1,80 @@
+"""
+Management command maintaining the monthly partitions of game sessions and
+answers (voir apps.game.partitions).
+
+Crée les partitions du mois courant et des ``--ahead`` mois suivants (et
+celles des lignes reçues entre-temps par la partition par défaut, qui y sont
+déplacées), puis liste les partitions. À lancer par cron, au moins une fois
+par mois.
+
+Avec ``--check``, ne crée rien et vérifie la structure : tables
+partitionnées, clé primaire ``(id, created_at)``, index et clés étrangères
+des modèles, séquences, partition par défaut et mois à venir. Sort en erreur
+au moindre écart ; hors PostgreSQL, il n'y a rien à vérifier.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.game.partitions import (
+    TABLES,
+    default_partition,
+    ensure_upcoming_partitions,
+    is_partitioned,
+    is_supported,
+    partitions,
+    structure_problems,
+)
+
+
+class Command(BaseCommand):
+    help = "Crée les partitions mensuelles à venir des sessions et réponses (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=settings.PARTITION_MONTHS_AHEAD,
+            help=f"Mois créés à l'avance (défaut : {settings.PARTITION_MONTHS_AHEAD}).",
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Vérifier la structure des tables partitionnées sans rien créer.",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            return self.check_structure(options['ahead'])
+        if not is_supported():
+            raise CommandError("Partitionnement disponible uniquement sur PostgreSQL")
+        with connection.cursor() as cursor:
+            if not all(is_partitioned(cursor, table) for table in TABLES):
+                raise CommandError("Tables non partitionnées : appliquer les migrations (0017)")
+
+        created = ensure_upcoming_partitions(options['ahead'])
+        for table, count in created.items():
+            self.stdout.write(f"  ✅ {table} : {count} partition(s) créée(s)")
+
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                months = partitions(cursor, table)
+                cursor.execute(f'SELECT COUNT(*) FROM {default_partition(table)}')
+                stray = cursor.fetchone()[0]
+                span = f"{months[0][0]:%Y-%m} → {months[-1][0]:%Y-%m}" if months else "aucune"
+                self.stdout.write(f"📊 {table} : {len(months)} mois ({span})")
+                if stray:
+                    self.stderr.write(
+                        f"  ⚠️  {stray} ligne(s) datée(s) au-delà des mois créés dans "
+                        f"{default_partition(table)} : augmenter --ahead"
+                    )
+
+    def check_structure(self, months_ahead):
+        if not is_supported():
+            self.stdout.write("⏭️  Hors PostgreSQL : tables ordinaires, rien à vérifier")
+            return
+        problems = structure_problems(months_ahead)
+        for problem in problems:
+            self.stderr.write(f"  ❌ {problem}")
+        if problems:
+            raise CommandError(f"{len(problems)} écart(s) dans la structure des partitions")
+        self.stdout.write(self.style.SUCCESS(f"✅ Structure conforme ({', '.join(TABLES)})"))
@@ -5,43 +5,129 @@ by scanning the media/pairs/ directory structure.
 Convention:
   - Real files:  media/pairs/real/{category}/{name}.{ext}
   - AI files:    media/pairs/ai/{category}/{name}_AI.{ext}
+  - Audio files: media/pairs/audio/{category}/{name}.{ext} (réel)
+                 media/pairs/audio/{category}/{name}_AI.{ext} (IA)
 
 Extensions may differ between real and AI versions.
+
+Le scan est incrémental : la taille et la date de modification de chaque
+fichier sont conservées dans un manifeste (media/.populate_pairs.json) et les
+catégories dont aucun fichier n'a changé sont ignorées. Les paires existantes
+sont chargées en une requête et les nouvelles insérées par bulk_create.
 """
+import json
 import os
-import re
+import tempfile
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 
-from apps.game.models import Category, MediaPair
+from apps.game.models import Category, MediaPair, media_pairs_changed
+from apps.game.pairing import PAIR_TREES, classify_audio_files, match_category_files
+from apps.game.processing import process_pair_media
 
 
-# Extensions considérées comme images
-IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'}
-# Extensions considérées comme vidéos
-VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mov', '.avi', '.mkv'}
-# Extensions considérées comme audio
-AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.flac', '.m4a'}
+MANIFEST_NAME = '.populate_pairs.json'
+MANIFEST_VERSION = 1
+BULK_BATCH_SIZE = 1000
 
 
-def get_media_type(ext):
-    """Détermine le type de média à partir de l'extension."""
-    ext = ext.lower()
-    if ext in IMAGE_EXTENSIONS:
-        return 'image'
-    elif ext in VIDEO_EXTENSIONS:
-        return 'video'
-    elif ext in AUDIO_EXTENSIONS:
-        return 'audio'
-    return None
+def scan_tree(root):
+    """
+    ``{dossier_catégorie: {nom_fichier: [taille, mtime_ns]}}`` pour un arbre
+    pairs/<type>/ (un seul niveau de catégories, fichiers cachés et
+    sous-dossiers comme _derivatives/ ignorés).
+    """
+    tree = {}
+    if not os.path.isdir(root):
+        return tree
+    with os.scandir(root) as categories:
+        for category in categories:
+            if category.name.startswith(('.', '_')) or not category.is_dir():
+                continue  # Ignorer les fichiers orphelins à la racine
+            files = {}
+            with os.scandir(category.path) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+            tree[category.name] = files
+    return tree
+
+
+def category_matches(by_kind, trees):
+    """
+    ``(chemins appariés, réels sans correspondance)`` d'une catégorie : fichiers
+    réels et audio qui forment une paire, fichiers réels sans version IA.
+    """
+    real_folder = by_kind.get('real')
+    ai_folder = by_kind.get('ai')
+    audio_folder = by_kind.get('audio')
+    pairs, unmatched, _ = match_category_files(
+        trees['real'].get(real_folder, {}) if real_folder else (),
+        trees['ai'].get(ai_folder, {}) if ai_folder else (),
+    )
+    audio_entries, _ = classify_audio_files(
+        trees['audio'].get(audio_folder, {}) if audio_folder else ()
+    )
+    paired = [f'pairs/real/{real_folder}/{name}' for name, _, _ in pairs] + [
+        f'pairs/audio/{audio_folder}/{name}' for name, _ in audio_entries
+    ]
+    return paired, [f'pairs/real/{real_folder}/{name}' for name in unmatched]
+
+
+def refresh_signatures(trees, media_root, names):
+    """
+    Remet à jour dans ``trees`` la signature des fichiers ``names``, réécrits
+    par le traitement des médias (faststart) après le scan.
+    """
+    for name in names:
+        parts = name.split('/')
+        if len(parts) != 4 or parts[0] != 'pairs':
+            continue
+        _, kind, folder, filename = parts
+        files = trees.get(kind, {}).get(folder)
+        if files is None or filename not in files:
+            continue
+        try:
+            stat = os.stat(media_root / name)
+        except OSError:
+            del files[filename]  # Disparu : la catégorie sera réexaminée
+            continue
+        files[filename] = [stat.st_size, stat.st_mtime_ns]
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {}
+    return manifest.get('trees', {})
+
+
+def save_manifest(path, trees):
+    """Écriture atomique du manifeste (fichier temporaire puis remplacement)."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.populate-', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump({'version': MANIFEST_VERSION, 'trees': trees}, fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 
 class Command(BaseCommand):
     help = (
-        "Scanne media/pairs/real/ et media/pairs/ai/ pour créer "
-        "automatiquement les Category et MediaPair manquants en base."
+        "Scanne media/pairs/real/, media/pairs/ai/ et media/pairs/audio/ pour "
+        "créer automatiquement les Category et MediaPair manquants en base."
     )
 
     def add_arguments(self, parser):
@@ -55,152 +141,226 @@ class Command(BaseCommand):
             action='store_true',
             help="Recrée les paires même si elles existent déjà (par chemin de fichier).",
         )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Ignore le manifeste de scan et réexamine toutes les catégories.",
+        )
+        parser.add_argument(
+            '--skip-derivatives',
+            action='store_true',
+            help="Ne génère pas les dérivés (WebP, pics audio) ; voir build_derivatives.",
+        )
+        parser.add_argument(
+            '--skip-metadata',
+            action='store_true',
+            help="N'extrait pas les métadonnées des fichiers ; voir extract_media_metadata.",
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         force = options['force']
+        skip_derivatives = options['skip_derivatives']
+        skip_metadata = options['skip_metadata']
+        verbose = options['verbosity'] >= 2
 
-        real_root = Path(settings.MEDIA_ROOT) / 'pairs' / 'real'
-        ai_root = Path(settings.MEDIA_ROOT) / 'pairs' / 'ai'
-
-        if not real_root.exists():
-            raise CommandError(f"Le dossier {real_root} n'existe pas.")
-        if not ai_root.exists():
-            raise CommandError(f"Le dossier {ai_root} n'existe pas.")
+        media_root = Path(settings.MEDIA_ROOT)
+        pairs_root = media_root / 'pairs'
+        if not pairs_root.exists():
+            raise CommandError(f"Le dossier {pairs_root} n'existe pas.")
 
         # -----------------------------------------------------------------
-        # 1. Indexer tous les fichiers AI par (catégorie, nom_base_lower)
-        #    pour pouvoir matcher même si l'extension ou la casse diffère
+        # 1. Charger en une requête les paires et catégories existantes
         # -----------------------------------------------------------------
-        ai_index = {}  # { (category_slug, base_name_lower): ai_file_path_relative }
-
-        for category_dir in sorted(ai_root.iterdir()):
-            if not category_dir.is_dir():
-                continue  # Ignorer les fichiers orphelins à la racine
-            category_slug = category_dir.name.lower()
+        existing_pairs = set()
+        existing_audio = set()
+        pairs_by_path = {}
+        for pair_id, real, ai, audio in MediaPair.objects.values_list(
+            'id', 'real_media', 'ai_media', 'audio_media'
+        ):
+            if real and ai:
+                existing_pairs.add((real, ai))
+            if audio:
+                existing_audio.add(audio)
+            for path in (real, ai, audio):
+                if path:
+                    pairs_by_path.setdefault(path, []).append(pair_id)
+
+        categories = {c.name.lower(): c for c in Category.objects.all()}
 
-            for ai_file in sorted(category_dir.iterdir()):
-                if not ai_file.is_file():
-                    continue
-
-                stem = ai_file.stem  # ex: "Taj_Mahal_AI"
-                # Retirer le suffixe _AI (insensible à la casse)
-                base_name = re.sub(r'_AI$', '', stem, flags=re.IGNORECASE)
-                key = (category_slug, base_name.lower())
-
-                # Chemin relatif depuis MEDIA_ROOT
-                rel_path = ai_file.relative_to(settings.MEDIA_ROOT)
-                ai_index[key] = str(rel_path)
+        # -----------------------------------------------------------------
+        # 2. Scanner les trois arbres et comparer au manifeste précédent
+        # -----------------------------------------------------------------
+        trees = {kind: scan_tree(pairs_root / kind) for kind in PAIR_TREES}
+        manifest_path = media_root / MANIFEST_NAME
+        previous = {} if (options['full'] or force) else load_manifest(manifest_path)
+
+        # Les catégories sont comparées sans tenir compte de la casse du dossier
+        folders = {}  # { category_slug: {kind: dossier} }
+        for kind, tree in trees.items():
+            for folder in tree:
+                folders.setdefault(folder.lower(), {})[kind] = folder
+
+        changed = {}  # { category_slug: {chemin_relatif modifié} }
+        unchanged_categories = 0
+        unmatched = []
+        for slug, by_kind in sorted(folders.items()):
+            modified = set()
+            same = True
+            for kind in PAIR_TREES:
+                folder = by_kind.get(kind)
+                files = trees[kind].get(folder, {}) if folder else {}
+                old_files = previous.get(kind, {}).get(folder, {}) if folder else {}
+                if files != old_files:
+                    same = False
+                for name, signature in files.items():
+                    if name in old_files and old_files[name] != signature:
+                        modified.add(f'pairs/{kind}/{folder}/{name}')
+            # Inchangée seulement si ses paires sont toujours en base (la base
+            # a pu être réinitialisée sans toucher aux médias) ; les fichiers
+            # sans correspondance ne comptent pas
+            paired, lone = category_matches(by_kind, trees) if same and previous else ((), ())
+            in_database = all(path in pairs_by_path for path in paired)
+            if same and previous and in_database:
+                unchanged_categories += 1
+                unmatched.extend(lone)  # Toujours signalés dans le résumé
+            else:
+                changed[slug] = modified
 
+        file_count = sum(len(files) for tree in trees.values() for files in tree.values())
         self.stdout.write(
-            self.style.SUCCESS(f"📁 {len(ai_index)} fichiers AI indexés")
+            self.style.SUCCESS(
+                f"📁 {file_count} fichiers scannés, "
+                f"{len(changed)} catégorie(s) à traiter"
+            )
         )
 
         # -----------------------------------------------------------------
-        # 2. Parcourir les fichiers réels et matcher avec l'IA
+        # 3. Apparier les fichiers des catégories modifiées
         # -----------------------------------------------------------------
         created_categories = 0
-        created_pairs = 0
         skipped_pairs = 0
-        unmatched = []
+        new_pairs = []
+        refresh_ids = set()
 
-        for category_dir in sorted(real_root.iterdir()):
-            if not category_dir.is_dir():
-                continue  # Ignorer les fichiers orphelins à la racine
-
-            category_name = category_dir.name.capitalize()
-            category_slug = category_dir.name.lower()
+        for slug, modified in sorted(changed.items()):
+            by_kind = folders[slug]
+            category_name = (by_kind.get('real') or by_kind.get('audio') or by_kind['ai']).capitalize()
+            for path in modified:
+                refresh_ids.update(pairs_by_path.get(path, []))
 
             # Créer ou récupérer la catégorie
-            if dry_run:
-                cat_exists = Category.objects.filter(
-                    name__iexact=category_name
-                ).exists()
-                if not cat_exists:
-                    self.stdout.write(
-                        f"  [DRY-RUN] Créerait la catégorie : {category_name}"
-                    )
-                    created_categories += 1
-                category = None
-            else:
-                category, cat_created = Category.objects.get_or_create(
-                    name__iexact=category_name,
-                    defaults={'name': category_name}
-                )
-                if cat_created:
-                    created_categories += 1
+            category = categories.get(category_name.lower())
+            if category is None and ('real' in by_kind or 'audio' in by_kind):
+                created_categories += 1
+                if dry_run:
+                    self.stdout.write(f"  [DRY-RUN] Créerait la catégorie : {category_name}")
+                else:
+                    category = Category.objects.create(name=category_name)
+                    categories[category_name.lower()] = category
                     self.stdout.write(
                         self.style.SUCCESS(f"  ✅ Catégorie créée : {category_name}")
                     )
 
-            # Parcourir les fichiers réels de cette catégorie
-            for real_file in sorted(category_dir.iterdir()):
-                if not real_file.is_file():
-                    continue
-
-                real_stem = real_file.stem  # ex: "Taj_Mahal"
-                real_ext = real_file.suffix  # ex: ".jpg"
-                media_type = get_media_type(real_ext)
+            real_folder = by_kind.get('real')
+            ai_folder = by_kind.get('ai')
+            pairs, unmatched_names, unknown = match_category_files(
+                trees['real'].get(real_folder, {}) if real_folder else (),
+                trees['ai'].get(ai_folder, {}) if ai_folder else (),
+            )
+            for name in unknown:
+                self.stdout.write(
+                    self.style.WARNING(f"  ⚠️  Extension inconnue ignorée : {name}")
+                )
+            for name in unmatched_names:
+                unmatched.append(f'pairs/real/{real_folder}/{name}')
+                self.stdout.write(
+                    self.style.WARNING(f"  ⚠️  Pas de fichier AI trouvé pour : {name}")
+                )
 
-                if media_type is None:
+            for name, ai_name, media_type in pairs:
+                real_rel = f'pairs/real/{real_folder}/{name}'
+                ai_rel = f'pairs/ai/{ai_folder}/{ai_name}'
+                if not force and (real_rel, ai_rel) in existing_pairs:
+                    skipped_pairs += 1
+                    continue
+                existing_pairs.add((real_rel, ai_rel))
+                new_pairs.append(MediaPair(
+                    category=category,
+                    real_media=real_rel,
+                    ai_media=ai_rel,
+                    media_type=media_type,
+                    difficulty='medium',
+                    is_active=True,
+                ))
+                if verbose or dry_run:
+                    prefix = "[DRY-RUN] Créerait" if dry_run else "Paire à créer"
                     self.stdout.write(
-                        self.style.WARNING(
-                            f"  ⚠️  Extension inconnue ignorée : {real_file.name}"
-                        )
+                        f"  {prefix} : {name} ↔ {ai_name} ({media_type}, {category_name})"
                     )
-                    continue
 
-                # Chemin relatif depuis MEDIA_ROOT
-                real_rel = str(real_file.relative_to(settings.MEDIA_ROOT))
+            audio_folder = by_kind.get('audio')
+            audio_entries, unknown = classify_audio_files(
+                trees['audio'].get(audio_folder, {}) if audio_folder else ()
+            )
+            for name in unknown:
+                self.stdout.write(
+                    self.style.WARNING(f"  ⚠️  Extension audio inconnue ignorée : {name}")
+                )
+            for name, is_real in audio_entries:
+                audio_rel = f'pairs/audio/{audio_folder}/{name}'
+                if not force and audio_rel in existing_audio:
+                    skipped_pairs += 1
+                    continue
+                existing_audio.add(audio_rel)
+                new_pairs.append(MediaPair(
+                    category=category,
+                    audio_media=audio_rel,
+                    is_real=is_real,
+                    media_type='audio',
+                    difficulty='medium',
+                    is_active=True,
+                ))
+                if verbose or dry_run:
+                    prefix = "[DRY-RUN] Créerait" if dry_run else "Audio à créer"
+                    label = "réel" if is_real else "IA"
+                    self.stdout.write(f"  {prefix} : {name} (audio {label}, {category_name})")
 
-                # Chercher le fichier AI correspondant
-                key = (category_slug, real_stem.lower())
-                ai_rel = ai_index.get(key)
+        # -----------------------------------------------------------------
+        # 4. Insertion groupée puis traitement des médias
+        # -----------------------------------------------------------------
+        updated_pairs = 0
+        if not dry_run:
+            if new_pairs:
+                MediaPair.objects.bulk_create(new_pairs, batch_size=BULK_BATCH_SIZE)
+                self.stdout.write(
+                    self.style.SUCCESS(f"  ✅ {len(new_pairs)} paire(s) créée(s)")
+                )
 
-                if not ai_rel:
-                    unmatched.append(real_rel)
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f"  ⚠️  Pas de fichier AI trouvé pour : {real_file.name}"
-                        )
-                    )
-                    continue
+            # Fichiers remplacés en place : dérivés et faststart à refaire
+            to_process = list(MediaPair.objects.filter(pk__in=refresh_ids))
+            updated_pairs = len(to_process)
+            to_process += [pair for pair in new_pairs if pair.pk]
+            for index, pair in enumerate(to_process, start=1):
+                process_pair_media(
+                    pair, derivatives=not skip_derivatives, metadata=not skip_metadata
+                )
+                if index % 500 == 0:
+                    self.stdout.write(f"  … {index}/{len(to_process)} paires traitées")
 
-                # Vérifier si la paire existe déjà
-                if not force:
-                    existing = MediaPair.objects.filter(
-                        real_media=real_rel,
-                        ai_media=ai_rel,
-                    ).exists()
-                    if existing:
-                        skipped_pairs += 1
-                        continue
+            if to_process:
+                media_pairs_changed.send(sender=MediaPair, pair_ids=[pair.pk for pair in to_process])
 
-                if dry_run:
-                    self.stdout.write(
-                        f"  [DRY-RUN] Créerait : {real_file.name} ↔ "
-                        f"{Path(ai_rel).name} ({media_type}, {category_name})"
-                    )
-                    created_pairs += 1
-                else:
-                    MediaPair.objects.create(
-                        category=category,
-                        real_media=real_rel,
-                        ai_media=ai_rel,
-                        media_type=media_type,
-                        difficulty='medium',
-                        is_active=True,
-                    )
-                    created_pairs += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  ✅ Paire créée : {real_file.name} ↔ "
-                            f"{Path(ai_rel).name} ({media_type})"
-                        )
-                    )
+            # Faststart réécrit des vidéos : le manifeste garde leur nouvelle signature
+            processed = [
+                field.name for pair in to_process
+                for field in (pair.real_media, pair.ai_media, pair.audio_media) if field
+            ]
+            refresh_signatures(trees, media_root, processed)
+            save_manifest(manifest_path, trees)
 
         # -----------------------------------------------------------------
-        # 3. Résumé
+        # 5. Résumé
         # -----------------------------------------------------------------
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS("=" * 50))
@@ -209,14 +369,16 @@ class Command(BaseCommand):
             self.style.SUCCESS(f"{prefix}📊 Résumé :")
         )
         self.stdout.write(f"   Catégories créées  : {created_categories}")
-        self.stdout.write(f"   Paires créées      : {created_pairs}")
+        self.stdout.write(f"   Catégories inchangées : {unchanged_categories} (ignorées)")
+        self.stdout.write(f"   Paires créées      : {len(new_pairs)}")
+        self.stdout.write(f"   Paires mises à jour: {updated_pairs}")
         self.stdout.write(f"   Paires ignorées    : {skipped_pairs} (déjà existantes)")
         self.stdout.write(f"   Fichiers sans match: {len(unmatched)}")
 
         if unmatched:
             self.stdout.write("")
             self.stdout.write(self.style.WARNING("Fichiers réels sans correspondance AI :"))
-            for f in unmatched:
+            for f in sorted(unmatched):
                 self.stdout.write(f"   - {f}")
 
         self.stdout.write(self.style.SUCCESS("=" * 50))
@@ -0,0 +1,94 @@
+"""
+Management command to process the media file deletion queue
+(voir apps.game.deletion).
+
+Sans option, vide la file une fois ; avec --loop, tourne en continu (conteneur
+ou service dédié quand MEDIA_DELETION_WORKER est désactivé).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Count
+
+from apps.game.deletion import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_ATTEMPTS,
+    process_pending_deletions,
+    purge_deletion_log,
+)
+from apps.game.models import MediaDeletion
+
+
+class Command(BaseCommand):
+    help = "Traite la file des suppressions de fichiers médias (par lots, avec reprises)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Nombre de fichiers par lot (défaut : {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f"Tentatives avant abandon (défaut : {DEFAULT_MAX_ATTEMPTS}).",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Tourne en continu au lieu de s'arrêter quand la file est vide.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10,
+            help="Pause en secondes entre deux passages avec --loop (défaut : 10).",
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Remet en file les suppressions abandonnées.",
+        )
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            help="Efface du journal les suppressions terminées depuis plus de N jours.",
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            count = MediaDeletion.objects.filter(status=MediaDeletion.Status.FAILED).update(
+                status=MediaDeletion.Status.PENDING, attempts=0, processed_at=None
+            )
+            self.stdout.write(f"🔁 {count} suppression(s) remise(s) en file")
+
+        if options['purge_days'] is not None:
+            count = purge_deletion_log(options['purge_days'])
+            self.stdout.write(f"🧹 {count} ligne(s) de journal effacée(s)")
+
+        while True:
+            processed = self._drain(options['batch_size'], options['max_attempts'])
+            if processed:
+                self.stdout.write(f"  ✅ {processed} suppression(s) traitée(s)")
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
+
+        counts = dict.fromkeys(MediaDeletion.Status.values, 0)
+        counts.update(MediaDeletion.objects.values_list('status').annotate(total=Count('id')))
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 {counts['pending']} en attente, {counts['done']} supprimé(s), "
+            f"{counts['skipped']} conservé(s), {counts['failed']} en échec"
+        ))
+
+    def _drain(self, batch_size, max_attempts):
+        total = 0
+        while True:
+            processed = process_pending_deletions(batch_size, max_attempts)
+            if not processed:
+                return total
+            total += processed
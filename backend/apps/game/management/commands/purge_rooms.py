@@ -0,0 +1,63 @@
+"""
+Management command archiving then deleting expired multiplayer rooms
+(voir apps.game.room_gc).
+
+Sans option, purge une fois ; avec --loop, tourne en continu (conteneur ou
+service dédié).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.game.room_gc import DEFAULT_BATCH_SIZE, expired_rooms, purge_expired_rooms
+
+
+class Command(BaseCommand):
+    help = "Archive puis supprime les rooms multijoueur terminées ou abandonnées (par lots)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Nombre de rooms par transaction (défaut : {DEFAULT_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help="Nombre maximal de lots par passage (défaut : jusqu'à épuisement).",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Compte les rooms expirées sans rien supprimer.",
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help="Tourne en continu au lieu de s'arrêter après un passage.",
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=600,
+            help="Pause en secondes entre deux passages avec --loop (défaut : 600).",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size doit être au moins 1")
+
+        if options['dry_run']:
+            count = expired_rooms().count()
+            self.stdout.write(self.style.SUCCESS(f"📊 {count} room(s) expirée(s)"))
+            return
+
+        while True:
+            count = purge_expired_rooms(options['batch_size'], options['max_batches'])
+            self.stdout.write(self.style.SUCCESS(f"🧹 {count} room(s) archivée(s) et supprimée(s)"))
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+"""
+Management command to abandon chunked uploads that stopped receiving data
+(voir apps.game.uploads).
+"""
+from django.core.management.base import BaseCommand
+
+from apps.game.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Abandonne les uploads par morceaux inactifs et efface les octets reçus."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=float,
+            default=24,
+            help="Inactivité en heures au-delà de laquelle un upload est abandonné (défaut : 24).",
+        )
+
+    def handle(self, *args, **options):
+        count = purge_stale_uploads(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"🧹 {count} upload(s) abandonné(s)"))
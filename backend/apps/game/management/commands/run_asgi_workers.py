@@ -0,0 +1,55 @@
+"""
+Management command starting N Daphne workers on consecutive ports.
+
+Point d'entrée du conteneur backend : ``ASGI_WORKERS`` workers (1 par défaut)
+sur les ports 8000, 8001, ... ; nginx répartit les connexions entre eux. Si un
+worker s'arrête, les autres sont arrêtés et la commande sort avec son code
+(le conteneur est alors redémarré : ``restart: unless-stopped`` dans
+docker-compose.yml).
+"""
+import os
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.game.asgi_workers import start_workers, stop_workers
+
+
+class Command(BaseCommand):
+    help = "Lance plusieurs workers ASGI (Daphne) sur des ports consécutifs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=int(os.environ.get('ASGI_WORKERS', 1)),
+            help="Nombre de workers (défaut : ASGI_WORKERS, sinon 1).",
+        )
+        parser.add_argument('--bind', default='0.0.0.0', help="Adresse d'écoute.")
+        parser.add_argument('--port', type=int, default=8000, help="Port du premier worker.")
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError("--workers doit être au moins 1")
+
+        stopping = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stopping.append(True))
+
+        processes = start_workers(options['workers'], options['port'], options['bind'])
+        last_port = options['port'] + options['workers'] - 1
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 {options['workers']} worker(s) ASGI sur les ports {options['port']}-{last_port}"
+        ))
+        exit_code = None
+        try:
+            while not stopping:
+                exited = [(index, p.returncode) for index, p in enumerate(processes) if p.poll() is not None]
+                if exited:
+                    index, exit_code = exited[0]
+                    self.stderr.write(f"  ⚠️  Worker {index} arrêté (code {exit_code}) : arrêt des autres")
+                    break
+                time.sleep(0.5)
+        finally:
+            stop_workers(processes)
+        if exit_code is not None:
+            raise SystemExit(exit_code or 1)
@@ -0,0 +1,111 @@
+"""
+Manifeste de préchargement des médias d'une session.
+
+Pour chaque paire de la session (dans l'ordre du jeu), liste les fichiers à
+télécharger avec leur taille, type MIME, dimensions ou durée et empreinte de
+contenu (lues dans ``MediaPair.media_info``), pour que le client précharge la
+paire suivante pendant que la courante est affichée.
+
+Sans ``media_info``, seuls les en-têtes sont lus, sans empreinte : hacher les
+fichiers ne se fait pas pendant la création d'une session mais dans
+extract_media_metadata ou le traitement des médias.
+"""
+import os
+from functools import lru_cache
+
+from .imaging import derivative_urls
+from .metadata import probe_file
+from .payloads import absolute_url
+from .waveform import peaks_url
+
+
+@lru_cache(maxsize=4096)
+def _probe(path, size, mtime_ns):
+    """Sonde des en-têtes mise en cache ; la clé (taille, mtime) invalide le cache si le fichier change."""
+    return probe_file(path, with_hash=False)
+
+
+def describe_media(pair, side):
+    """
+    Métadonnées d'un côté ('real', 'ai' ou 'audio') : celles stockées dans
+    ``pair.media_info``, sinon une sonde des en-têtes du fichier, sans
+    ``hash`` (None s'il est absent).
+    """
+    stored = (pair.media_info or {}).get(side)
+    if stored:
+        return dict(stored)
+    field = getattr(pair, f'{side}_media')
+    if not field:
+        return None
+    try:
+        path = field.path
+        stat = os.stat(path)
+    except (NotImplementedError, OSError):
+        return None
+    return dict(_probe(path, stat.st_size, stat.st_mtime_ns))
+
+
+def _entry(base, role, pair, side):
+    info = describe_media(pair, side)
+    if info is None:
+        return None
+    field = getattr(pair, f'{side}_media')
+    return {'role': role, 'url': absolute_url(base, field.url), **info}
+
+
+def pair_manifest(base, pair, position):
+    """
+    Entrées du manifeste pour une paire ; ``base`` = préfixe des URLs média
+    (``payloads.media_base_url``), ``position`` = côté du média réel.
+    """
+    if pair.media_type == 'audio':
+        entries = [_entry(base, 'audio', pair, 'audio')]
+        url = peaks_url(pair)
+        if url:
+            entries.append({'role': 'audio_peaks', 'url': absolute_url(base, url), 'mime': 'application/octet-stream'})
+        return [e for e in entries if e]
+
+    sides = {'left': 'real', 'right': 'ai'} if position == 'left' else {'left': 'ai', 'right': 'real'}
+    entries = []
+    for role, side in sides.items():
+        entry = _entry(base, role, pair, side)
+        if entry is None:
+            continue
+        if pair.media_type == 'image':
+            entry['srcset'] = [
+                {'url': absolute_url(base, v['url']), 'width': v['width']}
+                for v in derivative_urls(pair, side)
+            ]
+        entries.append(entry)
+    return entries
+
+
+def build_session_manifest(base, pairs, positions):
+    """Manifeste complet : une entrée par paire, dans l'ordre de la session."""
+    return [
+        {
+            'pair_id': pair.id,
+            'order': index,
+            'media_type': pair.media_type,
+            'media': pair_manifest(base, pair, positions.get(pair.id, 'left')),
+        }
+        for index, pair in enumerate(pairs, start=1)
+    ]
+
+
+def preload_link_header(manifest_item):
+    """Valeur d'en-tête ``Link: rel=preload`` pour les médias d'une paire."""
+    links = []
+    for media in manifest_item['media']:
+        if media['role'] == 'audio_peaks':
+            links.append(f"<{media['url']}>; rel=preload; as=fetch; crossorigin")
+            continue
+        kind = media['mime'].split('/')[0]
+        if kind not in ('image', 'video', 'audio'):
+            kind = 'fetch'
+        link = f"<{media['url']}>; rel=preload; as={kind}; type=\"{media['mime']}\""
+        if media.get('srcset'):
+            srcset = ', '.join(f"{v['url']} {v['width']}w" for v in media['srcset'])
+            link += f'; imagesrcset="{srcset}"; imagesizes="(min-width: 768px) 50vw, 100vw"'
+        links.append(link)
+    return ', '.join(links)
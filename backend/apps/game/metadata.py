@@ -0,0 +1,97 @@
+"""
+Métadonnées des fichiers d'une paire : taille, type MIME, dimensions, durée
+et empreinte de contenu.
+
+Elles sont extraites une fois (à l'upload, à l'ingestion ou par la commande
+extract_media_metadata) et stockées dans ``MediaPair.media_info`` ; les
+serializers et le manifeste les lisent sans toucher au disque.
+
+``probe_file`` ne dépend que de son argument et peut tourner dans un
+ProcessPoolExecutor.
+"""
+import hashlib
+import mimetypes
+import os
+import wave
+
+from .mp4 import FASTSTART_EXTENSIONS, MP4Error, read_movie_info
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MEDIA_SIDES = ('real', 'ai', 'audio')
+
+# Champs exposés au client pour la mise en page (sans l'empreinte)
+LAYOUT_FIELDS = ('bytes', 'mime', 'width', 'height', 'duration_ms')
+
+
+def probe_file(path, with_hash=True):
+    """
+    Lit les en-têtes du fichier (Pillow, mvhd, wave) et calcule son SHA-256
+    (lecture complète du fichier, sauf ``with_hash=False``).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    info = {
+        'bytes': os.path.getsize(path),
+        'mime': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+        'width': None,
+        'height': None,
+        'duration_ms': None,
+    }
+    try:
+        if info['mime'].startswith('image/'):
+            from PIL import Image
+            with Image.open(path) as image:  # lit seulement l'en-tête
+                info['width'], info['height'] = image.size
+        elif ext in FASTSTART_EXTENSIONS:
+            info.update(read_movie_info(path))
+        elif ext == '.wav':
+            with wave.open(path, 'rb') as wav:
+                info['duration_ms'] = int(wav.getnframes() * 1000 / wav.getframerate())
+    except (OSError, MP4Error, wave.Error, EOFError, ValueError):
+        pass
+
+    if not with_hash:
+        return info
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    info['hash'] = f'sha256-{digest.hexdigest()}'
+    return info
+
+
+def pair_media_paths(pair):
+    """{côté: chemin local} des fichiers présents d'une paire."""
+    paths = {}
+    for side in MEDIA_SIDES:
+        field = getattr(pair, f'{side}_media')
+        if not field:
+            continue
+        try:
+            path = field.path
+        except NotImplementedError:
+            continue  # Stockage distant
+        if os.path.isfile(path):
+            paths[side] = path
+    return paths
+
+
+def extract_pair_metadata(pair, save=True):
+    """Sonde les fichiers d'une paire et met à jour ``pair.media_info``."""
+    media_info = {}
+    for side, path in pair_media_paths(pair).items():
+        try:
+            media_info[side] = probe_file(path)
+        except OSError:
+            continue
+    pair.media_info = media_info
+    if save and pair.pk:
+        type(pair).objects.filter(pk=pair.pk).update(media_info=media_info)
+    return media_info
+
+
+def layout_info(pair, side):
+    """Métadonnées de mise en page d'un côté, ou None si non extraites."""
+    info = (pair.media_info or {}).get(side)
+    if not info:
+        return None
+    return {key: info.get(key) for key in LAYOUT_FIELDS}
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_add_total_pairs_to_game_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediapair',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, help_text='Dérivés responsives générés (voir apps.game.imaging)'),
+        ),
+    ]
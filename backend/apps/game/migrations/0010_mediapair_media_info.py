@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediapair',
+            name='media_info',
+            field=models.JSONField(blank=True, default=dict, help_text='Métadonnées des fichiers (voir apps.game.metadata)'),
+        ),
+    ]
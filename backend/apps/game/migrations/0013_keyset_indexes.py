@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0012_mediaupload'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mediapair',
+            index=models.Index(fields=['created_at', 'id'], name='game_mediap_created_a5dce6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediapair',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='game_mediap_categor_db619c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['created_at', 'id'], name='game_gamese_created_be77c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['is_completed', 'created_at', 'id'], name='game_gamese_is_comp_fb8de5_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0014_changecounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='multiplayerroom',
+            index=models.Index(fields=['status', 'updated_at'], name='game_multip_status_84453b_idx'),
+        ),
+        migrations.CreateModel(
+            name='RoomArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('room_code', models.CharField(db_index=True, max_length=6)),
+                ('status', models.CharField(help_text='Statut de la room à sa suppression', max_length=20)),
+                ('reason', models.CharField(choices=[('finished', 'Terminée'), ('abandoned', 'Abandonnée')], max_length=20)),
+                ('question_count', models.IntegerField(default=0)),
+                ('player_count', models.IntegerField(default=0)),
+                ('answer_count', models.IntegerField(default=0)),
+                ('players', models.JSONField(blank=True, default=list, help_text='Classement final : [{pseudo, score, answers, correct}]')),
+                ('created_at', models.DateTimeField(help_text='Création de la room')),
+                ('last_activity_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Room archivée',
+                'verbose_name_plural': 'Rooms archivées',
+                'ordering': ['-archived_at'],
+            },
+        ),
+    ]
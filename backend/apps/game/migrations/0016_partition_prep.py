@@ -0,0 +1,62 @@
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0015_room_lifecycle'),
+    ]
+
+    operations = [
+        # Contraintes incompatibles avec des tables partitionnées sur created_at
+        migrations.AlterUniqueTogether(
+            name='gameanswer',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='gameanswer',
+            name='session',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='game.gamesession'),
+        ),
+        migrations.AlterField(
+            model_name='gamesession',
+            name='session_key',
+            field=models.UUIDField(db_index=True, default=uuid.uuid4),
+        ),
+        # Agrégats des mois archivés
+        migrations.CreateModel(
+            name='GameStatsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Premier jour du mois (UTC)')),
+                ('audience_type', models.CharField(choices=[('school', 'Scolaire'), ('public', 'Grand Public')], max_length=10)),
+                ('sessions', models.IntegerField(default=0)),
+                ('completed_sessions', models.IntegerField(default=0)),
+                ('answers', models.IntegerField(default=0, help_text='Réponses des sessions terminées')),
+                ('correct_answers', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-month', 'audience_type'],
+                'unique_together': {('month', 'audience_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text="id de la session d'origine", primary_key=True, serialize=False)),
+                ('pseudo', models.CharField(max_length=50)),
+                ('score', models.IntegerField()),
+                ('streak_max', models.IntegerField(default=0)),
+                ('time_total_ms', models.IntegerField(default=0)),
+                ('audience_type', models.CharField(choices=[('school', 'Scolaire'), ('public', 'Grand Public')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-score', 'time_total_ms'],
+                'indexes': [models.Index(fields=['-score', 'time_total_ms'], name='game_leader_score_e2ff53_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,135 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+# DDL figé à l'état de cette migration : elle ne dépend pas de
+# apps.game.partitions, qui peut évoluer après elle.
+TABLES = ('game_gamesession', 'game_gameanswer')
+# Mois créés à l'avance ; manage_partitions crée les suivants
+MONTHS_AHEAD = 3
+
+
+def month_start(value):
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def create_partitions(cursor, table, start, end):
+    """Partitions mensuelles de ``start`` à ``end`` inclus (``<table>_pAAAA_MM``)."""
+    month = start
+    while month <= end:
+        lower, upper = (
+            datetime(bound.year, bound.month, 1, tzinfo=dt_timezone.utc).isoformat()
+            for bound in (month, add_months(month, 1))
+        )
+        cursor.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+        month = add_months(month, 1)
+
+
+def index_definitions(cursor, table):
+    """CREATE INDEX des index de ``table`` qui ne portent pas une contrainte."""
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = to_regclass(%s) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        [table],
+    )
+    return [definition.replace(' ON ONLY ', ' ON ', 1) for (definition,) in cursor.fetchall()]
+
+
+def foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def rebuild(cursor, table, partitioned):
+    """
+    Recopie ``table`` dans une table partitionnée (ou ordinaire) de même
+    structure, avec ses index, clés étrangères et séquence d'identifiants.
+    """
+    indexes = index_definitions(cursor, table)
+    constraints = foreign_keys(cursor, table)
+    cursor.execute(f'SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM {table}')
+    first, max_id = cursor.fetchone()
+
+    old = f'{table}_old'
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    partition_by = ' PARTITION BY RANGE (created_at)' if partitioned else ''
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_by}'
+    )
+    # La séquence (ou l'identité) de l'ancienne table disparaît avec elle
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
+    if partitioned:
+        this_month = month_start(timezone.now())
+        start = min(month_start(first), this_month) if first else this_month
+        create_partitions(cursor, table, start, add_months(this_month, MONTHS_AHEAD))
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    cursor.execute(f'DROP TABLE {old}')
+
+    primary_key = 'id, created_at' if partitioned else 'id'
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})')
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in constraints:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+    sequence = f'{table}_id_seq'
+    cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute("SELECT setval(%s, %s, %s)", [sequence, max(max_id, 1), max_id > 0])
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            if not is_partitioned(cursor, table):
+                rebuild(cursor, table, True)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            if is_partitioned(cursor, table):
+                rebuild(cursor, table, False)
+
+
+class Migration(migrations.Migration):
+    """
+    Sessions et réponses partitionnées par mois sur PostgreSQL (voir
+    apps.game.partitions) ; sans effet sur les autres bases. Les tables sont
+    recopiées : compter quelques secondes par million de lignes.
+    ``manage_partitions --check`` vérifie la structure obtenue.
+    """
+
+    dependencies = [
+        ('game', '0016_partition_prep'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
@@ -3,12 +3,19 @@ Models for the Real vs AI game.
 """
 import os
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .deletion import schedule_file_deletions
+from .imaging import pair_derivative_names
+from . import response_cache
+from .pair_cards import pair_cards
+from .versioning import LEADERBOARD, PAIRS, bump_version
+
 
 class Category(models.Model):
     """Category for grouping media pairs (e.g., Landscapes, Portraits, Animals)."""
@@ -104,24 +111,49 @@ class MediaPair(models.Model):
         blank=True,
         help_text="Explication affichée après la réponse"
     )
+    # Variantes WebP redimensionnées : {'real': [{'width', 'name'}], 'ai': [...]}
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Dérivés responsives générés (voir apps.game.imaging)"
+    )
+    # Par côté : {'real': {'bytes', 'mime', 'width', 'height', 'duration_ms', 'hash'}, ...}
+    media_info = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Métadonnées des fichiers (voir apps.game.metadata)"
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pagination par clé de l'admin (apps.admin_api.pagination)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['category', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.category.name} - {self.media_type} #{self.id}"
 
     def delete_media_files(self):
-        """Supprime les fichiers médias associés du disque."""
-        for field in [self.real_media, self.ai_media, self.audio_media]:
-            if field:
-                try:
-                    if os.path.isfile(field.path):
-                        os.remove(field.path)
-                except Exception:
-                    pass  # Ignorer les erreurs de suppression
+        """
+        Planifie la suppression des fichiers médias et dérivés de la paire.
+
+        Les suppressions sont enregistrées dans la même transaction que la
+        suppression de la paire (rien n'est effacé si elle est annulée) puis
+        traitées par lots en arrière-plan (voir apps.game.deletion).
+        """
+        names = [field.name for field in (self.real_media, self.ai_media, self.audio_media) if field]
+        names.extend(pair_derivative_names(self))
+        schedule_file_deletions(names, reason=f"MediaPair #{self.pk} supprimée")
+
+
+# Envoyé une seule fois après une opération groupée sur des paires (UPDATE ou
+# DELETE en masse, que post_save ne couvre pas) : argument ``pair_ids``, liste
+# des paires concernées ou None si elles ne sont pas connues individuellement.
+media_pairs_changed = Signal()
 
 
 @receiver(post_delete, sender=MediaPair)
@@ -130,6 +162,100 @@ def delete_media_files_on_delete(sender, instance, **kwargs):
     instance.delete_media_files()
 
 
+@receiver(post_save, sender=MediaPair)
+@receiver(post_delete, sender=MediaPair)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def pairs_changed(sender, instance=None, **kwargs):
+    """Invalide les ETag, le cache des listes et les fiches de paires."""
+    bump_version(PAIRS)
+    response_cache.invalidate(response_cache.CATEGORIES)
+    # Y compris pour une catégorie : son nom est affiché sur les fiches
+    transaction.on_commit(pair_cards.invalidate)
+
+
+@receiver(media_pairs_changed)
+def pairs_changed_in_bulk(sender, pair_ids=None, **kwargs):
+    bump_version(PAIRS)
+    response_cache.invalidate(response_cache.CATEGORIES)
+    transaction.on_commit(pair_cards.invalidate)
+
+
+class MediaBlob(models.Model):
+    """Fichier stocké par empreinte de contenu, avec son nombre de références."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} réf.)"
+
+
+class MediaDeletion(models.Model):
+    """File d'attente et journal des suppressions de fichiers médias."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'En attente'
+        DONE = 'done', 'Supprimé'
+        SKIPPED = 'skipped', 'Conservé (encore référencé)'
+        FAILED = 'failed', 'Échec'
+
+    name = models.CharField(max_length=255)
+    reason = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = "Suppression de média"
+        verbose_name_plural = "Suppressions de médias"
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+
+class MediaUpload(models.Model):
+    """Upload par morceaux, reprenable (voir apps.game.uploads)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Upload en cours"
+        verbose_name_plural = "Uploads en cours"
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.size
+
+
+class ChangeCounter(models.Model):
+    """Compteur de versions d'un sujet, pour les ETag (voir apps.game.versioning)."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} v{self.value}"
+
+
 class GameSession(models.Model):
     """A game session for a player."""
     
@@ -137,7 +263,9 @@ class GameSession(models.Model):
         SCHOOL = 'school', 'Scolaire'
         PUBLIC = 'public', 'Grand Public'
     
-    session_key = models.UUIDField(default=uuid.uuid4, unique=True)
+    # Indexé sans contrainte d'unicité : la table est partitionnée par mois sur
+    # PostgreSQL (voir partitions) et un UUID aléatoire ne se répète pas
+    session_key = models.UUIDField(default=uuid.uuid4, db_index=True)
     audience_type = models.CharField(
         max_length=10,
         choices=AudienceType.choices,
@@ -155,17 +283,33 @@ class GameSession(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['is_completed', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"Session {self.session_key} - {self.pseudo or 'Anonyme'}"
 
 
+@receiver(post_save, sender=GameSession)
+@receiver(post_delete, sender=GameSession)
+def leaderboard_changed(sender, instance, **kwargs):
+    """Seules les sessions terminées avec un pseudo figurent au classement."""
+    if instance.is_completed and instance.pseudo:
+        bump_version(LEADERBOARD)
+        response_cache.invalidate(response_cache.LEADERBOARD)
+
+
 class GameAnswer(models.Model):
     """An answer submitted during a game session."""
+    # Pas de clé étrangère en base : une réponse et sa session peuvent être
+    # dans deux partitions mensuelles (voir partitions)
     session = models.ForeignKey(
         GameSession,
         on_delete=models.CASCADE,
-        related_name='answers'
+        related_name='answers',
+        db_constraint=False,
     )
     media_pair = models.ForeignKey(
         MediaPair,
@@ -179,14 +323,50 @@ class GameAnswer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # Une réponse par paire et ordre unique par session : garantis par le
+        # verrou de scoring.record_answer, pas par une contrainte (partitions)
         ordering = ['order']
-        unique_together = ['session', 'order']
 
     def __str__(self):
         status = "✓" if self.is_correct else "✗"
         return f"{status} Q{self.order} - {self.session.session_key}"
 
 
+class GameStatsRollup(models.Model):
+    """Compteurs des sessions d'un mois archivé (voir partitions), par type d'audience."""
+    month = models.DateField(help_text="Premier jour du mois (UTC)")
+    audience_type = models.CharField(max_length=10, choices=GameSession.AudienceType.choices)
+    sessions = models.IntegerField(default=0)
+    completed_sessions = models.IntegerField(default=0)
+    answers = models.IntegerField(default=0, help_text="Réponses des sessions terminées")
+    correct_answers = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-month', 'audience_type']
+        unique_together = ['month', 'audience_type']
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.audience_type} - {self.sessions} sessions"
+
+
+class LeaderboardArchive(models.Model):
+    """Meilleure session d'un mois archivé, gardée pour le classement."""
+    id = models.BigIntegerField(primary_key=True, help_text="id de la session d'origine")
+    pseudo = models.CharField(max_length=50)
+    score = models.IntegerField()
+    streak_max = models.IntegerField(default=0)
+    time_total_ms = models.IntegerField(default=0)
+    audience_type = models.CharField(max_length=10, choices=GameSession.AudienceType.choices)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-score', 'time_total_ms']
+        indexes = [models.Index(fields=['-score', 'time_total_ms'])]
+
+    def __str__(self):
+        return f"{self.pseudo} - {self.score} pts ({self.created_at:%Y-%m})"
+
+
 class GlobalStats(models.Model):
     """Global statistics for each media pair."""
     media_pair = models.OneToOneField(
@@ -268,6 +448,8 @@ class MultiplayerRoom(models.Model):
         ordering = ['-created_at']
         verbose_name = "Room Multiplayer"
         verbose_name_plural = "Rooms Multiplayer"
+        # Recherche des rooms expirées (voir room_gc)
+        indexes = [models.Index(fields=['status', 'updated_at'])]
 
     def __str__(self):
         return f"Room {self.room_code} - {self.status}"
@@ -312,6 +494,29 @@ class MultiplayerPlayer(models.Model):
         return f"{self.pseudo} (Room {self.room.room_code}) - {self.score} pts"
 
 
+@receiver(post_save, sender=MultiplayerRoom)
+@receiver(post_delete, sender=MultiplayerRoom)
+def room_changed(sender, instance, **kwargs):
+    """Le détail d'une room n'est mis en cache qu'une fois terminée."""
+    response_cache.invalidate(response_cache.room_topic(instance.room_code))
+
+
+@receiver(post_save, sender=MultiplayerPlayer)
+@receiver(post_delete, sender=MultiplayerPlayer)
+def room_player_changed(sender, instance, **kwargs):
+    # Nombre de joueurs connectés d'une room terminée ; la room déjà chargée
+    # (score mis à jour sous son verrou) évite une requête
+    if MultiplayerPlayer.room.is_cached(instance):
+        finished = instance.room.status == MultiplayerRoom.RoomStatus.FINISHED
+        room = instance.room.room_code if finished else None
+    else:
+        room = MultiplayerRoom.objects.filter(
+            pk=instance.room_id, status=MultiplayerRoom.RoomStatus.FINISHED
+        ).values_list('room_code', flat=True).first()
+    if room:
+        response_cache.invalidate(response_cache.room_topic(room))
+
+
 class MultiplayerAnswer(models.Model):
     """An answer submitted by a player in a multiplayer game."""
     
@@ -350,3 +555,33 @@ class MultiplayerAnswer(models.Model):
         status = "✓" if self.is_correct else "✗"
         return f"{status} {self.player.pseudo} - {self.points_earned} pts"
 
+
+class RoomArchive(models.Model):
+    """Résumé d'une room supprimée par le ramasse-miettes (voir room_gc)."""
+
+    class Reason(models.TextChoices):
+        FINISHED = 'finished', 'Terminée'
+        ABANDONED = 'abandoned', 'Abandonnée'
+
+    room_code = models.CharField(max_length=6, db_index=True)
+    status = models.CharField(max_length=20, help_text="Statut de la room à sa suppression")
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+    question_count = models.IntegerField(default=0)
+    player_count = models.IntegerField(default=0)
+    answer_count = models.IntegerField(default=0)
+    players = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Classement final : [{pseudo, score, answers, correct}]"
+    )
+    created_at = models.DateTimeField(help_text="Création de la room")
+    last_activity_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-archived_at']
+        verbose_name = "Room archivée"
+        verbose_name_plural = "Rooms archivées"
+
+    def __str__(self):
+        return f"Room {self.room_code} ({self.get_reason_display()}) - {self.player_count} joueurs"
@@ -0,0 +1,274 @@
+"""
+Réécriture « faststart » des fichiers MP4/MOV (ISO BMFF), en pur Python.
+
+Quand la boîte ``moov`` (index) est placée après ``mdat`` (données), le
+navigateur doit télécharger tout le fichier avant de pouvoir lire la vidéo.
+On déplace ``moov`` juste avant le premier ``mdat`` et on décale d'autant les
+offsets de chunks (``stco``/``co64``) qu'elle contient : la lecture démarre dès
+les premières centaines de Ko.
+"""
+import logging
+import os
+import shutil
+import struct
+import tempfile
+
+from django.core.files import File
+
+from .storage import is_content_addressed
+
+logger = logging.getLogger(__name__)
+
+FASTSTART_EXTENSIONS = {'.mp4', '.m4v', '.mov', '.m4a'}
+
+# Boîtes conteneurs à parcourir pour atteindre stco/co64
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts', b'dinf', b'mvex'}
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class MP4Error(ValueError):
+    """Fichier ISO BMFF invalide ou non pris en charge."""
+
+
+def read_top_level_boxes(fh):
+    """Retourne la liste (type, offset, taille) des boîtes de premier niveau."""
+    fh.seek(0, os.SEEK_END)
+    file_size = fh.tell()
+    boxes = []
+    offset = 0
+    while offset < file_size:
+        fh.seek(offset)
+        header = fh.read(8)
+        if len(header) < 8:
+            raise MP4Error("En-tête de boîte tronqué")
+        size, box_type = struct.unpack('>I4s', header)
+        if size == 1:
+            large = fh.read(8)
+            if len(large) < 8:
+                raise MP4Error("Taille 64 bits tronquée")
+            size = struct.unpack('>Q', large)[0]
+        elif size == 0:
+            size = file_size - offset
+        if size < 8 or offset + size > file_size:
+            raise MP4Error(f"Taille de boîte invalide pour {box_type!r}")
+        boxes.append((box_type, offset, size))
+        offset += size
+    return boxes
+
+
+def needs_faststart(path):
+    """True si ``moov`` est placé après le premier ``mdat``."""
+    with open(path, 'rb') as fh:
+        boxes = read_top_level_boxes(fh)
+    types = [box_type for box_type, _, _ in boxes]
+    if b'moov' not in types or b'mdat' not in types:
+        return False
+    return types.index(b'moov') > types.index(b'mdat')
+
+
+def _shift_chunk_offsets(data, start, end, delta):
+    """Décale en place les offsets stco/co64 contenus dans ``data[start:end]``."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise MP4Error(f"Taille de boîte invalide pour {box_type!r} dans moov")
+
+        if box_type in CONTAINER_BOXES:
+            _shift_chunk_offsets(data, offset + header, offset + size, delta)
+        elif box_type == b'cmov':
+            raise MP4Error("moov compressé non pris en charge")
+        elif box_type in (b'stco', b'co64'):
+            # version/flags (4 octets) puis nombre d'entrées
+            entries_at = offset + header + 4
+            count = struct.unpack_from('>I', data, entries_at)[0]
+            if box_type == b'stco':
+                fmt, width, limit = '>I', 4, 0xFFFFFFFF
+            else:
+                fmt, width, limit = '>Q', 8, 0xFFFFFFFFFFFFFFFF
+            position = entries_at + 4
+            if position + count * width > offset + size:
+                raise MP4Error(f"Table {box_type.decode()} tronquée")
+            for _ in range(count):
+                value = struct.unpack_from(fmt, data, position)[0] + delta
+                if value > limit:
+                    raise MP4Error("Offset hors limites pour stco (co64 requis)")
+                struct.pack_into(fmt, data, position, value)
+                position += width
+        offset += size
+
+
+def _copy_range(src, dst, offset, size):
+    src.seek(offset)
+    remaining = size
+    while remaining:
+        chunk = src.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise MP4Error("Fichier tronqué pendant la copie")
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def faststart(path):
+    """
+    Déplace ``moov`` avant ``mdat`` dans le fichier ``path`` (remplacement atomique).
+
+    Retourne True si le fichier a été réécrit, False s'il était déjà optimisé.
+    Lève MP4Error si le fichier ne peut pas être traité (il est alors laissé intact).
+    """
+    with open(path, 'rb') as src:
+        boxes = read_top_level_boxes(src)
+        types = [box_type for box_type, _, _ in boxes]
+        if b'moov' not in types or b'mdat' not in types:
+            return False
+        moov_index = types.index(b'moov')
+        mdat_index = types.index(b'mdat')
+        if moov_index < mdat_index:
+            return False
+
+        _, moov_offset, moov_size = boxes[moov_index]
+        src.seek(moov_offset)
+        moov = bytearray(src.read(moov_size))
+        header = 16 if struct.unpack_from('>I', moov, 0)[0] == 1 else 8
+        # Toutes les données situées avant l'ancien moov sont décalées de sa taille
+        _shift_chunk_offsets(moov, header, moov_size, moov_size)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.faststart-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                for index, (box_type, offset, size) in enumerate(boxes):
+                    if index == moov_index:
+                        continue
+                    if index == mdat_index:
+                        dst.write(moov)
+                    _copy_range(src, dst, offset, size)
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return True
+
+
+def faststart_field(field):
+    """
+    Applique faststart au fichier d'un FileField s'il est local et au bon format.
+
+    Retourne True si le fichier a été réécrit.
+    """
+    if not field:
+        return False
+    if os.path.splitext(field.name)[1].lower() not in FASTSTART_EXTENSIONS:
+        return False
+    try:
+        path = field.path
+    except NotImplementedError:
+        return False  # Stockage distant : pas de réécriture en place
+    if not os.path.isfile(path):
+        return False
+    if is_content_addressed(field.name):
+        return _faststart_content_addressed(field, path)
+    return faststart(path)
+
+
+def _faststart_content_addressed(field, path):
+    """
+    Un fichier adressé par contenu ne doit jamais changer sous son nom : la
+    version réécrite est stockée sous sa nouvelle empreinte et ``field.name``
+    est mis à jour (l'ancienne référence est libérée).
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix='.faststart-', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        shutil.copyfile(path, tmp_path)
+        if not faststart(tmp_path):
+            return False
+        old_name = field.name
+        with open(tmp_path, 'rb') as fh:
+            field.name = field.storage.save(old_name, File(fh))
+        field.storage.delete(old_name)
+        return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def faststart_pair(pair):
+    """Applique faststart aux fichiers vidéo/audio d'une paire ; retourne le nombre réécrit."""
+    if pair.media_type == 'image':
+        return 0
+    rewritten = 0
+    renamed = {}
+    for attname in ('real_media', 'ai_media', 'audio_media'):
+        field = getattr(pair, attname)
+        name = field.name
+        try:
+            rewritten += faststart_field(field)
+        except (MP4Error, OSError):
+            logger.exception("Faststart impossible pour %s", field.name)
+        if field.name != name:
+            renamed[attname] = field.name
+    if renamed and pair.pk:
+        type(pair).objects.filter(pk=pair.pk).update(**renamed)
+    return rewritten
+
+
+def _iter_boxes(data, start, end):
+    """(type, offset du contenu, fin) des boîtes contenues dans ``data[start:end]``."""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def read_movie_info(path):
+    """
+    ``{'duration_ms', 'width', 'height'}`` lus dans ``moov`` (mvhd et tkhd de la
+    première piste vidéo) ; valeurs None si introuvables.
+    """
+    info = {'duration_ms': None, 'width': None, 'height': None}
+    with open(path, 'rb') as fh:
+        boxes = read_top_level_boxes(fh)
+        moov = next(((offset, size) for box_type, offset, size in boxes if box_type == b'moov'), None)
+        if moov is None:
+            return info
+        fh.seek(moov[0])
+        data = fh.read(moov[1])
+    header = 16 if struct.unpack_from('>I', data, 0)[0] == 1 else 8
+    for box_type, start, end in _iter_boxes(data, header, len(data)):
+        if box_type == b'mvhd':
+            if data[start] == 1:
+                timescale, duration = struct.unpack_from('>IQ', data, start + 4 + 16)
+            else:
+                timescale, duration = struct.unpack_from('>II', data, start + 4 + 8)
+            info['duration_ms'] = int(duration * 1000 / timescale) if timescale else None
+        elif box_type == b'trak' and info['width'] is None:
+            for child, child_start, child_end in _iter_boxes(data, start, end):
+                if child == b'tkhd' and child_end - child_start >= 84:
+                    # Largeur et hauteur en virgule fixe 16.16 à la fin de tkhd
+                    width, height = struct.unpack_from('>II', data, child_end - 8)
+                    if width and height:
+                        info['width'], info['height'] = width >> 16, height >> 16
+    return info
+
+
+def read_duration_ms(path):
+    """Durée (ms) lue dans ``moov/mvhd``, ou None si introuvable."""
+    return read_movie_info(path)['duration_ms']
@@ -0,0 +1,177 @@
+"""
+Cache en mémoire (LRU borné) des « fiches » de paires : ce que le jeu lit
+d'une paire pour afficher une question et corriger une réponse, sans
+recharger le modèle à chaque réponse.
+
+Les fiches sont en lecture seule et partagées par les vues solo et le
+consumer multijoueur. Chaque worker garde les siennes, mais toutes suivent la
+génération partagée ``PAIR_CARDS`` de response_cache : les signaux de
+MediaPair (save, delete, media_pairs_changed) et le post-traitement des médias
+la remplacent, et chaque worker oublie ses fiches dès sa lecture suivante,
+quel que soit le processus à l'origine de la modification. Une lecture coûte
+donc un aller-retour au cache partagé ; la durée de vie bornée n'est qu'un
+filet de sécurité.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from . import response_cache
+from .imaging import derivative_urls
+from .metadata import MEDIA_SIDES, layout_info
+from .waveform import peaks_url
+
+DEFAULT_MAX_SIZE = 2048
+DEFAULT_TTL = 60  # secondes
+
+
+@dataclass(frozen=True)
+class PairCard:
+    """Fiche immuable d'une paire ; URLs relatives au stockage."""
+    id: int
+    media_type: str
+    is_real: bool
+    hint: str
+    difficulty: str
+    category_name: str
+    urls: dict = field(default_factory=dict)  # {côté: url}
+    info: dict = field(default_factory=dict)  # {côté: layout_info}
+    srcsets: dict = field(default_factory=dict)  # {côté: [{'url', 'width'}]}
+    peaks_url: str = None
+
+    @classmethod
+    def from_pair(cls, pair):
+        urls = {
+            side: getattr(pair, f'{side}_media').url
+            for side in MEDIA_SIDES if getattr(pair, f'{side}_media')
+        }
+        return cls(
+            id=pair.id,
+            media_type=pair.media_type,
+            is_real=pair.is_real,
+            hint=pair.hint,
+            difficulty=pair.difficulty,
+            category_name=pair.category.name if pair.category else 'Général',
+            urls=urls,
+            info={side: layout_info(pair, side) for side in urls},
+            srcsets=(
+                {side: derivative_urls(pair, side) for side in ('real', 'ai') if side in urls}
+                if pair.media_type == 'image' else {}
+            ),
+            peaks_url=peaks_url(pair) if pair.media_type == 'audio' else None,
+        )
+
+    def ai_position(self, real_position):
+        """Côté de la réponse IA : opposé du réel (image/vidéo), 'ai'/'real' pour l'audio."""
+        if self.media_type == 'audio':
+            return 'ai' if self.is_real is False else 'real'
+        return 'right' if real_position == 'left' else 'left'
+
+
+class PairCardCache:
+    """LRU thread-safe de fiches, avec compteurs de succès et d'échecs."""
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or getattr(settings, 'PAIR_CARD_CACHE_SIZE', DEFAULT_MAX_SIZE)
+        self.ttl = ttl if ttl is not None else getattr(settings, 'PAIR_CARD_CACHE_TTL', DEFAULT_TTL)
+        self._cards = OrderedDict()  # {id: (expire_at, fiche)}
+        self._lock = threading.Lock()
+        self._epoch = 0  # incrémenté à chaque invalidation
+        self._generation = None  # génération partagée des fiches gardées
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, pair_id):
+        """Fiche de la paire, ou None si elle n'existe pas."""
+        return self.get_many([pair_id]).get(pair_id)
+
+    def get_many(self, pair_ids):
+        """{id: fiche} des paires existantes ; les absentes sont chargées en une requête."""
+        found, missing, epoch = self._lookup(pair_ids, response_cache.generation(response_cache.PAIR_CARDS))
+        if missing:
+            pairs = self._queryset(missing)
+            found.update(self._store([PairCard.from_pair(pair) for pair in pairs], epoch))
+        return found
+
+    async def aget(self, pair_id):
+        """Comme ``get``, avec l'ORM asynchrone pour les fiches absentes."""
+        return (await self.aget_many([pair_id])).get(pair_id)
+
+    async def aget_many(self, pair_ids):
+        generation = await response_cache.ageneration(response_cache.PAIR_CARDS)
+        found, missing, epoch = self._lookup(pair_ids, generation)
+        if missing:
+            cards = [PairCard.from_pair(pair) async for pair in self._queryset(missing)]
+            found.update(self._store(cards, epoch))
+        return found
+
+    def _queryset(self, pair_ids):
+        from .models import MediaPair
+
+        return MediaPair.objects.select_related('category').filter(pk__in=pair_ids)
+
+    def _lookup(self, pair_ids, generation):
+        """(fiches valides trouvées, ids à charger, époque de la lecture)."""
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            if generation != self._generation:
+                # Invalidation depuis la dernière lecture, ici ou dans un autre worker
+                self._cards.clear()
+                self._epoch += 1
+                self._generation = generation
+            epoch = self._epoch
+            for pair_id in pair_ids:
+                entry = self._cards.get(pair_id)
+                if entry is not None and entry[0] > now:
+                    self._cards.move_to_end(pair_id)
+                    found[pair_id] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(pair_id)
+                    self.misses += 1
+        return found, missing, epoch
+
+    def _store(self, cards, epoch):
+        """Range les fiches chargées (sauf invalidation entre-temps) ; retourne {id: fiche}."""
+        loaded = {card.id: card for card in cards}
+        expire_at = time.monotonic() + self.ttl
+        with self._lock:
+            if epoch != self._epoch:
+                # Invalidation pendant le chargement : ne pas garder ces fiches
+                return loaded
+            for pair_id, card in loaded.items():
+                self._cards[pair_id] = (expire_at, card)
+                self._cards.move_to_end(pair_id)
+            while len(self._cards) > self.max_size:
+                self._cards.popitem(last=False)
+                self.evictions += 1
+        return loaded
+
+    def invalidate(self):
+        """
+        Fait oublier leurs fiches à tous les workers, celui-ci compris, à leur
+        prochaine lecture. Les chargements en cours ici ne sont pas gardés.
+        """
+        with self._lock:
+            self._epoch += 1
+        response_cache.invalidate_now(response_cache.PAIR_CARDS)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._cards),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0,
+            }
+
+
+pair_cards = PairCardCache()
@@ -0,0 +1,78 @@
+"""
+Règles d'appariement des fichiers réels et IA, partagées par populate_pairs
+et l'import d'archives zip.
+
+Convention (par dossier-catégorie) :
+  - real/{catégorie}/{nom}.{ext}  ↔  ai/{catégorie}/{nom}_AI.{ext}
+  - audio/{catégorie}/{nom}.{ext} (réel) ou {nom}_AI.{ext} (IA)
+
+Les extensions peuvent différer entre la version réelle et la version IA ;
+la comparaison des noms ignore la casse.
+"""
+import os
+import re
+
+# Extensions considérées comme images
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'}
+# Extensions considérées comme vidéos
+VIDEO_EXTENSIONS = {'.mp4', '.webm', '.mov', '.avi', '.mkv'}
+# Extensions considérées comme audio
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.flac', '.m4a'}
+
+PAIR_TREES = ('real', 'ai', 'audio')
+AI_SUFFIX = re.compile(r'_AI$', re.IGNORECASE)
+
+
+def get_media_type(ext):
+    """Détermine le type de média à partir de l'extension."""
+    ext = ext.lower()
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    elif ext in VIDEO_EXTENSIONS:
+        return 'video'
+    elif ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    return None
+
+
+def match_category_files(real_names, ai_names):
+    """
+    Apparie les fichiers réels et IA d'une catégorie.
+
+    Retourne ``(paires, sans_match, inconnus)`` : paires ``(réel, ia,
+    media_type)``, fichiers réels sans version IA, et fichiers réels dont
+    l'extension n'est pas reconnue.
+    """
+    ai_index = {}
+    for name in ai_names:
+        base_name = AI_SUFFIX.sub('', os.path.splitext(name)[0])
+        ai_index[base_name.lower()] = name
+
+    pairs, unmatched, unknown = [], [], []
+    for name in sorted(real_names):
+        stem, ext = os.path.splitext(name)
+        media_type = get_media_type(ext)
+        if media_type is None:
+            unknown.append(name)
+            continue
+        ai_name = ai_index.get(stem.lower())
+        if ai_name is None:
+            unmatched.append(name)
+            continue
+        pairs.append((name, ai_name, media_type))
+    return pairs, unmatched, unknown
+
+
+def classify_audio_files(names):
+    """
+    Fichiers audio d'une catégorie : ``([(nom, is_real)], inconnus)``.
+    Le suffixe ``_AI`` désigne un audio généré.
+    """
+    entries, unknown = [], []
+    for name in sorted(names):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            unknown.append(name)
+            continue
+        entries.append((name, not AI_SUFFIX.search(stem)))
+    return entries, unknown
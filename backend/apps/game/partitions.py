@@ -0,0 +1,338 @@
+"""
+Partitionnement mensuel des sessions et des réponses (PostgreSQL).
+
+``game_gamesession`` et ``game_gameanswer`` sont partitionnées par intervalle
+sur ``created_at`` : une partition par mois UTC (``<table>_pAAAA_MM``) et une
+partition par défaut (``<table>_default``) pour les lignes hors des mois
+créés. La migration 0017 convertit les tables existantes (avec sa propre
+copie du DDL), ``manage_partitions`` crée les mois à venir (``--check`` en
+vérifie la structure) et ``archive_partitions`` exporte puis supprime les
+mois anciens, après en avoir reporté les compteurs dans les agrégats que
+lisent le tableau de bord et le classement (voir rollups).
+
+Une table partitionnée n'accepte que des contraintes uniques incluant la clé
+de partition : la clé primaire devient ``(id, created_at)`` (``id`` reste
+tiré d'une séquence), ``session_key`` n'est qu'indexé et la clé étrangère des
+réponses vers les sessions n'est pas déclarée en base. Les index et les
+autres clés étrangères sont recréés à l'identique sur la table mère, qui les
+propage à chaque partition.
+
+Hors PostgreSQL (SQLite en développement), les tables restent ordinaires et
+ces fonctions ne font rien.
+"""
+import gzip
+import os
+import re
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLES = ('game_gamesession', 'game_gameanswer')
+EXPORT_FORMATS = ('csv', 'parquet')
+EXPORT_CHUNK_ROWS = 10000
+
+
+def is_supported(conn=connection):
+    return conn.vendor == 'postgresql'
+
+
+def month_start(value):
+    """Premier jour du mois (UTC) de ``value`` (date ou datetime)."""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """``[début, fin)`` du mois, en datetimes UTC."""
+    lower = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    upper_month = add_months(month, 1)
+    return lower, datetime(upper_month.year, upper_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition(table):
+    return f'{table}_default'
+
+
+def _literal(moment):
+    return f"'{moment.isoformat()}'"
+
+
+def _exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def partitions(cursor, table):
+    """Partitions mensuelles de ``table`` : ``[(mois, nom)]`` triés (sans la partition par défaut)."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [table],
+    )
+    pattern = re.compile(rf'^{table}_p(\d{{4}})_(\d{{2}})$')
+    months = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            months.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(months)
+
+
+# ----------------------------------------------------------------------
+# Création des partitions
+# ----------------------------------------------------------------------
+
+def ensure_partitions(cursor, table, start, end):
+    """Crée les partitions mensuelles manquantes de ``start`` à ``end`` inclus ; nombre créé."""
+    existing = {month for month, _ in partitions(cursor, table)}
+    default = default_partition(table)
+    has_default = _exists(cursor, default)
+    created = 0
+    month = start
+    while month <= end:
+        if month not in existing:
+            _create_partition(cursor, table, month, default if has_default else None)
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+
+def _create_partition(cursor, table, month, default):
+    name = partition_name(table, month)
+    lower, upper = (_literal(bound) for bound in month_bounds(month))
+    create = f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ({lower}) TO ({upper})'
+    if default:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= {lower} AND created_at < {upper})'
+        )
+        if cursor.fetchone()[0]:
+            # Lignes du mois déjà reçues par la partition par défaut : la
+            # nouvelle partition ne peut être créée qu'une fois ces lignes sorties
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+            cursor.execute(create)
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE created_at >= {lower} '
+                f'AND created_at < {upper} RETURNING *) INSERT INTO {table} SELECT * FROM moved'
+            )
+            cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+            return
+    cursor.execute(create)
+
+
+def ensure_upcoming_partitions(months_ahead=None):
+    """
+    Mois courant et ``months_ahead`` suivants pour chaque table, plus les mois
+    des lignes tombées dans la partition par défaut ; ``{table: créées}``.
+    """
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    this_month = month_start(timezone.now())
+    created = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f'SELECT MIN(created_at) FROM {default_partition(table)}')
+            stray = cursor.fetchone()[0]
+            start = min(month_start(stray), this_month) if stray else this_month
+            created[table] = ensure_partitions(cursor, table, start, add_months(this_month, months_ahead))
+    return created
+
+
+# ----------------------------------------------------------------------
+# Vérification
+# ----------------------------------------------------------------------
+
+def _constraint_columns(cursor, table, contype):
+    """Colonnes (dans l'ordre) de chaque contrainte ``contype`` de ``table``."""
+    cursor.execute(
+        "SELECT array_agg(a.attname ORDER BY k.ord) FROM pg_constraint c "
+        "CROSS JOIN unnest(c.conkey) WITH ORDINALITY k(attnum, ord) "
+        "JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum "
+        "WHERE c.conrelid = to_regclass(%s) AND c.contype = %s GROUP BY c.oid",
+        [table, contype],
+    )
+    return {tuple(columns) for (columns,) in cursor.fetchall()}
+
+
+def _index_columns(cursor, table):
+    """Colonnes (dans l'ordre) de chaque index de ``table``."""
+    cursor.execute(
+        "SELECT array_agg(a.attname ORDER BY k.ord) FROM pg_index i "
+        "CROSS JOIN unnest(i.indkey) WITH ORDINALITY k(attnum, ord) "
+        "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum "
+        "WHERE i.indrelid = to_regclass(%s) GROUP BY i.indexrelid",
+        [table],
+    )
+    return {tuple(columns) for (columns,) in cursor.fetchall()}
+
+
+def _expected_indexes(model):
+    expected = {(field.column,) for field in model._meta.concrete_fields if field.db_index}
+    for index in model._meta.indexes:
+        expected.add(tuple(model._meta.get_field(name.lstrip('-')).column for name in index.fields))
+    return expected
+
+
+def structure_problems(months_ahead=None):
+    """
+    Écarts entre les tables partitionnées et ce qu'attendent les modèles et
+    ``manage_partitions`` : liste de messages, vide si tout est conforme.
+    """
+    from .models import GameAnswer, GameSession
+
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    models = {model._meta.db_table: model for model in (GameSession, GameAnswer)}
+    this_month = month_start(timezone.now())
+    problems = []
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            if not is_partitioned(cursor, table):
+                problems.append(f"{table} : table non partitionnée (migration 0017)")
+                continue
+            model = models[table]
+
+            primary_keys = _constraint_columns(cursor, table, 'p')
+            if primary_keys != {('id', 'created_at')}:
+                problems.append(f"{table} : clé primaire {sorted(primary_keys)} au lieu de (id, created_at)")
+
+            indexes = _index_columns(cursor, table)
+            for columns in sorted(_expected_indexes(model) - indexes):
+                problems.append(f"{table} : index manquant sur ({', '.join(columns)})")
+
+            foreign_keys = _constraint_columns(cursor, table, 'f')
+            for field in model._meta.concrete_fields:
+                if field.remote_field and field.db_constraint and (field.column,) not in foreign_keys:
+                    problems.append(f"{table} : clé étrangère manquante sur {field.column}")
+
+            sequence = f'{table}_id_seq'
+            if not _exists(cursor, sequence):
+                problems.append(f"{table} : séquence {sequence} absente")
+            else:
+                cursor.execute(f'SELECT last_value, is_called FROM {sequence}')
+                last_value, is_called = cursor.fetchone()
+                cursor.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+                max_id = cursor.fetchone()[0]
+                if (last_value if is_called else last_value - 1) < max_id:
+                    problems.append(f"{table} : séquence {sequence} en retard sur MAX(id) = {max_id}")
+
+            if not _exists(cursor, default_partition(table)):
+                problems.append(f"{table} : partition par défaut absente")
+            existing = {month for month, _ in partitions(cursor, table)}
+            for offset in range(months_ahead + 1):
+                month = add_months(this_month, offset)
+                if month not in existing:
+                    problems.append(f"{table} : partition {partition_name(table, month)} absente")
+    return problems
+
+
+# ----------------------------------------------------------------------
+# Archivage
+# ----------------------------------------------------------------------
+
+def default_format():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return 'csv'
+    return 'parquet'
+
+
+def archivable_months(cutoff):
+    """Mois antérieurs à ``cutoff`` ayant encore une partition."""
+    with connection.cursor() as cursor:
+        return sorted({
+            month for table in TABLES for month, _ in partitions(cursor, table) if month < cutoff
+        })
+
+
+def archive_month(month, directory, fmt='csv'):
+    """
+    Reporte le mois ``month`` dans les agrégats, exporte ses partitions dans
+    ``directory`` puis les supprime, dans une transaction ; retourne
+    ``[(partition, fichier, lignes)]``.
+    """
+    from .rollups import rollup_month
+
+    os.makedirs(directory, exist_ok=True)
+    exported = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        names = [partition_name(table, month) for table in TABLES]
+        names = [name for name in names if _exists(cursor, name)]
+        for name in names:
+            # Plus d'écriture dans le mois jusqu'à sa suppression
+            cursor.execute(f'LOCK TABLE {name} IN SHARE MODE')
+        rollup_month(month)
+        for name in names:
+            path, rows = export_partition(cursor, name, directory, fmt)
+            exported.append((name, path, rows))
+        for name in names:
+            cursor.execute(f'DROP TABLE {name}')
+    return exported
+
+
+def export_partition(cursor, name, directory, fmt):
+    """Écrit ``name`` dans ``directory`` (csv.gz ou parquet) ; ``(chemin, lignes)``."""
+    extension = 'csv.gz' if fmt == 'csv' else 'parquet'
+    path = os.path.join(directory, f'{name}.{extension}')
+    partial = f'{path}.part'
+    query = f'SELECT * FROM {name} ORDER BY id'
+    if fmt == 'csv':
+        with gzip.open(partial, 'wt', encoding='utf-8', newline='') as fh:
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', fh)
+        cursor.execute(f'SELECT COUNT(*) FROM {name}')
+        rows = cursor.fetchone()[0]
+    else:
+        rows = _write_parquet(cursor, query, partial)
+    with open(partial, 'rb') as fh:
+        os.fsync(fh.fileno())
+    os.replace(partial, path)
+    return path, rows
+
+
+def _write_parquet(cursor, query, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    cursor.execute(query)
+    columns = [column[0] for column in cursor.description]
+    writer = None
+    rows = 0
+    try:
+        while True:
+            chunk = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not chunk:
+                break
+            records = [
+                {column: str(value) if isinstance(value, uuid.UUID) else value for column, value in zip(columns, row)}
+                for row in chunk
+            ]
+            table = pa.Table.from_pylist(records, schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+            rows += len(chunk)
+        if writer is None:
+            pq.write_table(pa.table({column: [] for column in columns}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
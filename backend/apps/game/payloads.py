@@ -0,0 +1,139 @@
+"""
+Sérialisation rapide des paires : fonctions simples qui construisent les
+dictionnaires de réponse directement, sans champs DRF.
+
+Le préfixe des URLs média (schéma et hôte de la requête, port nginx) est
+calculé une seule fois par requête avec ``media_base_url`` puis passé aux
+fonctions, au lieu d'être relu dans la requête pour chaque champ.
+"""
+from rest_framework.fields import DateTimeField
+
+from .imaging import derivative_urls
+from .metadata import layout_info
+from .waveform import peaks_url
+
+NGINX_PORT = 8080
+
+_datetime_field = DateTimeField()
+
+
+def media_base_url(request):
+    """Préfixe des URLs média servies par nginx, ou '' sans requête."""
+    if request is None:
+        return ''
+    hostname = request.get_host().split(':')[0]
+    return f"{request.scheme}://{hostname}:{NGINX_PORT}"
+
+
+def absolute_url(base, url):
+    """Rend absolue une URL de stockage relative (``/media/...``)."""
+    if url and url.startswith('/'):
+        return base + url
+    return url
+
+
+def field_url(base, media_field):
+    """URL absolue d'un fichier, ou None s'il n'y en a pas."""
+    if not media_field:
+        return None
+    return absolute_url(base, media_field.url)
+
+
+def srcset(base, pair, side):
+    """Dérivés responsives d'un côté ('real' ou 'ai') : [{url, width}]."""
+    return [
+        {'url': absolute_url(base, v['url']), 'width': v['width']}
+        for v in derivative_urls(pair, side)
+    ]
+
+
+def category_payload(category):
+    if category is None:
+        return None
+    return {'id': category.id, 'name': category.name, 'description': category.description}
+
+
+def game_pair_payload(pair, base, position='left', reveal_answer=False):
+    """
+    Paire pendant le jeu (sans révéler le côté réel). ``position`` est le
+    côté ('left' ou 'right') où est affiché le média réel.
+    """
+    data = {
+        'id': pair.id,
+        'category': category_payload(pair.category),
+        'media_type': pair.media_type,
+        'difficulty': pair.difficulty,
+        'left_media': None,
+        'right_media': None,
+        'left_srcset': [],
+        'right_srcset': [],
+        'audio_media': None,
+        'audio_peaks': None,
+        'left_info': None,
+        'right_info': None,
+        'audio_info': None,
+        'real_position': None,
+        'is_real': None,
+    }
+
+    if pair.media_type == 'audio':
+        url = peaks_url(pair)
+        data['audio_media'] = field_url(base, pair.audio_media)
+        data['audio_peaks'] = absolute_url(base, url) if url else None
+        data['audio_info'] = layout_info(pair, 'audio')
+        if reveal_answer:
+            data['is_real'] = pair.is_real
+            data['real_position'] = 'real' if pair.is_real else 'ai'
+        return data
+
+    left, right = ('real', 'ai') if position == 'left' else ('ai', 'real')
+    data['left_media'] = field_url(base, getattr(pair, f'{left}_media'))
+    data['right_media'] = field_url(base, getattr(pair, f'{right}_media'))
+    data['left_info'] = layout_info(pair, left)
+    data['right_info'] = layout_info(pair, right)
+    if pair.media_type == 'image':
+        data['left_srcset'] = srcset(base, pair, left)
+        data['right_srcset'] = srcset(base, pair, right)
+    if reveal_answer:
+        data['real_position'] = position
+    return data
+
+
+def game_pairs_payload(base, pairs, positions, reveal_answer=False):
+    """Liste des paires d'une session ; ``positions`` = {id: côté du média réel}."""
+    return [
+        game_pair_payload(pair, base, positions.get(pair.id, 'left'), reveal_answer)
+        for pair in pairs
+    ]
+
+
+def pair_stats_payload(pair):
+    """Statistiques globales d'une paire (zéros si elle n'a jamais été jouée)."""
+    stats = getattr(pair, 'global_stats', None)
+    if stats is None:
+        return {'total_attempts': 0, 'correct_answers': 0, 'success_rate': 0}
+    return {
+        'total_attempts': stats.total_attempts,
+        'correct_answers': stats.correct_answers,
+        'success_rate': stats.success_rate,
+    }
+
+
+def admin_pair_payload(pair, base):
+    """Paire dans l'admin : fichiers, côté réel et statistiques."""
+    return {
+        'id': pair.id,
+        'category': pair.category_id,
+        'category_name': pair.category.name,
+        'real_media': field_url(base, pair.real_media),
+        'ai_media': field_url(base, pair.ai_media),
+        'audio_media': field_url(base, pair.audio_media),
+        'is_real': pair.is_real,
+        'media_type': pair.media_type,
+        'difficulty': pair.difficulty,
+        'hint': pair.hint,
+        'is_active': pair.is_active,
+        'stats': pair_stats_payload(pair),
+        'media_info': pair.media_info,
+        'created_at': _datetime_field.to_representation(pair.created_at),
+    }
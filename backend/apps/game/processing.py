@@ -0,0 +1,34 @@
+"""
+Post-traitement des fichiers d'une paire après upload ou ingestion.
+"""
+from .imaging import generate_pair_derivatives, remove_pair_derivatives
+from .metadata import extract_pair_metadata
+from .mp4 import faststart_pair
+from .pair_cards import pair_cards
+from .waveform import generate_pair_peaks
+
+
+def process_pair_media(pair, derivatives=True, metadata=True):
+    """
+    Prépare les fichiers d'une paire pour le jeu : faststart des vidéos,
+    métadonnées des fichiers, dérivés WebP des images, pics de forme d'onde
+    des audios.
+    """
+    try:
+        faststart_pair(pair)
+        if metadata:
+            # Après faststart : taille et empreinte du fichier final
+            extract_pair_metadata(pair)
+        if not derivatives:
+            return
+        if pair.media_type == 'image':
+            generate_pair_derivatives(pair)
+        elif pair.media_type == 'audio':
+            generate_pair_peaks(pair)
+        elif pair.derivatives:
+            remove_pair_derivatives(pair)
+            pair.derivatives = {}
+            type(pair).objects.filter(pk=pair.pk).update(derivatives={})
+    finally:
+        # Fichiers, métadonnées et dérivés écrits par update() : sans signal
+        pair_cards.invalidate()
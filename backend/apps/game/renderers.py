@@ -0,0 +1,53 @@
+"""
+Rendu et lecture JSON rapides pour DRF, avec orjson quand il est installé.
+
+``FastJSONRenderer`` produit la même sortie que ``JSONRenderer`` (compacte,
+UTF-8, dates et types DRF convertis par l'encodeur de DRF) ; sans orjson, ou
+quand une indentation est demandée (API navigable), il délègue à DRF.
+``FastJSONParser`` fait de même pour la lecture des corps JSON.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+# Dates, décimaux, UUID, querysets, chaînes paresseuses : convertis comme DRF
+_drf_default = JSONEncoder().default
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer sérialisé par orjson."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        # Comme DRF : U+2028/U+2029 échappés pour pouvoir inclure le JSON dans du JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser lu par orjson (corps en UTF-8)."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,156 @@
+"""
+Cache côté serveur des réponses de l'API qui changent rarement (liste des
+catégories, classement, détail d'une room terminée).
+
+Les entrées sont rangées dans le cache Django (Redis en production, locmem en
+développement) sous ``resp:<sujet>:<génération>:<vue>:<paramètres>``, avec
+les paramètres déjà validés par la vue (``limit=10`` et une requête sans
+``limit`` partagent la même entrée). Chaque sujet a un numéro de génération ;
+l'invalider (signaux post_save/post_delete, voir models.py) le remplace par
+l'horloge, ce qui rend d'un coup obsolètes toutes ses entrées sans avoir à
+les énumérer. La lecture n'écrit rien (génération 0 tant qu'un sujet n'a pas
+été invalidé) : interroger des rooms inexistantes ne crée pas de clés, et une
+génération expire d'elle-même (``GENERATION_TIMEOUT``, bien plus long que la
+durée de vie des entrées). Les fiches de paires de chaque worker (voir
+pair_cards.py) suivent aussi une génération, celle du sujet ``PAIR_CARDS``.
+
+Anti-emballement : sur un défaut de cache, un seul calcul a lieu. Dans le
+processus, un verrou (réparti par clé) fait attendre les autres threads ; entre
+processus, un verrou ``cache.add`` fait attendre les autres workers, qui
+relisent le cache jusqu'à ce que le premier y ait écrit le résultat.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+DEFAULT_TIMEOUT = 300
+GENERATION_TIMEOUT = 24 * 3600
+LOCK_TIMEOUT = 10  # durée maximale d'un recalcul avant qu'un autre worker prenne la main
+WAIT_INTERVAL = 0.05
+
+# Sujets
+CATEGORIES = 'categories'
+LEADERBOARD = 'leaderboard'
+PAIR_CARDS = 'pair-cards'
+
+
+def room_topic(room_code):
+    return f'room:{room_code}'
+
+
+# Verrous du processus, répartis par hachage de la clé (nombre borné)
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def _local_lock(key):
+    return _local_locks[hash(key) % len(_local_locks)]
+
+
+def generation(topic):
+    """Génération courante de ``topic`` (0 s'il n'a jamais été invalidé)."""
+    return cache.get(f'resp:gen:{topic}', 0)
+
+
+async def ageneration(topic):
+    return await cache.aget(f'resp:gen:{topic}', 0)
+
+
+def _digest(params):
+    return hashlib.blake2s(params.encode(), digest_size=8).hexdigest()
+
+
+def cache_key(topic, view_name, params=''):
+    return f'resp:{topic}:{generation(topic)}:{view_name}:{_digest(params)}'
+
+
+async def acache_key(topic, view_name, params=''):
+    """Comme ``cache_key``, pour les vues asynchrones."""
+    return f'resp:{topic}:{await ageneration(topic)}:{view_name}:{_digest(params)}'
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    """Valeur en cache pour ``key``, sinon ``compute()`` exécuté une seule fois."""
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _local_lock(key):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            # Un autre worker recalcule : attendre son résultat
+            time.sleep(WAIT_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                break  # Verrou abandonné : calculer soi-même
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+    return value
+
+
+async def aget_or_compute(key, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Comme ``get_or_compute`` pour les vues asynchrones (``compute`` est une
+    coroutine) ; les coroutines du processus attendent comme les autres
+    workers, via le verrou ``cache.add``.
+    """
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT):
+        await asyncio.sleep(WAIT_INTERVAL)
+        value = await cache.aget(key)
+        if value is not None:
+            return value
+        if time.monotonic() > deadline:
+            break  # Verrou abandonné : calculer soi-même
+    try:
+        value = await compute()
+        await cache.aset(key, value, timeout)
+    finally:
+        await cache.adelete(lock_key)
+    return value
+
+
+def invalidate(*topics):
+    """Rend obsolètes les entrées des ``topics``, après le commit en cours."""
+    transaction.on_commit(lambda: invalidate_now(*topics))
+
+
+def invalidate_now(*topics):
+    """
+    Comme ``invalidate``, sans attendre de commit ; retourne ``{sujet:
+    génération}``. L'horloge ne repasse pas par une valeur déjà utilisée,
+    même après l'éviction ou l'expiration d'une génération.
+    """
+    generations = {topic: time.time_ns() for topic in topics}
+    cache.set_many(
+        {f'resp:gen:{topic}': generation for topic, generation in generations.items()},
+        timeout=GENERATION_TIMEOUT,
+    )
+    return generations
+
+
+def forget(*topics):
+    """
+    Efface la génération des ``topics`` supprimés (rooms purgées), après le
+    commit en cours : leurs entrées ne sont plus lues et expirent d'elles-mêmes,
+    une génération recréée plus tard repart de l'horloge.
+    """
+    transaction.on_commit(lambda: cache.delete_many([f'resp:gen:{topic}' for topic in topics]))
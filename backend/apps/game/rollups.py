@@ -0,0 +1,95 @@
+"""
+Agrégats des mois archivés (voir partitions).
+
+Avant de supprimer un mois de sessions et de réponses, ``rollup_month`` en
+reporte les compteurs du tableau de bord dans ``GameStatsRollup`` et les
+meilleures sessions dans ``LeaderboardArchive``. Le tableau de bord et le
+classement additionnent ces agrégats aux lignes encore en base : leurs
+résultats ne changent pas quand un mois est archivé (classement exact jusqu'à
+``LEADERBOARD_ARCHIVE_SIZE`` entrées).
+
+Les réponses sont comptées avec leur session : celles d'une session du mois
+archivé enregistrées le mois suivant sont comptées ici, puis ignorées une fois
+leur session supprimée.
+"""
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from . import response_cache
+from .versioning import LEADERBOARD, bump_version
+
+
+def rollup_month(month):
+    """Reporte les sessions créées pendant ``month`` dans les agrégats (rejouable)."""
+    from .models import GameAnswer, GameSession, GameStatsRollup, LeaderboardArchive
+    from .partitions import month_bounds
+
+    lower, upper = month_bounds(month)
+    sessions = GameSession.objects.filter(created_at__gte=lower, created_at__lt=upper)
+    counts = {
+        row['audience_type']: row
+        for row in sessions.values('audience_type').annotate(
+            total=Count('id'), completed=Count('id', filter=Q(is_completed=True)),
+        ).order_by()
+    }
+    answers = {
+        row['session__audience_type']: row
+        for row in GameAnswer.objects.filter(
+            session__created_at__gte=lower, session__created_at__lt=upper, session__is_completed=True,
+        ).values('session__audience_type').annotate(
+            total=Count('id'), correct=Count('id', filter=Q(is_correct=True)),
+        ).order_by()
+    }
+    for audience in counts:
+        GameStatsRollup.objects.update_or_create(
+            month=month,
+            audience_type=audience,
+            defaults={
+                'sessions': counts[audience]['total'],
+                'completed_sessions': counts[audience]['completed'],
+                'answers': answers.get(audience, {}).get('total', 0),
+                'correct_answers': answers.get(audience, {}).get('correct', 0),
+            },
+        )
+
+    best = sessions.filter(is_completed=True, pseudo__isnull=False).exclude(pseudo='').order_by(
+        '-score', 'time_total_ms'
+    )[:settings.LEADERBOARD_ARCHIVE_SIZE]
+    LeaderboardArchive.objects.bulk_create(
+        [
+            LeaderboardArchive(
+                id=session.id,
+                pseudo=session.pseudo,
+                score=session.score,
+                streak_max=session.streak_max,
+                time_total_ms=session.time_total_ms,
+                audience_type=session.audience_type,
+                created_at=session.created_at,
+            )
+            for session in best
+        ],
+        ignore_conflicts=True,
+    )
+    bump_version(LEADERBOARD)
+    response_cache.invalidate(response_cache.LEADERBOARD)
+
+
+def merge_leaderboard(live, archived, limit):
+    """Les ``limit`` meilleures entrées de deux classements déjà triés."""
+    entries = sorted([*live, *archived], key=lambda entry: (-entry.score, entry.time_total_ms))
+    return entries[:limit]
+
+
+def archived_stats():
+    """Totaux des mois archivés par type d'audience."""
+    from .models import GameStatsRollup
+
+    return {
+        row['audience_type']: row
+        for row in GameStatsRollup.objects.values('audience_type').annotate(
+            sessions_total=Sum('sessions'),
+            completed_total=Sum('completed_sessions'),
+            answers_total=Sum('answers'),
+            correct_total=Sum('correct_answers'),
+        ).order_by()
+    }
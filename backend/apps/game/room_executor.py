@@ -0,0 +1,79 @@
+"""
+Exécution des opérations SQL du consumer multijoueur, par room.
+
+``database_sync_to_async`` exécute par défaut tout le code ORM du processus
+dans un seul thread (``thread_sensitive``) : toutes les rooms attendent
+derrière la même requête. L'ORM asynchrone de Django ne change rien ici, il
+repasse par ce même thread.
+
+Les opérations sont donc réparties sur ``MULTIPLAYER_DB_LANES`` files, chacune
+servie par son propre thread et donc sa propre connexion à la base (le
+« pool » est borné au nombre de files). Une room est toujours servie par la
+même file : ses opérations restent exécutées dans l'ordre, une à la fois,
+comme avant (ordre des réponses, bonus de position), pendant que les autres
+rooms avancent en parallèle. ``MULTIPLAYER_DB_LANES = 0`` revient au thread
+partagé de Channels.
+"""
+import functools
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_LANES = 4
+
+
+class RoomExecutor:
+    """Files d'exécution mono-thread, choisies par code de room."""
+
+    def __init__(self, lanes=DEFAULT_LANES):
+        self._lock = threading.Lock()
+        self._executors = []
+        self.configure(lanes)
+
+    @property
+    def lanes(self):
+        return len(self._executors)
+
+    def configure(self, lanes):
+        """(Re)crée ``lanes`` files ; les anciennes ferment leur connexion puis s'arrêtent."""
+        executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'room-db-{index}')
+            for index in range(max(0, lanes))
+        ]
+        with self._lock:
+            previous, self._executors = self._executors, executors
+        for executor in previous:
+            executor.submit(connections.close_all)
+            executor.shutdown(wait=False)
+
+    def executor_for(self, key):
+        """File de la room ``key`` (stable d'un processus à l'autre), ou None pour le thread partagé."""
+        executors = self._executors
+        if not executors:
+            return None
+        return executors[zlib.crc32(key.encode()) % len(executors)]
+
+    async def run(self, key, func, *args, **kwargs):
+        executor = self.executor_for(key)
+        if executor is None:
+            return await database_sync_to_async(func)(*args, **kwargs)
+        # Comme database_sync_to_async : connexions périmées fermées avant et après
+        return await database_sync_to_async(func, thread_sensitive=False, executor=executor)(*args, **kwargs)
+
+
+room_executor = RoomExecutor(getattr(settings, 'MULTIPLAYER_DB_LANES', DEFAULT_LANES))
+
+
+def room_sync_to_async(method):
+    """
+    Remplace ``@database_sync_to_async`` sur les méthodes du consumer :
+    la méthode s'exécute dans la file de ``self.room_code``.
+    """
+    @functools.wraps(method)
+    async def wrapper(consumer, *args, **kwargs):
+        return await room_executor.run(consumer.room_code, method, consumer, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,149 @@
+"""
+Cycle de vie des rooms multijoueur : archivage puis suppression.
+
+Une room expire :
+  - terminée depuis plus de ``ROOM_FINISHED_TTL_HOURS`` heures ;
+  - abandonnée (en attente ou en cours, l'hôte est parti) sans activité de la
+    room ni de ses joueurs depuis ``ROOM_ABANDONED_TTL_HOURS`` heures.
+
+``purge_expired_rooms`` les traite par lots bornés. Pour chaque lot, un
+résumé par room (``RoomArchive`` : classement, nombre de questions et de
+réponses) est écrit, puis réponses, joueurs, paires tirées et rooms sont
+effacés par des DELETE directs (``_raw_delete``) : ni chargement des lignes,
+ni Collector, ni signaux. Ce que le signal de MultiplayerRoom aurait fait est
+refait après le commit : la génération de cache des rooms (détail, état
+partagé) est effacée et leurs groupes de channel layer sont fermés.
+
+Les rooms verrouillées par un consumer (réponse en cours) sont sautées et
+reprises au passage suivant.
+"""
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import response_cache
+
+DEFAULT_BATCH_SIZE = 200
+
+
+def expired_rooms(now=None):
+    """Rooms terminées ou abandonnées au-delà de leur durée de vie."""
+    from .models import MultiplayerPlayer, MultiplayerRoom
+
+    now = now or timezone.now()
+    finished_cutoff = now - timedelta(hours=settings.ROOM_FINISHED_TTL_HOURS)
+    abandoned_cutoff = now - timedelta(hours=settings.ROOM_ABANDONED_TTL_HOURS)
+    recent_players = MultiplayerPlayer.objects.filter(room=OuterRef('pk'), last_seen__gte=abandoned_cutoff)
+    finished = MultiplayerRoom.RoomStatus.FINISHED
+    return MultiplayerRoom.objects.filter(
+        Q(status=finished, updated_at__lt=finished_cutoff)
+        | (~Q(status=finished) & Q(updated_at__lt=abandoned_cutoff) & ~Exists(recent_players))
+    )
+
+
+def purge_expired_rooms(batch_size=DEFAULT_BATCH_SIZE, max_batches=None, now=None):
+    """Archive et supprime les rooms expirées, ``batch_size`` par transaction ; nombre supprimé."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        purged = purge_batch(batch_size, now)
+        if not purged:
+            break
+        total += purged
+        batches += 1
+    return total
+
+
+def purge_batch(batch_size, now=None):
+    """Un lot de rooms expirées : archivage et suppression dans une transaction."""
+    from .models import MultiplayerAnswer, MultiplayerPlayer, MultiplayerRoom, RoomArchive
+
+    with transaction.atomic():
+        rooms = list(
+            expired_rooms(now).select_for_update(skip_locked=True).order_by('id')[:batch_size]
+        )
+        if not rooms:
+            return 0
+        room_ids = [room.id for room in rooms]
+
+        players = {room_id: [] for room_id in room_ids}
+        for player in MultiplayerPlayer.objects.filter(room_id__in=room_ids).annotate(
+            answer_count=Count('answers'),
+            correct_count=Count('answers', filter=Q(answers__is_correct=True)),
+        ).order_by('-score', 'joined_at').values(
+            'room_id', 'pseudo', 'score', 'channel_name', 'last_seen', 'answer_count', 'correct_count',
+        ):
+            players[player['room_id']].append(player)
+        Pairs = MultiplayerRoom.pairs.through
+        questions = dict(
+            Pairs.objects.filter(multiplayerroom_id__in=room_ids)
+            .values_list('multiplayerroom_id').annotate(total=Count('id'))
+        )
+
+        RoomArchive.objects.bulk_create([archive(room, players[room.id], questions.get(room.id, 0)) for room in rooms])
+
+        for queryset in (
+            MultiplayerAnswer.objects.filter(player__room_id__in=room_ids),
+            MultiplayerPlayer.objects.filter(room_id__in=room_ids),
+            Pairs.objects.filter(multiplayerroom_id__in=room_ids),
+            MultiplayerRoom.objects.filter(id__in=room_ids),
+        ):
+            queryset._raw_delete(queryset.db)
+
+        response_cache.forget(*(response_cache.room_topic(room.room_code) for room in rooms))
+        channels = {
+            room.room_code: [p['channel_name'] for p in players[room.id] if p['channel_name']]
+            for room in rooms
+        }
+        transaction.on_commit(lambda: close_room_groups(channels))
+    return len(rooms)
+
+
+def archive(room, players, question_count):
+    from .models import MultiplayerRoom, RoomArchive
+
+    last_seen = max((p['last_seen'] for p in players), default=room.updated_at)
+    return RoomArchive(
+        room_code=room.room_code,
+        status=room.status,
+        reason=(
+            RoomArchive.Reason.FINISHED if room.status == MultiplayerRoom.RoomStatus.FINISHED
+            else RoomArchive.Reason.ABANDONED
+        ),
+        question_count=question_count,
+        player_count=len(players),
+        answer_count=sum(p['answer_count'] for p in players),
+        players=[
+            {'pseudo': p['pseudo'], 'score': p['score'], 'answers': p['answer_count'], 'correct': p['correct_count']}
+            for p in players
+        ],
+        created_at=room.created_at,
+        last_activity_at=max(room.updated_at, last_seen),
+    )
+
+
+def close_room_groups(channels):
+    """
+    Ferme les connexions encore ouvertes des rooms ``{code: [channels]}`` et
+    retire des groupes les canaux connus des joueurs (ceux d'un worker arrêté
+    n'ont plus de consumer pour le faire).
+    """
+    from .consumers import room_group
+
+    layer = get_channel_layer()
+    if layer is None:
+        return
+
+    async def close():
+        for room_code, names in channels.items():
+            group = room_group(room_code)
+            await layer.group_send(group, {'type': 'room_closed'})
+            for name in names:
+                await layer.group_discard(group, name)
+
+    async_to_sync(close)()
@@ -0,0 +1,88 @@
+"""
+État d'une room multijoueur partagé par les workers ASGI.
+
+Avec plusieurs workers, l'hôte et les joueurs d'une même room sont connectés à
+des processus différents : rien de la room ne doit vivre dans la mémoire d'un
+worker. Chaque message WebSocket relit donc l'état de la room (statut,
+question courante, positions de l'IA, paires tirées) ; cet instantané est
+rangé dans le cache partagé (Redis) sous la génération du sujet
+``room:<code>`` de response_cache, que le signal post_save de
+MultiplayerRoom incrémente après commit. Une écriture dans n'importe quel
+worker rend donc l'instantané obsolète pour tous.
+
+Les écritures qui dépendent de l'état (réponse, question suivante, départ)
+ne lisent pas ce cache : elles verrouillent la ligne de la room
+(``locked``) et relisent la base, ce qui les sérialise entre workers.
+"""
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+
+from . import response_cache
+
+STATE_TIMEOUT = 3600
+
+
+@dataclass(frozen=True)
+class RoomState:
+    """Instantané immuable d'une room."""
+    id: int
+    room_code: str
+    status: str
+    current_pair_index: int
+    ai_positions: dict = field(default_factory=dict)
+    pair_ids: tuple = ()  # triés par id : ordre des questions
+
+    @classmethod
+    def from_room(cls, room):
+        return cls(
+            id=room.id,
+            room_code=room.room_code,
+            status=room.status,
+            current_pair_index=room.current_pair_index,
+            ai_positions=dict(room.ai_positions or {}),
+            pair_ids=tuple(room.pairs.order_by('id').values_list('id', flat=True)),
+        )
+
+    @property
+    def total_questions(self):
+        return len(self.pair_ids)
+
+    @property
+    def current_pair_id(self):
+        if self.current_pair_index >= len(self.pair_ids):
+            return None
+        return self.pair_ids[self.current_pair_index]
+
+    def ai_position(self, pair_id):
+        # Default to 'right' if ai_position is not set (AI on right, real on left)
+        return self.ai_positions.get(str(pair_id), 'right')
+
+
+def load(room_code):
+    """État de la room ``room_code`` (cache partagé, sinon base), ou None."""
+    from .models import MultiplayerRoom
+
+    # Clé calculée avant la lecture : une écriture concurrente change la
+    # génération, l'instantané lu avant elle ne sera plus jamais servi
+    key = response_cache.cache_key(response_cache.room_topic(room_code), 'room-state')
+    state = cache.get(key)
+    if state is not None:
+        return state
+    room = MultiplayerRoom.objects.filter(room_code=room_code).first()
+    if room is None:
+        return None
+    state = RoomState.from_room(room)
+    cache.set(key, state, STATE_TIMEOUT)
+    return state
+
+
+def locked(room_code):
+    """
+    (room verrouillée, état relu en base) dans la transaction en cours ; le
+    verrou est tenu jusqu'au commit. Lève MultiplayerRoom.DoesNotExist.
+    """
+    from .models import MultiplayerRoom
+
+    room = MultiplayerRoom.objects.select_for_update().get(room_code=room_code)
+    return room, RoomState.from_room(room)
@@ -0,0 +1,123 @@
+"""
+Correction, calcul des points et enregistrement d'une réponse solo, partagés
+par la vue synchrone (DRF) et la vue asynchrone de réponse.
+"""
+from django.db import transaction
+from django.db.models import F
+
+
+class AlreadyAnswered(Exception):
+    """La session a déjà une réponse pour cette paire."""
+
+
+def check_answer(card, choice, real_position='left'):
+    """
+    (is_correct, ai_position) pour le choix du joueur sur la fiche ``card``.
+    Le joueur doit trouver le média IA ; ``real_position`` est le côté du média
+    réel (image/vidéo).
+    """
+    if card.media_type == 'audio':
+        # For audio: choice is 'real' or 'ai', compare with pair.is_real
+        is_correct = (
+            (choice == 'real' and card.is_real is True) or
+            (choice == 'ai' and card.is_real is False)
+        )
+        return is_correct, card.ai_position(None)
+    # For image/video: AI position is the opposite of real position
+    ai_position = card.ai_position(real_position)
+    return choice == ai_position, ai_position
+
+
+def apply_answer(session, is_correct, response_time_ms):
+    """Met à jour série, score et temps de ``session`` ; retourne les points gagnés."""
+    base_points = 100 if is_correct else 0
+    streak_bonus = 0
+    time_bonus = 0
+
+    if is_correct:
+        # Streak bonus: +10 per consecutive correct, max +50
+        session.current_streak += 1
+        streak_bonus = min(session.current_streak * 10, 50)
+
+        # Time bonus: up to 50 points if answered within 5 seconds
+        if response_time_ms < 5000:
+            time_bonus = int((5000 - response_time_ms) / 100)
+
+        if session.current_streak > session.streak_max:
+            session.streak_max = session.current_streak
+    else:
+        session.current_streak = 0
+
+    points_earned = base_points + streak_bonus + time_bonus
+    session.score += points_earned
+    session.time_total_ms += response_time_ms
+    return points_earned
+
+
+def record_answer(session, card, is_correct, response_time_ms):
+    """
+    Calcule les points et enregistre la réponse, les statistiques globales de
+    la paire et la session (terminée à la dernière réponse).
+
+    La session est relue sous verrou : deux réponses simultanées sont
+    appliquées l'une après l'autre (ordre, série, score), et une paire déjà
+    répondue est refusée sous ce même verrou. La table partitionnée ne peut
+    pas porter la contrainte unique (session, paire), qui devrait inclure la
+    clé de partition. Retourne ``(session à jour, points gagnés, statistiques
+    à jour)`` ; lève GameSession.DoesNotExist si la session a été terminée
+    entre-temps, AlreadyAnswered si la paire a déjà une réponse.
+    """
+    from .models import GameAnswer, GameSession, GlobalStats
+
+    with transaction.atomic():
+        session = GameSession.objects.select_for_update().get(pk=session.pk, is_completed=False)
+        if session.answers.filter(media_pair_id=card.id).exists():
+            raise AlreadyAnswered
+        points_earned = apply_answer(session, is_correct, response_time_ms)
+
+        # Get current answer count for order
+        current_order = session.answers.count() + 1
+
+        # Create answer record
+        GameAnswer.objects.create(
+            session=session,
+            media_pair_id=card.id,
+            is_correct=is_correct,
+            response_time_ms=response_time_ms,
+            order=current_order,
+            points_earned=points_earned,
+        )
+
+        # Update global stats
+        global_stats, created = GlobalStats.objects.get_or_create(media_pair_id=card.id)
+        global_stats.total_attempts = F('total_attempts') + 1
+        if is_correct:
+            global_stats.correct_answers = F('correct_answers') + 1
+        global_stats.save()
+
+        # Check if session is complete
+        if current_order >= session.total_pairs:
+            session.is_completed = True
+
+        session.save()
+
+    # Get fresh global stats for response
+    global_stats.refresh_from_db()
+    return session, points_earned, global_stats
+
+
+def answer_payload(card, session, is_correct, ai_position, points_earned, global_stats):
+    """Corps de la réponse à une réponse du joueur."""
+    return {
+        'is_correct': is_correct,
+        'hint': card.hint,
+        'ai_position': ai_position,
+        'points_earned': points_earned,
+        'current_streak': session.current_streak,
+        'total_score': session.score,
+        'global_stats': {
+            'total_attempts': global_stats.total_attempts,
+            'success_rate': global_stats.success_rate,
+        },
+        'is_session_complete': session.is_completed,
+    }
@@ -5,87 +5,12 @@ from rest_framework import serializers
 from .models import Category, MediaPair, GameSession, GameAnswer, GlobalStats
 
 
-def build_media_url(request, media_field):
-    """Construit une URL média via nginx (port 8080)."""
-    if not media_field:
-        return None
-    url = media_field.url
-    if url.startswith('/'):
-        scheme = request.scheme
-        host = request.get_host()
-        hostname = host.split(':')[0] if ':' in host else host
-        return f"{scheme}://{hostname}:8080{url}"
-    return url
-
-
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description']
 
 
-class MediaPairGameSerializer(serializers.ModelSerializer):
-    """Serializer for media pairs during gameplay (hides which is real)."""
-    category = CategorySerializer(read_only=True)
-    left_media = serializers.SerializerMethodField()
-    right_media = serializers.SerializerMethodField()
-    audio_media = serializers.SerializerMethodField()
-    real_position = serializers.SerializerMethodField()
-    is_real = serializers.SerializerMethodField()
-
-    class Meta:
-        model = MediaPair
-        fields = ['id', 'category', 'media_type', 'difficulty', 'left_media', 'right_media', 'audio_media', 'real_position', 'is_real']
-
-    def get_left_media(self, obj):
-        """For image/video: left media (real or AI depending on position)."""
-        if obj.media_type == 'audio':
-            return None
-        request = self.context.get('request')
-        positions = self.context.get('positions', {})
-        pos = positions.get(obj.id, 'left')
-        
-        if pos == 'left':
-            return build_media_url(request, obj.real_media)
-        return build_media_url(request, obj.ai_media)
-
-    def get_right_media(self, obj):
-        """For image/video: right media (real or AI depending on position)."""
-        if obj.media_type == 'audio':
-            return None
-        request = self.context.get('request')
-        positions = self.context.get('positions', {})
-        pos = positions.get(obj.id, 'left')
-        
-        if pos == 'right':
-            return build_media_url(request, obj.real_media)
-        return build_media_url(request, obj.ai_media)
-
-    def get_audio_media(self, obj):
-        """For audio: the audio file URL."""
-        if obj.media_type != 'audio':
-            return None
-        request = self.context.get('request')
-        return build_media_url(request, obj.audio_media)
-
-    def get_is_real(self, obj):
-        """For audio: whether it's real (only revealed after answer)."""
-        if obj.media_type != 'audio':
-            return None
-        if self.context.get('reveal_answer'):
-            return obj.is_real
-        return None
-
-    def get_real_position(self, obj):
-        """Only included in response after answer is submitted."""
-        if self.context.get('reveal_answer'):
-            if obj.media_type == 'audio':
-                return 'real' if obj.is_real else 'ai'
-            positions = self.context.get('positions', {})
-            return positions.get(obj.id, 'left')
-        return None
-
-
 class GameSessionCreateSerializer(serializers.Serializer):
     """Serializer for creating a new game session."""
     audience_type = serializers.ChoiceField(
@@ -0,0 +1,152 @@
+"""
+Stockage adressé par le contenu pour les médias uploadés.
+
+Chaque fichier est rangé sous ``cas/<aa>/<bb>/<sha256><ext>`` : une URL ne
+désigne jamais deux contenus différents, ce qui rend correct le cache
+``immutable`` de nginx, et deux uploads identiques partagent un seul fichier.
+L'index ``MediaBlob`` compte les références ; le fichier n'est supprimé du
+disque que lorsque la dernière référence est libérée, après le commit de la
+transaction qui l'a libérée. La ligne de l'index est verrouillée pendant qu'un
+upload réutilise le fichier ou qu'il est effacé : les deux ne se croisent pas.
+
+Les chemins hérités (fichiers déposés dans media/pairs/ et ingérés par
+populate_pairs) restent servis et supprimés comme avec FileSystemStorage.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+CAS_PREFIX = 'cas/'
+CAS_TMP_DIR = f'{CAS_PREFIX}tmp'
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(CAS_PREFIX)
+
+
+def content_addressed_name(digest, original_name):
+    ext = posixpath.splitext(original_name)[1].lower()
+    return f'{CAS_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage qui nomme les fichiers par leur empreinte SHA-256."""
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom final dépend du contenu : pas de suffixe anti-collision
+        return name
+
+    def _save(self, name, content):
+        tmp_dir = self.path(CAS_TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            return self._commit(tmp_path, digest.hexdigest(), size, name)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def adopt(self, path, name):
+        """
+        Range sous son empreinte un fichier déjà écrit sur le même disque
+        (upload par morceaux) : une lecture pour le hachage, puis un simple
+        renommage, sans recopie.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        return self._commit(path, digest.hexdigest(), size, name)
+
+    def _commit(self, tmp_path, digest, size, name):
+        """Déplace ``tmp_path`` vers son nom final (ou le dédoublonne) et le référence."""
+        final_name = content_addressed_name(digest, name)
+        final_path = self.path(final_name)
+        with transaction.atomic():
+            # Référence d'abord : la ligne reste verrouillée jusqu'au commit,
+            # le fichier ne peut plus être effacé pendant qu'on le réutilise.
+            self.retain(final_name, digest, size)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)  # Contenu déjà stocké : dédupliqué
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(final_path, self.file_permissions_mode)
+        return final_name
+
+    def retain(self, name, sha256, size):
+        """Ajoute une référence au fichier ``name`` dans l'index (ligne verrouillée)."""
+        from .models import MediaBlob
+
+        for _ in range(2):
+            with transaction.atomic():
+                blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+                if blob is not None:
+                    blob.ref_count = F('ref_count') + 1
+                    blob.save(update_fields=['ref_count'])
+                    return
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(name=name, sha256=sha256, size=size, ref_count=1)
+                return
+            except IntegrityError:
+                continue  # Créé en parallèle : réessayer l'incrément
+
+    def release(self, name):
+        """
+        Retire une référence ; retourne True si plus rien ne référence le fichier.
+
+        La dernière référence laisse la ligne à zéro : le fichier est effacé
+        après le commit, et seulement si aucun upload ne l'a repris entre-temps.
+        """
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.ref_count > 1:
+                blob.ref_count = F('ref_count') - 1
+                blob.save(update_fields=['ref_count'])
+                return False
+            if blob is not None:
+                blob.ref_count = 0
+                blob.save(update_fields=['ref_count'])
+            transaction.on_commit(lambda: self._remove_unreferenced(name), robust=True)
+            return True
+
+    def _remove_unreferenced(self, name):
+        """Efface le fichier ``name`` et sa ligne d'index s'il n'a pas été repris."""
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.ref_count > 0:
+                return
+            super().delete(name)
+            if blob is not None:
+                blob.delete()
+
+    def delete(self, name):
+        if is_content_addressed(name):
+            self.release(name)
+            return
+        super().delete(name)
@@ -0,0 +1,470 @@
+"""
+Générateur de données synthétiques volumineuses.
+
+Utilisé par la commande generate_synthetic_data et par les benchmarks.
+Les lignes sont produites par lots avec des identifiants explicites, ce qui
+permet de les écrire soit avec ``bulk_create`` soit avec ``COPY`` (PostgreSQL)
+sans relire les identifiants générés ; les séquences sont recalées à la fin.
+"""
+import csv
+import io
+import json
+import os
+import random
+import string
+import uuid
+import wave
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, reset_queries, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    Category,
+    GameAnswer,
+    GameSession,
+    GlobalStats,
+    MediaPair,
+    MultiplayerAnswer,
+    MultiplayerPlayer,
+    MultiplayerRoom,
+)
+
+
+SHARED_MEDIA_DIR = 'pairs/synthetic'
+ROOM_CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def parse_weights(value):
+    """Parse ``"image=80,video=15,audio=5"`` en dictionnaire de poids."""
+    weights = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        key, _, weight = item.partition('=')
+        weights[key.strip()] = float(weight)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"Distribution invalide : {value}")
+    return weights
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """Désactive temporairement auto_now/auto_now_add pour conserver les dates générées."""
+    flags = [
+        (field, attr) for model in models for field in model._meta.concrete_fields
+        for attr in ('auto_now', 'auto_now_add') if getattr(field, attr, False)
+    ]
+    for field, attr in flags:
+        setattr(field, attr, False)
+    try:
+        yield
+    finally:
+        for field, attr in flags:
+            setattr(field, attr, True)
+
+
+class SyntheticDataGenerator:
+    """
+    Produit des catégories, paires, sessions, réponses, statistiques et rooms.
+
+    Toutes les valeurs aléatoires dérivent de ``seed`` et les dates sont
+    tirées dans les ``days`` jours précédant ``base_date`` (minuit UTC du jour
+    par défaut) : deux exécutions sur une base vide avec la même graine et la
+    même date de référence produisent les mêmes données.
+    """
+
+    def __init__(self, seed=42, batch_size=10000, use_copy=None, days=365, base_date=None, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = connection.vendor == 'postgresql'
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.days = days
+        if base_date is None:
+            base_date = timezone.now().date()
+        self.now = datetime.combine(base_date, time.min, tzinfo=dt_timezone.utc)
+        self.log = log or (lambda message: None)
+        self.touched_models = set()
+
+    # ------------------------------------------------------------------
+    # Écriture par lots
+    # ------------------------------------------------------------------
+
+    def next_id(self, model):
+        return (model.objects.aggregate(m=Max('pk'))['m'] or 0) + 1
+
+    def insert(self, model, fields, rows):
+        """Insère des tuples (dans l'ordre de ``fields``, noms d'attribut)."""
+        if not rows:
+            return
+        self.touched_models.add(model)
+        if self.use_copy:
+            self._copy(model, fields, rows)
+        else:
+            with preserve_timestamps(model):
+                model.objects.bulk_create(
+                    [model(**dict(zip(fields, row))) for row in rows],
+                    batch_size=self.batch_size,
+                )
+        reset_queries()
+
+    def _copy(self, model, fields, rows):
+        columns = [model._meta.get_field(name).column for name in fields]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([self._csv_value(value) for value in row])
+        buffer.seek(0)
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')".format(
+            connection.ops.quote_name(model._meta.db_table),
+            ', '.join(connection.ops.quote_name(c) for c in columns),
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return '\\N'
+        if value is True:
+            return 't'
+        if value is False:
+            return 'f'
+        if isinstance(value, dict):
+            return json.dumps(value)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def reset_sequences(self):
+        """Recale les séquences après des insertions à identifiants explicites."""
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.touched_models))
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def random_datetime(self):
+        return self.now - timedelta(seconds=self.rng.randint(0, self.days * 86400))
+
+    # ------------------------------------------------------------------
+    # Catalogue
+    # ------------------------------------------------------------------
+
+    def create_categories(self, count, prefix='Synthétique'):
+        existing = set(Category.objects.values_list('name', flat=True))
+        names = []
+        index = 1
+        while len(names) < count:
+            name = f'{prefix} {index}'
+            if name not in existing:
+                names.append(name)
+            index += 1
+        Category.objects.bulk_create([Category(name=name) for name in names])
+        categories = list(Category.objects.filter(name__in=names))
+        self.log(f"{len(categories)} catégories créées")
+        return categories
+
+    def create_pairs(self, count, categories, type_weights, difficulty_weights, placeholder_files=False):
+        """Crée `count` paires et retourne la liste de (id, media_type)."""
+        if not categories:
+            raise ValueError("Au moins une catégorie est nécessaire")
+        shared = None if placeholder_files else self.shared_media_files()
+        types, type_w = zip(*type_weights.items())
+        difficulties, difficulty_w = zip(*difficulty_weights.items())
+        fields = [
+            'id', 'category_id', 'real_media', 'ai_media', 'audio_media', 'is_real',
+            'media_type', 'difficulty', 'hint', 'is_active', 'created_at', 'derivatives', 'media_info',
+        ]
+        first_id = self.next_id(MediaPair)
+        pairs = []
+        rows = []
+        for offset in range(count):
+            pair_id = first_id + offset
+            category = self.rng.choice(categories)
+            media_type = self.rng.choices(types, type_w)[0]
+            difficulty = self.rng.choices(difficulties, difficulty_w)[0]
+            if placeholder_files:
+                paths = self.placeholder_media_files(pair_id, category, media_type)
+            else:
+                paths = shared[media_type]
+            is_real = (self.rng.random() < 0.5) if media_type == 'audio' else None
+            rows.append((
+                pair_id, category.id, paths[0], paths[1], paths[2], is_real,
+                media_type, difficulty, f'Indice synthétique #{pair_id}', True, self.random_datetime(), {}, {},
+            ))
+            pairs.append((pair_id, media_type))
+            if len(rows) >= self.batch_size:
+                self.insert(MediaPair, fields, rows)
+                rows = []
+        self.insert(MediaPair, fields, rows)
+        self.log(f"{count} paires créées")
+        return pairs
+
+    def shared_media_files(self):
+        """Crée (une fois) un fichier par type et retourne les chemins partagés."""
+        root = os.path.join(settings.MEDIA_ROOT, SHARED_MEDIA_DIR)
+        os.makedirs(root, exist_ok=True)
+        files = {
+            'real.jpg': self._jpeg_bytes, 'ai_AI.jpg': self._jpeg_bytes,
+            'real.mp4': self._mp4_bytes, 'ai_AI.mp4': self._mp4_bytes,
+            'audio.wav': self._wav_bytes,
+        }
+        for name, factory in files.items():
+            path = os.path.join(root, name)
+            if not os.path.exists(path):
+                with open(path, 'wb') as fh:
+                    fh.write(factory())
+        return {
+            'image': (f'{SHARED_MEDIA_DIR}/real.jpg', f'{SHARED_MEDIA_DIR}/ai_AI.jpg', None),
+            'video': (f'{SHARED_MEDIA_DIR}/real.mp4', f'{SHARED_MEDIA_DIR}/ai_AI.mp4', None),
+            'audio': (None, None, f'{SHARED_MEDIA_DIR}/audio.wav'),
+        }
+
+    def placeholder_media_files(self, pair_id, category, media_type):
+        """Écrit de petits fichiers propres à la paire, rangés comme les uploads."""
+        slug = category.get_slug()
+        name = f'synthetic_{pair_id}'
+        if media_type == 'audio':
+            audio = f'pairs/audio/{slug}/{name}.wav'
+            self._write(audio, self._wav_bytes())
+            return None, None, audio
+        ext, factory = ('mp4', self._mp4_bytes) if media_type == 'video' else ('jpg', self._jpeg_bytes)
+        real = f'pairs/real/{slug}/{name}.{ext}'
+        ai = f'pairs/ai/{slug}/{name}_AI.{ext}'
+        self._write(real, factory())
+        self._write(ai, factory())
+        return real, ai, None
+
+    @staticmethod
+    def _write(relative_path, data):
+        path = os.path.join(settings.MEDIA_ROOT, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+
+    def _jpeg_bytes(self):
+        from PIL import Image
+        buffer = io.BytesIO()
+        color = tuple(self.rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (64, 64), color).save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    @staticmethod
+    def _mp4_bytes():
+        # ftyp minimal : suffisant pour les références, pas pour la lecture
+        return b'\x00\x00\x00\x14ftypisom\x00\x00\x02\x00isom'
+
+    @staticmethod
+    def _wav_bytes():
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b'\x00\x00' * 8000)
+        return buffer.getvalue()
+
+    # ------------------------------------------------------------------
+    # Sessions solo
+    # ------------------------------------------------------------------
+
+    def create_sessions(self, count, pairs, answers_per_session=10, completed_ratio=0.9,
+                        named_ratio=0.5, correct_rate=0.6, audience_weights=None):
+        """
+        Crée `count` sessions et leurs réponses, en calculant score et séries
+        comme AnswerSubmitView. Retourne les compteurs par paire pour GlobalStats.
+        """
+        audience_weights = audience_weights or {'school': 50, 'public': 50}
+        audiences, audience_w = zip(*audience_weights.items())
+        pair_ids = [pair_id for pair_id, _ in pairs]
+        per_session = min(answers_per_session, len(pair_ids))
+        attempts = {}
+        corrects = {}
+
+        session_fields = [
+            'id', 'session_key', 'audience_type', 'pseudo', 'score', 'streak_max',
+            'current_streak', 'time_total_ms', 'total_pairs', 'is_completed', 'created_at',
+        ]
+        answer_fields = [
+            'id', 'session_id', 'media_pair_id', 'is_correct', 'response_time_ms',
+            'order', 'points_earned', 'created_at',
+        ]
+        session_id = self.next_id(GameSession)
+        answer_id = self.next_id(GameAnswer)
+        session_rows = []
+        answer_rows = []
+        total_answers = 0
+
+        for index in range(count):
+            created_at = self.random_datetime()
+            completed = self.rng.random() < completed_ratio
+            answered = per_session if completed else self.rng.randint(0, max(per_session - 1, 0))
+            score = streak = streak_max = time_total = 0
+            for order, pair_id in enumerate(self.rng.sample(pair_ids, answered), start=1):
+                is_correct = self.rng.random() < correct_rate
+                response_time = self.rng.randint(800, 15000)
+                points = 0
+                if is_correct:
+                    streak += 1
+                    streak_max = max(streak_max, streak)
+                    points = 100 + min(streak * 10, 50)
+                    if response_time < 5000:
+                        points += int((5000 - response_time) / 100)
+                    corrects[pair_id] = corrects.get(pair_id, 0) + 1
+                else:
+                    streak = 0
+                attempts[pair_id] = attempts.get(pair_id, 0) + 1
+                score += points
+                time_total += response_time
+                answer_rows.append((
+                    answer_id, session_id, pair_id, is_correct, response_time, order, points,
+                    created_at + timedelta(milliseconds=time_total),
+                ))
+                answer_id += 1
+            pseudo = f'joueur{index}' if completed and self.rng.random() < named_ratio else ''
+            session_rows.append((
+                session_id, uuid.UUID(int=self.rng.getrandbits(128), version=4),
+                self.rng.choices(audiences, audience_w)[0], pseudo, score, streak_max,
+                streak, time_total, per_session, completed, created_at,
+            ))
+            session_id += 1
+
+            if len(session_rows) >= self.batch_size or len(answer_rows) >= self.batch_size * 10:
+                total_answers += len(answer_rows)
+                self._flush_sessions(session_fields, session_rows, answer_fields, answer_rows)
+                session_rows, answer_rows = [], []
+                self.log(f"  {index + 1}/{count} sessions, {total_answers} réponses")
+
+        total_answers += len(answer_rows)
+        self._flush_sessions(session_fields, session_rows, answer_fields, answer_rows)
+        self.log(f"{count} sessions et {total_answers} réponses créées")
+        return attempts, corrects
+
+    def _flush_sessions(self, session_fields, session_rows, answer_fields, answer_rows):
+        with transaction.atomic():
+            self.insert(GameSession, session_fields, session_rows)
+            self.insert(GameAnswer, answer_fields, answer_rows)
+
+    def apply_global_stats(self, attempts, corrects):
+        """Ajoute les compteurs générés aux GlobalStats (création ou mise à jour)."""
+        existing = GlobalStats.objects.in_bulk(attempts.keys(), field_name='media_pair_id')
+        to_update = []
+        to_create = []
+        for pair_id, count in attempts.items():
+            stats = existing.get(pair_id)
+            if stats:
+                stats.total_attempts += count
+                stats.correct_answers += corrects.get(pair_id, 0)
+                to_update.append(stats)
+            else:
+                to_create.append(GlobalStats(
+                    media_pair_id=pair_id,
+                    total_attempts=count,
+                    correct_answers=corrects.get(pair_id, 0),
+                ))
+        GlobalStats.objects.bulk_create(to_create, batch_size=self.batch_size)
+        GlobalStats.objects.bulk_update(
+            to_update, ['total_attempts', 'correct_answers'], batch_size=self.batch_size
+        )
+        self.log(f"{len(to_create)} GlobalStats créées, {len(to_update)} mises à jour")
+
+    # ------------------------------------------------------------------
+    # Multijoueur
+    # ------------------------------------------------------------------
+
+    def create_rooms(self, count, pairs, players_per_room=25, pairs_per_room=10, correct_rate=0.6):
+        """Crée des rooms terminées avec leurs joueurs, paires et réponses."""
+        used_codes = set(MultiplayerRoom.objects.values_list('room_code', flat=True))
+        room_fields = ['id', 'room_code', 'status', 'current_pair_index', 'ai_positions', 'created_at', 'updated_at']
+        link_fields = ['id', 'multiplayerroom_id', 'mediapair_id']
+        player_fields = [
+            'id', 'room_id', 'pseudo', 'score', 'session_token', 'channel_name',
+            'is_connected', 'joined_at', 'last_seen',
+        ]
+        answer_fields = [
+            'id', 'player_id', 'media_pair_id', 'choice', 'is_correct', 'points_earned',
+            'response_time_ms', 'answer_order', 'created_at',
+        ]
+        Link = MultiplayerRoom.pairs.through
+        room_id = self.next_id(MultiplayerRoom)
+        link_id = self.next_id(Link)
+        player_id = self.next_id(MultiplayerPlayer)
+        answer_id = self.next_id(MultiplayerAnswer)
+        per_room = min(pairs_per_room, len(pairs))
+        batches = {'rooms': [], 'links': [], 'players': [], 'answers': []}
+        total_answers = 0
+
+        for index in range(count):
+            code = self._room_code(used_codes)
+            created_at = self.random_datetime()
+            room_pairs = self.rng.sample(pairs, per_room)
+            positions = {
+                str(pair_id): self.rng.choice(['left', 'right'])
+                for pair_id, media_type in room_pairs if media_type != 'audio'
+            }
+            batches['rooms'].append((
+                room_id, code, MultiplayerRoom.RoomStatus.FINISHED, per_room, positions,
+                created_at, created_at + timedelta(minutes=15),
+            ))
+            for pair_id, _ in room_pairs:
+                batches['links'].append((link_id, room_id, pair_id))
+                link_id += 1
+
+            room_players = list(range(player_id, player_id + players_per_room))
+            scores = dict.fromkeys(room_players, 0)
+            for pair_id, media_type in room_pairs:
+                correct_rank = 0
+                order = list(room_players)
+                self.rng.shuffle(order)
+                for answer_order, pid in enumerate(order, start=1):
+                    is_correct = self.rng.random() < correct_rate
+                    points = 0
+                    if is_correct:
+                        points = 100 + {0: 50, 1: 30, 2: 10}.get(correct_rank, 0)
+                        correct_rank += 1
+                    scores[pid] += points
+                    choice = self.rng.choice(['real', 'ai'] if media_type == 'audio' else ['left', 'right'])
+                    batches['answers'].append((
+                        answer_id, pid, pair_id, choice, is_correct, points,
+                        self.rng.randint(500, 20000), answer_order, created_at,
+                    ))
+                    answer_id += 1
+            for offset, pid in enumerate(room_players):
+                batches['players'].append((
+                    pid, room_id, f'eleve{offset + 1}', scores[pid],
+                    uuid.UUID(int=self.rng.getrandbits(128), version=4), '', False,
+                    created_at, created_at + timedelta(minutes=15),
+                ))
+            player_id += players_per_room
+            room_id += 1
+
+            if len(batches['answers']) >= self.batch_size * 10 or len(batches['rooms']) >= self.batch_size:
+                total_answers += len(batches['answers'])
+                self._flush_rooms(batches, room_fields, link_fields, player_fields, answer_fields)
+                self.log(f"  {index + 1}/{count} rooms")
+
+        total_answers += len(batches['answers'])
+        self._flush_rooms(batches, room_fields, link_fields, player_fields, answer_fields)
+        self.log(f"{count} rooms et {total_answers} réponses multijoueur créées")
+
+    def _flush_rooms(self, batches, room_fields, link_fields, player_fields, answer_fields):
+        with transaction.atomic():
+            self.insert(MultiplayerRoom, room_fields, batches['rooms'])
+            self.insert(MultiplayerRoom.pairs.through, link_fields, batches['links'])
+            self.insert(MultiplayerPlayer, player_fields, batches['players'])
+            self.insert(MultiplayerAnswer, answer_fields, batches['answers'])
+        for rows in batches.values():
+            rows.clear()
+
+    def _room_code(self, used_codes):
+        while True:
+            code = ''.join(self.rng.choices(ROOM_CODE_ALPHABET, k=6))
+            if code not in used_codes:
+                used_codes.add(code)
+                return code
@@ -0,0 +1,177 @@
+"""
+Uploads par morceaux, reprenables (à la manière de tus) :
+
+  1. création : nom et taille totale annoncés, ``MediaUpload`` créé ;
+  2. envoi : chaque morceau est ajouté à l'offset courant, que le client
+     peut relire après une coupure pour reprendre là où il s'est arrêté ;
+  3. finalisation : le fichier complet est rangé dans le stockage adressé
+     par contenu par un simple renommage, puis rattaché à un côté d'une paire.
+
+Les morceaux sont ajoutés au fichier partiel du répertoire temporaire du
+stockage (même disque que le fichier final) : pas de recopie à la
+finalisation.
+
+Sous ASGI (Daphne), le serveur lit tout le corps de la requête avant la vue :
+jusqu'à ``FILE_UPLOAD_MAX_MEMORY_SIZE`` (2,5 Mo par défaut) il reste en
+mémoire, au-delà il passe par un fichier temporaire et chaque octet est écrit
+deux fois. Une connexion coupée en cours de morceau annule la requête : le
+morceau est perdu en entier et renvoyé depuis le dernier offset enregistré.
+Les clients doivent donc envoyer des morceaux d'au plus
+``FILE_UPLOAD_MAX_MEMORY_SIZE``. Sous WSGI, le corps est lu au fil de l'eau et
+les octets reçus avant une coupure sont conservés.
+"""
+import fcntl
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .deletion import schedule_file_deletions
+from .processing import process_pair_media
+from .storage import CAS_TMP_DIR
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+WRITE_CHUNK_SIZE = 64 * 1024
+UPLOAD_SIDES = ('real', 'ai', 'audio')
+
+
+class UploadError(ValueError):
+    """Requête d'upload invalide."""
+
+
+class UploadOffsetMismatch(UploadError):
+    """L'offset annoncé par le client ne correspond pas à celui du serveur."""
+
+    def __init__(self, offset):
+        super().__init__(f"Offset attendu : {offset}")
+        self.offset = offset
+
+
+def upload_part_path(upload):
+    return default_storage.path(f'{CAS_TMP_DIR}/upload-{upload.pk}.part')
+
+
+def create_upload(filename, size):
+    """Ouvre un upload de ``size`` octets pour le fichier ``filename``."""
+    from .models import MediaUpload
+
+    max_bytes = getattr(settings, 'MEDIA_UPLOAD_MAX_BYTES', DEFAULT_MAX_BYTES)
+    if size <= 0 or size > max_bytes:
+        raise UploadError(f"Taille invalide (maximum {max_bytes} octets)")
+    upload = MediaUpload.objects.create(
+        filename=get_valid_filename(os.path.basename(filename)), size=size
+    )
+    path = upload_part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def append_chunk(upload_id, offset, stream, length):
+    """
+    Ajoute ``length`` octets lus dans ``stream`` à partir de ``offset`` ;
+    retourne l'upload à jour.
+
+    Deux envois concurrents du même upload sont sérialisés par un verrou sur
+    le fichier partiel, pas sur la ligne : la lecture de la requête ne bloque
+    pas la base. Le second envoi reçoit UploadOffsetMismatch.
+    """
+    from .models import MediaUpload
+
+    upload = MediaUpload.objects.get(pk=upload_id)
+    with open(upload_part_path(upload), 'r+b') as part:
+        try:
+            fcntl.flock(part.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadOffsetMismatch(upload.offset) from None  # Envoi déjà en cours
+        upload.refresh_from_db(fields=['offset'])
+        if offset != upload.offset:
+            raise UploadOffsetMismatch(upload.offset)
+        if offset + length > upload.size:
+            raise UploadError("Le morceau dépasse la taille annoncée")
+
+        remaining = length
+        # Écarte la fin d'un envoi interrompu non enregistré
+        part.truncate(offset)
+        part.seek(offset)
+        while remaining:
+            try:
+                chunk = stream.read(min(WRITE_CHUNK_SIZE, remaining))
+            except OSError:  # Connexion coupée (UnreadablePostError, WSGI)
+                break
+            if not chunk:
+                break
+            part.write(chunk)
+            remaining -= len(chunk)
+        part.flush()
+        os.fsync(part.fileno())
+
+        upload.offset = offset + length - remaining
+        if not MediaUpload.objects.filter(pk=upload.pk, offset=offset).update(
+            offset=upload.offset, updated_at=timezone.now()
+        ):
+            raise UploadError("Upload annulé pendant l'envoi")
+    return upload
+
+
+def finalize_upload(upload_id, pair, side):
+    """
+    Range le fichier complet dans le stockage et le rattache au côté ``side``
+    de ``pair`` ; l'ancien fichier de ce côté est mis en file de suppression.
+    """
+    from .models import MediaUpload, media_pairs_changed
+
+    if side not in UPLOAD_SIDES:
+        raise UploadError(f"Côté inconnu : {side}")
+
+    with transaction.atomic():
+        upload = MediaUpload.objects.select_for_update().get(pk=upload_id)
+        if not upload.is_complete:
+            raise UploadError(f"Upload incomplet ({upload.offset}/{upload.size} octets)")
+
+        path = upload_part_path(upload)
+        field = getattr(pair, f'{side}_media')
+        # Nom conforme à upload_to, pour les stockages sans adoption (hérités)
+        target = field.field.generate_filename(pair, upload.filename)
+        if hasattr(default_storage, 'adopt'):
+            name = default_storage.adopt(path, target)
+        else:
+            with open(path, 'rb') as fh:
+                name = default_storage.save(target, File(fh, name=upload.filename))
+            os.remove(path)
+
+        previous = field.name
+        field.name = name
+        type(pair).objects.filter(pk=pair.pk).update(**{f'{side}_media': name})
+        if previous:
+            schedule_file_deletions([previous], reason=f"MediaPair #{pair.pk} : fichier remplacé")
+        upload.delete()
+        transaction.on_commit(
+            lambda: media_pairs_changed.send(sender=type(pair), pair_ids=[pair.pk])
+        )
+    process_pair_media(pair)
+    return pair
+
+
+def abort_upload(upload):
+    """Abandonne un upload et efface les octets reçus."""
+    path = upload_part_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
+
+
+def purge_stale_uploads(hours):
+    """Abandonne les uploads sans envoi depuis plus de ``hours`` heures."""
+    from .models import MediaUpload
+
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = list(MediaUpload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        abort_upload(upload)
+    return len(stale)
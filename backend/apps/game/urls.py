@@ -1,17 +1,22 @@
 """
 URL patterns for the game API.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Endpoints chauds : vues asynchrones (GAME_ASYNC_VIEWS) ou vues DRF
+hot_views = async_views if settings.GAME_ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('sessions/', views.GameSessionView.as_view(), name='session-create'),
-    path('sessions/<uuid:session_key>/answer/', views.AnswerSubmitView.as_view(), name='answer-submit'),
+    path('sessions/', hot_views.GameSessionView.as_view(), name='session-create'),
+    path('sessions/<uuid:session_key>/manifest/', views.GameSessionManifestView.as_view(), name='session-manifest'),
+    path('sessions/<uuid:session_key>/answer/', hot_views.AnswerSubmitView.as_view(), name='answer-submit'),
     path('sessions/<uuid:session_key>/result/', views.GameResultView.as_view(), name='game-result'),
-    path('leaderboard/', views.LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/', hot_views.LeaderboardView.as_view(), name='leaderboard'),
     
     # Multiplayer / Live Mode
     path('multiplayer/rooms/', views.MultiplayerRoomCreateView.as_view(), name='multiplayer-room-create'),
-    path('multiplayer/rooms/<str:room_code>/', views.MultiplayerRoomDetailView.as_view(), name='multiplayer-room-detail'),
+    path('multiplayer/rooms/<str:room_code>/', hot_views.MultiplayerRoomDetailView.as_view(), name='multiplayer-room-detail'),
     path('local-ip/', views.LocalIPView.as_view(), name='local-ip'),
 ]
@@ -0,0 +1,95 @@
+"""
+Versions des données lues en boucle (kiosque, admin), pour des ETag sans
+hachage du corps de réponse.
+
+Chaque sujet a un compteur ``ChangeCounter`` incrémenté par les signaux des
+modèles concernés (voir models.py). Une vue calcule son ETag à partir des
+compteurs (une requête sur quelques lignes) et répond ``304 Not Modified``
+si le client a déjà cette version, sans exécuter de serializer.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# Paires et catégories : listes et fiches de l'admin
+PAIRS = 'pairs'
+# Sessions terminées avec un pseudo : classement
+LEADERBOARD = 'leaderboard'
+
+
+def bump_version(*names):
+    """Incrémente les compteurs ``names`` (dans la transaction en cours)."""
+    from .models import ChangeCounter
+
+    for name in names:
+        if ChangeCounter.objects.filter(name=name).update(value=F('value') + 1):
+            continue
+        try:
+            with transaction.atomic():
+                ChangeCounter.objects.create(name=name, value=1)
+        except IntegrityError:  # Créé en parallèle
+            ChangeCounter.objects.filter(name=name).update(value=F('value') + 1)
+
+
+def get_versions(*names):
+    """Valeurs courantes des compteurs, dans l'ordre de ``names`` (0 si absent)."""
+    from .models import ChangeCounter
+
+    values = dict(ChangeCounter.objects.filter(name__in=names).values_list('name', 'value'))
+    return [values.get(name, 0) for name in names]
+
+
+async def aget_versions(*names):
+    """Comme ``get_versions``, avec l'ORM asynchrone."""
+    from .models import ChangeCounter
+
+    values = {
+        name: value
+        async for name, value in ChangeCounter.objects.filter(name__in=names).values_list('name', 'value')
+    }
+    return [values.get(name, 0) for name in names]
+
+
+def make_etag(*parts):
+    return 'W/"%s"' % '-'.join(str(part) for part in parts)
+
+
+def etag_matches(request, etag):
+    """If-None-Match contient-il ``etag`` (comparaison faible) ?"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if '*' in tags:
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.removeprefix('W/') == opaque for tag in tags)
+
+
+def conditional_response(request, etag, build):
+    """
+    ``304`` si le client a déjà la version ``etag``, sinon ``build()`` ;
+    l'ETag est posé dans les deux cas. ``no-cache`` : le navigateur garde la
+    réponse mais la revalide à chaque lecture.
+    """
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+async def aconditional_response(request, etag, build):
+    """Comme ``conditional_response`` pour les vues asynchrones : ``build`` est une coroutine."""
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = await build()
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
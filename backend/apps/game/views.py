@@ -1,19 +1,25 @@
 """
 Views for the game API.
 """
+import hashlib
 import random
-from django.db import transaction
-from django.db.models import F
+from django.db.models import Count, Q
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import MediaPair, GameSession, GameAnswer, GlobalStats, MultiplayerRoom
+from .manifest import build_session_manifest, preload_link_header
+from .models import MediaPair, GameSession, LeaderboardArchive, MultiplayerRoom
+from . import response_cache
+from .pair_cards import pair_cards
+from .payloads import game_pairs_payload, media_base_url
+from .rollups import merge_leaderboard
+from .scoring import AlreadyAnswered, answer_payload, check_answer, record_answer
+from .versioning import LEADERBOARD, conditional_response, get_versions, make_etag
 from .serializers import (
     GameSessionCreateSerializer,
     GameSessionSerializer,
-    MediaPairGameSerializer,
     AnswerSubmitSerializer,
     AnswerResponseSerializer,
     GameResultSerializer,
@@ -30,9 +36,11 @@ class GameSessionView(APIView):
         serializer = GameSessionCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # Pick 10 random pairs
-        all_pairs = list(MediaPair.objects.filter(is_active=True))
-        pairs = random.sample(all_pairs, min(10, len(all_pairs)))
+        # Pick 10 random pairs : tirage sur les ids, puis chargement des seules paires tirées
+        active_ids = list(MediaPair.objects.filter(is_active=True).values_list('id', flat=True))
+        chosen = random.sample(active_ids, min(10, len(active_ids)))
+        pairs_by_id = MediaPair.objects.select_related('category').in_bulk(chosen)
+        pairs = [pairs_by_id[pk] for pk in chosen if pk in pairs_by_id]
 
         if len(pairs) < 1:
             return Response(
@@ -56,21 +64,46 @@ class GameSessionView(APIView):
         request.session[f'positions_{session.session_key}'] = positions
         request.session[f'pairs_{session.session_key}'] = [p.id for p in pairs]
 
-        # Serialize pairs for response
-        pairs_serializer = MediaPairGameSerializer(
-            pairs,
-            many=True,
-            context={'request': request, 'positions': positions}
-        )
+        # Serialize pairs for response (préfixe des URLs média calculé une fois)
+        media_base = media_base_url(request)
+        manifest = build_session_manifest(media_base, pairs, positions)
 
         response_data = {
             'session_key': str(session.session_key),
             'quiz_name': 'Mode Aléatoire',
-            'pairs': pairs_serializer.data,
+            'pairs': game_pairs_payload(media_base, pairs, positions),
             'total_pairs': len(pairs),
+            'manifest': manifest,
         }
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
+        response = Response(response_data, status=status.HTTP_201_CREATED)
+        # Précharger la première paire pendant que le client traite la réponse
+        link = preload_link_header(manifest[0])
+        if link:
+            response['Link'] = link
+        return response
+
+
+class GameSessionManifestView(APIView):
+    """Get the media prefetch manifest of a game session."""
+
+    def get(self, request, session_key):
+        pair_ids = request.session.get(f'pairs_{session_key}')
+        if not pair_ids or not GameSession.objects.filter(session_key=session_key).exists():
+            return Response(
+                {'error': 'Session non trouvée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        positions = request.session.get(f'positions_{session_key}', {})
+        positions = {int(k): v for k, v in positions.items()}
+        pairs_by_id = MediaPair.objects.select_related('category').in_bulk(pair_ids)
+        pairs = [pairs_by_id[pk] for pk in pair_ids if pk in pairs_by_id]
+
+        return Response({
+            'session_key': str(session_key),
+            'manifest': build_session_manifest(media_base_url(request), pairs, positions),
+        })
 
 
 class AnswerSubmitView(APIView):
@@ -92,100 +125,48 @@ class AnswerSubmitView(APIView):
         choice = serializer.validated_data['choice']
         response_time_ms = serializer.validated_data['response_time_ms']
 
-        # Get the pair
-        try:
-            pair = MediaPair.objects.get(id=pair_id)
-        except MediaPair.DoesNotExist:
+        # Only the pairs drawn for this session (see GameSessionView)
+        if pair_id not in request.session.get(f'pairs_{session.session_key}', []):
+            return Response(
+                {'error': 'Paire non tirée pour cette session'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Get the pair (fiche en cache, sans requête)
+        card = pair_cards.get(pair_id)
+        if card is None:
             return Response(
                 {'error': 'Paire non trouvée'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         # Check if answer is correct (player must find the AI-generated media)
-        if pair.media_type == 'audio':
-            # For audio: choice is 'real' or 'ai', compare with pair.is_real
-            is_correct = (
-                (choice == 'real' and pair.is_real is True) or
-                (choice == 'ai' and pair.is_real is False)
-            )
-            ai_position = 'ai' if pair.is_real is False else 'real'
-        else:
+        real_position = 'left'
+        if card.media_type != 'audio':
             # For image/video: use left/right positions
             positions = request.session.get(f'positions_{session.session_key}', {})
             # Convert string keys back to int if needed
             positions = {int(k): v for k, v in positions.items()}
             real_position = positions.get(pair_id, 'left')
-            # AI position is the opposite of real position
-            ai_position = 'right' if real_position == 'left' else 'left'
-            # Player wins if they find the AI (click on the AI image)
-            is_correct = (choice == ai_position)
-
-        # Calculate points
-        base_points = 100 if is_correct else 0
-        streak_bonus = 0
-        time_bonus = 0
-
-        if is_correct:
-            # Streak bonus: +10 per consecutive correct, max +50
-            session.current_streak += 1
-            streak_bonus = min(session.current_streak * 10, 50)
-            
-            # Time bonus: up to 50 points if answered within 5 seconds
-            if response_time_ms < 5000:
-                time_bonus = int((5000 - response_time_ms) / 100)
-            
-            if session.current_streak > session.streak_max:
-                session.streak_max = session.current_streak
-        else:
-            session.current_streak = 0
-
-        points_earned = base_points + streak_bonus + time_bonus
-        session.score += points_earned
-        session.time_total_ms += response_time_ms
-
-        # Get current answer count for order
-        current_order = session.answers.count() + 1
-
-        # Create answer record
-        with transaction.atomic():
-            GameAnswer.objects.create(
-                session=session,
-                media_pair=pair,
-                is_correct=is_correct,
-                response_time_ms=response_time_ms,
-                order=current_order,
-                points_earned=points_earned,
-            )
-
-            # Update global stats
-            global_stats, created = GlobalStats.objects.get_or_create(media_pair=pair)
-            global_stats.total_attempts = F('total_attempts') + 1
-            if is_correct:
-                global_stats.correct_answers = F('correct_answers') + 1
-            global_stats.save()
+        is_correct, ai_position = check_answer(card, choice, real_position)
 
-            # Check if session is complete
-            if current_order >= session.total_pairs:
-                session.is_completed = True
-
-            session.save()
+        # Calculate points and save (session relue sous verrou)
+        try:
+            session, points_earned, global_stats = record_answer(
+                session, card, is_correct, response_time_ms
+            )
+        except GameSession.DoesNotExist:
+            return Response(
+                {'error': 'Session non trouvée ou déjà terminée'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except AlreadyAnswered:
+            return Response(
+                {'error': 'Paire déjà répondue'},
+                status=status.HTTP_409_CONFLICT
+            )
 
-        # Get fresh global stats for response
-        global_stats.refresh_from_db()
-
-        response_data = {
-            'is_correct': is_correct,
-            'hint': pair.hint,
-            'ai_position': ai_position,
-            'points_earned': points_earned,
-            'current_streak': session.current_streak,
-            'total_score': session.score,
-            'global_stats': {
-                'total_attempts': global_stats.total_attempts,
-                'success_rate': global_stats.success_rate,
-            },
-            'is_session_complete': session.is_completed,
-        }
+        response_data = answer_payload(card, session, is_correct, ai_position, points_earned, global_stats)
 
         return Response(response_data)
 
@@ -202,8 +183,15 @@ class GameResultView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = GameResultSerializer(session)
-        return Response(serializer.data)
+        if not session.is_completed:
+            return Response(GameResultSerializer(session).data)
+
+        # Une session terminée ne change plus, hormis le pseudo enregistré
+        pseudo_digest = hashlib.blake2s(session.pseudo.encode(), digest_size=4).hexdigest()
+        etag = make_etag('result', session.session_key, pseudo_digest)
+        return conditional_response(
+            request, etag, lambda: Response(GameResultSerializer(session).data)
+        )
 
     def post(self, request, session_key):
         """Submit pseudo for leaderboard."""
@@ -230,15 +218,25 @@ class LeaderboardView(APIView):
     def get(self, request):
         limit = int(request.query_params.get('limit', 10))
 
-        sessions = GameSession.objects.filter(
-            is_completed=True,
-            pseudo__isnull=False,
-        ).exclude(pseudo='')
+        def compute():
+            sessions = GameSession.objects.filter(
+                is_completed=True,
+                pseudo__isnull=False,
+            ).exclude(pseudo='')
+
+            sessions = sessions.order_by('-score', 'time_total_ms')[:limit]
+            # Meilleures sessions des mois archivés (voir rollups)
+            sessions = merge_leaderboard(sessions, LeaderboardArchive.objects.all()[:limit], limit)
 
-        sessions = sessions.order_by('-score', 'time_total_ms')[:limit]
+            serializer = LeaderboardEntrySerializer(sessions, many=True)
+            return serializer.data
 
-        serializer = LeaderboardEntrySerializer(sessions, many=True)
-        return Response(serializer.data)
+        def build():
+            key = response_cache.cache_key(response_cache.LEADERBOARD, 'leaderboard', str(limit))
+            return Response(response_cache.get_or_compute(key, compute))
+
+        etag = make_etag('leaderboard', limit, *get_versions(LEADERBOARD))
+        return conditional_response(request, etag, build)
 
 
 # =============================================================================
@@ -266,22 +264,34 @@ class MultiplayerRoomDetailView(APIView):
 
     def get(self, request, room_code):
         room_code = room_code.upper()
-        try:
-            room = MultiplayerRoom.objects.get(room_code=room_code)
-        except MultiplayerRoom.DoesNotExist:
+        # Rooms terminées : servies depuis le cache, sans requête
+        cache_key = response_cache.cache_key(response_cache.room_topic(room_code), 'room-detail')
+        cached = response_cache.cache.get(cache_key)
+        if cached is not None:
+            return conditional_response(request, cached['etag'], lambda: Response(cached['data']))
+
+        # Une seule requête : la room et son nombre de joueurs connectés
+        room = MultiplayerRoom.objects.filter(room_code=room_code).annotate(
+            players_count=Count('players', filter=Q(players__is_connected=True))
+        ).first()
+        if room is None:
             return Response(
                 {'error': 'Room non trouvée'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        return Response({
+        etag = make_etag('room', room.id, room.status, room.players_count, room.updated_at.timestamp())
+        data = {
             'id': room.id,
             'room_code': room.room_code,
             'quiz': None,
             'status': room.status,
-            'players_count': room.players.filter(is_connected=True).count(),
+            'players_count': room.players_count,
             'created_at': room.created_at.isoformat(),
-        })
+        }
+        if room.status == MultiplayerRoom.RoomStatus.FINISHED:
+            response_cache.cache.set(cache_key, {'etag': etag, 'data': data}, response_cache.DEFAULT_TIMEOUT)
+        return conditional_response(request, etag, lambda: Response(data))
 
 
 class LocalIPView(APIView):
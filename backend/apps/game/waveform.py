@@ -0,0 +1,199 @@
+"""
+Pics de forme d'onde précalculés pour les paires audio.
+
+Le PCM décodé est réduit à ``PEAK_BUCKETS`` couples (min, max) en int8 avec
+NumPy, puis écrit dans un petit fichier binaire (nom demandé
+``_derivatives/<nom>.peaks`` à côté de l'audio, rangé sous ``cas/`` par le
+stockage par défaut, comme les dérivés d'images). Le client dessine la forme
+d'onde sans télécharger ni décoder le fichier audio.
+
+Format du fichier (little-endian) :
+  - 4 octets  : magic ``RVAP``
+  - uint8     : version (1)
+  - 3 octets  : réservés
+  - uint32    : nombre de couples
+  - uint32    : fréquence d'échantillonnage
+  - uint32    : durée en millisecondes
+  - int8 × 2n : min, max pour chaque couple
+
+Décodeurs : ``wave`` (stdlib) pour le WAV, ffmpeg s'il est installé pour les
+autres formats, et tout décodeur déclaré dans ``settings.MEDIA_AUDIO_DECODERS``
+(``{'.ext': 'chemin.vers.fonction'}``, fonction ``path -> (samples, rate)``).
+"""
+import logging
+import posixpath
+import shutil
+import struct
+import subprocess
+import wave
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils.module_loading import import_string
+
+from .imaging import DERIVATIVES_DIR, remove_pair_derivatives
+
+logger = logging.getLogger(__name__)
+
+PEAK_BUCKETS = 1024
+PEAKS_MAGIC = b'RVAP'
+PEAKS_VERSION = 1
+PEAKS_HEADER = struct.Struct('<4sB3xIII')
+FFMPEG_SAMPLE_RATE = 22050
+
+_decoders = {}
+
+
+class AudioDecodeError(ValueError):
+    """Aucun décodeur disponible ou fichier audio illisible."""
+
+
+def register_decoder(extensions, decoder):
+    """Associe un décodeur ``path -> (samples float32 mono, sample_rate)`` à des extensions."""
+    for ext in extensions:
+        _decoders[ext.lower()] = decoder
+
+
+def get_decoder(extension):
+    extension = extension.lower()
+    configured = getattr(settings, 'MEDIA_AUDIO_DECODERS', {}).get(extension)
+    if configured:
+        return import_string(configured)
+    return _decoders.get(extension)
+
+
+def decode_wav(path):
+    """Décode un WAV PCM (8/16/24/32 bits) en float32 mono normalisé."""
+    import numpy as np
+
+    with wave.open(path, 'rb') as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768
+    elif width == 3:
+        bytes_ = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        ints = (bytes_[:, 0].astype(np.int32) | (bytes_[:, 1].astype(np.int32) << 8)
+                | (bytes_[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise AudioDecodeError(f"Largeur d'échantillon WAV non prise en charge : {width}")
+
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def decode_with_ffmpeg(path):
+    """Décode n'importe quel format lu par ffmpeg (s16le mono 22,05 kHz)."""
+    import numpy as np
+
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        raise AudioDecodeError("ffmpeg introuvable")
+    result = subprocess.run(
+        [ffmpeg, '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1',
+         '-ar', str(FFMPEG_SAMPLE_RATE), 'pipe:1'],
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise AudioDecodeError(result.stderr.decode(errors='replace').strip() or "échec ffmpeg")
+    return np.frombuffer(result.stdout, dtype='<i2').astype(np.float32) / 32768, FFMPEG_SAMPLE_RATE
+
+
+register_decoder(['.wav'], decode_wav)
+register_decoder(['.mp3', '.ogg', '.flac', '.m4a', '.aac', '.opus', '.webm'], decode_with_ffmpeg)
+
+
+def compute_peaks(samples, buckets=PEAK_BUCKETS):
+    """Réduit ``samples`` (float, [-1, 1]) en un tableau int8 (buckets, 2) de min/max."""
+    import numpy as np
+
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.size == 0:
+        return np.zeros((buckets, 2), dtype=np.int8)
+    if samples.size < buckets:
+        samples = np.pad(samples, (0, buckets - samples.size))
+    # Découpe en `buckets` tranches de tailles quasi égales
+    edges = np.linspace(0, samples.size, buckets + 1).astype(np.int64)
+    mins = np.minimum.reduceat(samples, edges[:-1])
+    maxs = np.maximum.reduceat(samples, edges[:-1])
+    peaks = np.stack([mins, maxs], axis=1)
+    return np.clip(np.round(peaks * 127), -127, 127).astype(np.int8)
+
+
+def encode_peaks(peaks, sample_rate, duration_ms):
+    header = PEAKS_HEADER.pack(PEAKS_MAGIC, PEAKS_VERSION, len(peaks), sample_rate, duration_ms)
+    return header + peaks.tobytes()
+
+
+def decode_peaks(data):
+    """Relit un fichier de pics : (peaks int8 (n, 2), sample_rate, duration_ms)."""
+    import numpy as np
+
+    magic, version, count, rate, duration_ms = PEAKS_HEADER.unpack_from(data)
+    if magic != PEAKS_MAGIC or version != PEAKS_VERSION:
+        raise ValueError("Fichier de pics invalide")
+    peaks = np.frombuffer(data, dtype=np.int8, count=count * 2, offset=PEAKS_HEADER.size)
+    return peaks.reshape(count, 2), rate, duration_ms
+
+
+def peaks_name(audio_name):
+    """``pairs/audio/voix/a.mp3`` → ``pairs/audio/voix/_derivatives/a.peaks``."""
+    directory, filename = posixpath.split(audio_name)
+    stem = filename.rsplit('.', 1)[0]
+    return posixpath.join(directory, DERIVATIVES_DIR, f'{stem}.peaks')
+
+
+def generate_pair_peaks(pair, save=True):
+    """
+    Calcule et stocke les pics de l'audio d'une paire, référencés dans
+    ``pair.derivatives['peaks']``. Retourne cette entrée, ou None en cas d'échec.
+    """
+    field = pair.audio_media
+    if pair.media_type != 'audio' or not field:
+        return None
+
+    extension = posixpath.splitext(field.name)[1]
+    decoder = get_decoder(extension)
+    if decoder is None:
+        logger.warning("Aucun décodeur audio pour %s", field.name)
+        return None
+    try:
+        samples, rate = decoder(field.path)
+    except Exception:
+        logger.exception("Décodage impossible pour %s", field.name)
+        return None
+
+    duration_ms = int(len(samples) * 1000 / rate) if rate else 0
+    data = encode_peaks(compute_peaks(samples), rate, duration_ms)
+    name = peaks_name(field.name)
+    storage = field.storage
+    if storage.exists(name):
+        storage.delete(name)
+    name = storage.save(name, ContentFile(data))
+
+    entry = {'name': name, 'buckets': PEAK_BUCKETS, 'duration_ms': duration_ms}
+    derivatives = {'peaks': entry}
+    remove_pair_derivatives(pair, keep=derivatives)
+    pair.derivatives = derivatives
+    if save and pair.pk:
+        type(pair).objects.filter(pk=pair.pk).update(derivatives=derivatives)
+    return entry
+
+
+def peaks_url(pair):
+    """URL (relative au stockage) du fichier de pics, ou None."""
+    entry = (pair.derivatives or {}).get('peaks')
+    if not entry or not pair.audio_media:
+        return None
+    return pair.audio_media.storage.url(entry['name'])
@@ -4,6 +4,8 @@ Django settings for Real vs AI project.
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -31,6 +33,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.game.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -89,6 +92,27 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Les uploads sont rangés sous media/cas/ par empreinte SHA-256 (dédupliqués,
+# URL immuables) ; voir apps.game.storage
+STORAGES = {
+    'default': {
+        'BACKEND': 'apps.game.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Suppression des fichiers médias par un thread de fond après commit ; à
+# désactiver si la commande process_media_deletions --loop tourne à part.
+MEDIA_DELETION_WORKER = os.environ.get('MEDIA_DELETION_WORKER', 'True').lower() in ('true', '1', 'yes')
+
+# Taille décompressée maximale d'une archive importée (octets)
+MEDIA_IMPORT_MAX_BYTES = int(os.environ.get('MEDIA_IMPORT_MAX_BYTES', 2 * 1024 ** 3))
+
+# Taille maximale d'un fichier envoyé par morceaux (octets)
+MEDIA_UPLOAD_MAX_BYTES = int(os.environ.get('MEDIA_UPLOAD_MAX_BYTES', 2 * 1024 ** 3))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # CORS Configuration
@@ -118,11 +142,20 @@ CORS_ALLOW_HEADERS = [
     "authorization",
     "content-type",
     "dnt",
+    "if-none-match",
     "origin",
+    "upload-length",
+    "upload-offset",
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
 ]
+CORS_EXPOSE_HEADERS = [
+    "etag",
+    "location",
+    "upload-length",
+    "upload-offset",
+]
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
@@ -131,8 +164,44 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON via orjson quand il est installé (repli sur le module json de DRF)
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.game.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.game.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Vues asynchrones pour les endpoints chauds du jeu (Daphne/ASGI) au lieu des
+# vues DRF synchrones ; à comparer avec loadtest_game_api avant de l'activer
+GAME_ASYNC_VIEWS = os.environ.get('GAME_ASYNC_VIEWS', 'False').lower() in ('true', '1', 'yes')
+
+# Files d'exécution SQL du consumer multijoueur (une connexion à la base par
+# file et par processus) ; 0 = thread partagé de Channels
+MULTIPLAYER_DB_LANES = int(os.environ.get('MULTIPLAYER_DB_LANES', 4))
+
+# Durée de vie des rooms multijoueur (heures) avant archivage et suppression
+# par purge_rooms : terminées, puis abandonnées sans activité (voir room_gc)
+ROOM_FINISHED_TTL_HOURS = float(os.environ.get('ROOM_FINISHED_TTL_HOURS', 72))
+ROOM_ABANDONED_TTL_HOURS = float(os.environ.get('ROOM_ABANDONED_TTL_HOURS', 6))
+
+# Partitions mensuelles des sessions et réponses (PostgreSQL, voir
+# apps.game.partitions) : mois créés à l'avance par manage_partitions, mois
+# gardés en base par archive_partitions et dossier de leurs exports
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', 3))
+PARTITION_RETENTION_MONTHS = int(os.environ.get('PARTITION_RETENTION_MONTHS', 12))
+PARTITION_ARCHIVE_DIR = os.environ.get('PARTITION_ARCHIVE_DIR', str(BASE_DIR / 'archives'))
+
+# Meilleures sessions gardées pour le classement par mois archivé
+LEADERBOARD_ARCHIVE_SIZE = int(os.environ.get('LEADERBOARD_ARCHIVE_SIZE', 100))
+
+# Taille minimale (octets) d'une réponse JSON compressée en brotli/gzip
+API_COMPRESSION_MIN_BYTES = int(os.environ.get('API_COMPRESSION_MIN_BYTES', 1024))
+
 # Forcer le port pour les URLs absolues (si derrière un proxy)
 USE_X_FORWARDED_HOST = True
 USE_X_FORWARDED_PORT = True
@@ -148,21 +217,87 @@ if DEBUG:
 
 ASGI_APPLICATION = 'config.asgi.application'
 
-# Channel Layers with Redis
-CHANNEL_LAYERS = {
-    'default': {
+# Redis partagé par tous les workers ASGI (channel layer et cache)
+REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+
+# Channel layer : 'redis' (files Redis, défaut), 'pubsub' (Redis Pub/Sub) ou
+# 'memory' (un seul processus, sans Redis) ; comparer avec bench_channel_layers
+CHANNEL_LAYER_BACKEND = os.environ.get('CHANNEL_LAYER_BACKEND', 'redis').lower()
+
+# Fallback to InMemoryChannelLayer for development without Redis
+if os.environ.get('USE_MEMORY_CHANNEL_LAYER', 'False').lower() in ('true', '1', 'yes'):
+    CHANNEL_LAYER_BACKEND = 'memory'
+
+# Messages en attente par canal : au-delà, les diffusions de groupe sont
+# perdues (une arrivée de 500 joueurs envoie 500 messages à chaque membre)
+CHANNEL_LAYER_CAPACITY = int(os.environ.get('CHANNEL_LAYER_CAPACITY', 1000))
+# Durée de vie (s) d'un message non lu ; un événement plus ancien est périmé
+CHANNEL_LAYER_EXPIRY = int(os.environ.get('CHANNEL_LAYER_EXPIRY', 30))
+# Durée de vie (s) d'une adhésion à un groupe : plus longue qu'une partie,
+# assez courte pour ne pas diffuser longtemps aux consumers d'un worker tombé
+CHANNEL_LAYER_GROUP_EXPIRY = int(os.environ.get('CHANNEL_LAYER_GROUP_EXPIRY', 4 * 3600))
+
+# Pub/Sub ne stocke rien dans Redis : ni capacité ni expiration
+CHANNEL_LAYER_BACKENDS = {
+    'redis': {
         'BACKEND': 'channels_redis.core.RedisChannelLayer',
         'CONFIG': {
-            'hosts': [(os.environ.get('REDIS_HOST', 'redis'), 6379)],
+            'hosts': [(REDIS_HOST, REDIS_PORT)],
+            'capacity': CHANNEL_LAYER_CAPACITY,
+            'expiry': CHANNEL_LAYER_EXPIRY,
+            'group_expiry': CHANNEL_LAYER_GROUP_EXPIRY,
+        },
+    },
+    'pubsub': {
+        'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+        'CONFIG': {
+            'hosts': [(REDIS_HOST, REDIS_PORT)],
+        },
+    },
+    'memory': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'CONFIG': {
+            'capacity': CHANNEL_LAYER_CAPACITY,
+            'expiry': CHANNEL_LAYER_EXPIRY,
+            'group_expiry': CHANNEL_LAYER_GROUP_EXPIRY,
         },
     },
 }
 
-# Fallback to InMemoryChannelLayer for development without Redis
-if os.environ.get('USE_MEMORY_CHANNEL_LAYER', 'False').lower() in ('true', '1', 'yes'):
-    CHANNEL_LAYERS = {
+if CHANNEL_LAYER_BACKEND not in CHANNEL_LAYER_BACKENDS:
+    raise ImproperlyConfigured(
+        f"CHANNEL_LAYER_BACKEND inconnu : {CHANNEL_LAYER_BACKEND} "
+        f"(choix : {', '.join(CHANNEL_LAYER_BACKENDS)})"
+    )
+
+CHANNEL_LAYERS = {
+    'default': CHANNEL_LAYER_BACKENDS[CHANNEL_LAYER_BACKEND],
+}
+
+
+# =============================================================================
+# Cache (réponses de l'API, voir apps.game.response_cache)
+# =============================================================================
+
+# Base Redis 1 : la base 0 reste aux channel layers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+        'KEY_PREFIX': 'realvsai',
+    },
+}
+
+# Fallback to the in-process cache for development and tests without Redis
+if os.environ.get('USE_MEMORY_CACHE', 'False').lower() in ('true', '1', 'yes'):
+    CACHES = {
         'default': {
-            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         },
     }
 
+# Cache en mémoire des fiches de paires (par worker) : nombre de fiches et
+# durée de vie en secondes (filet de sécurité, voir apps/game/pair_cards.py)
+PAIR_CARD_CACHE_SIZE = int(os.environ.get('PAIR_CARD_CACHE_SIZE', 2048))
+PAIR_CARD_CACHE_TTL = int(os.environ.get('PAIR_CARD_CACHE_TTL', 60))
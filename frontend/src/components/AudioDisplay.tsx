@@ -1,9 +1,10 @@
-import { useState, useRef } from 'react';
+import { useState, useRef, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { Play, Pause, CheckCircle, XCircle, Volume2 } from 'lucide-react';
 
 interface AudioDisplayProps {
   src: string;
+  peaksUrl?: string;
   onAnswer: (choice: 'real' | 'ai') => void;
   disabled?: boolean;
   isCorrect?: boolean;
@@ -11,8 +12,33 @@ interface AudioDisplayProps {
   isSelected?: boolean;
 }
 
+// Fichier de pics précalculé côté serveur (voir apps/game/waveform.py) :
+// en-tête de 20 octets puis couples (min, max) en int8.
+const PEAKS_HEADER_SIZE = 20;
+
+interface Peaks {
+  values: Int8Array;
+  durationMs: number;
+}
+
+const parsePeaks = (buffer: ArrayBuffer): Peaks | null => {
+  const view = new DataView(buffer);
+  if (buffer.byteLength < PEAKS_HEADER_SIZE) return null;
+  const magic = String.fromCharCode(
+    view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+  );
+  if (magic !== 'RVAP' || view.getUint8(4) !== 1) return null;
+  const count = view.getUint32(8, true);
+  const durationMs = view.getUint32(16, true);
+  return {
+    values: new Int8Array(buffer, PEAKS_HEADER_SIZE, count * 2),
+    durationMs,
+  };
+};
+
 export default function AudioDisplay({
   src,
+  peaksUrl,
   onAnswer,
   disabled = false,
   isCorrect,
@@ -22,7 +48,44 @@ export default function AudioDisplay({
   const [isPlaying, setIsPlaying] = useState(false);
   const [currentTime, setCurrentTime] = useState(0);
   const [duration, setDuration] = useState(0);
+  const [peaks, setPeaks] = useState<Peaks | null>(null);
   const audioRef = useRef<HTMLAudioElement>(null);
+  const canvasRef = useRef<HTMLCanvasElement>(null);
+
+  useEffect(() => {
+    setPeaks(null);
+    if (!peaksUrl) return;
+    const controller = new AbortController();
+    fetch(peaksUrl, { signal: controller.signal })
+      .then((response) => (response.ok ? response.arrayBuffer() : null))
+      .then((buffer) => {
+        const parsed = buffer ? parsePeaks(buffer) : null;
+        setPeaks(parsed);
+        if (parsed) setDuration((d) => d || parsed.durationMs / 1000);
+      })
+      .catch(() => setPeaks(null));
+    return () => controller.abort();
+  }, [peaksUrl]);
+
+  useEffect(() => {
+    const canvas = canvasRef.current;
+    if (!canvas || !peaks) return;
+    const ctx = canvas.getContext('2d');
+    if (!ctx) return;
+    const { width, height } = canvas;
+    const count = peaks.values.length / 2;
+    const progress = duration ? currentTime / duration : 0;
+    ctx.clearRect(0, 0, width, height);
+    for (let x = 0; x < width; x++) {
+      const i = Math.floor((x / width) * count);
+      const min = peaks.values[i * 2] / 127;
+      const max = peaks.values[i * 2 + 1] / 127;
+      ctx.fillStyle = x / width <= progress ? '#a855f7' : '#475569';
+      const top = ((1 - max) / 2) * height;
+      const bottom = ((1 - min) / 2) * height;
+      ctx.fillRect(x, top, 1, Math.max(1, bottom - top));
+    }
+  }, [peaks, currentTime, duration]);
 
   const handlePlayPause = () => {
     if (!audioRef.current) return;
@@ -91,17 +154,27 @@ export default function AudioDisplay({
           )}
         </button>
 
-        {/* Progress Bar */}
+        {/* Progress Bar (forme d'onde si les pics sont disponibles) */}
         <div className="w-full max-w-md">
-          <div
-            onClick={handleProgressClick}
-            className="w-full h-2 bg-dark-700 rounded-full cursor-pointer relative"
-          >
-            <motion.div
-              className="h-full bg-gradient-to-r from-primary-500 to-accent-500 rounded-full"
-              style={{ width: `${duration ? (currentTime / duration) * 100 : 0}%` }}
+          {peaks ? (
+            <canvas
+              ref={canvasRef}
+              width={448}
+              height={64}
+              onClick={handleProgressClick}
+              className="w-full h-16 cursor-pointer"
             />
-          </div>
+          ) : (
+            <div
+              onClick={handleProgressClick}
+              className="w-full h-2 bg-dark-700 rounded-full cursor-pointer relative"
+            >
+              <motion.div
+                className="h-full bg-gradient-to-r from-primary-500 to-accent-500 rounded-full"
+                style={{ width: `${duration ? (currentTime / duration) * 100 : 0}%` }}
+              />
+            </div>
+          )}
           <div className="flex justify-between text-sm text-dark-400 mt-2">
             <span>{formatTime(currentTime)}</span>
             <span>{formatTime(duration)}</span>
@@ -112,6 +185,7 @@ export default function AudioDisplay({
         <audio
           ref={audioRef}
           src={src}
+          preload="metadata"
           onTimeUpdate={handleTimeUpdate}
           onLoadedMetadata={handleLoadedMetadata}
           onEnded={() => setIsPlaying(false)}
@@ -1,8 +1,11 @@
 import { motion } from 'framer-motion';
 import { CheckCircle, XCircle, Play } from 'lucide-react';
+import type { MediaInfo, MediaVariant } from '../services/api';
 
 interface MediaDisplayProps {
   src: string;
+  srcSet?: MediaVariant[];
+  info?: MediaInfo | null;
   type: 'image' | 'video';
   label: string;
   onClick: () => void;
@@ -13,6 +16,8 @@ interface MediaDisplayProps {
 
 export default function MediaDisplay({
   src,
+  srcSet,
+  info,
   type,
   label,
   onClick,
@@ -52,6 +57,14 @@ export default function MediaDisplay({
       {type === 'image' ? (
         <img
           src={src}
+          srcSet={
+            srcSet && srcSet.length > 0
+              ? srcSet.map((v) => `${v.url} ${v.width}w`).join(', ')
+              : undefined
+          }
+          sizes="(min-width: 768px) 50vw, 100vw"
+          width={info?.width ?? undefined}
+          height={info?.height ?? undefined}
           alt={`Option ${label}`}
           className="w-full h-full object-cover"
           loading="lazy"
@@ -59,6 +72,8 @@ export default function MediaDisplay({
       ) : (
         <video
           src={src}
+          width={info?.width ?? undefined}
+          height={info?.height ?? undefined}
           className="w-full h-full object-cover"
           autoPlay
           muted
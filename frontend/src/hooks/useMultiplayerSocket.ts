@@ -1,4 +1,5 @@
 import { useEffect, useRef, useState, useCallback } from 'react';
+import type { MediaInfo, MediaVariant } from '../services/api';
 
 // Helper to convert relative URLs to absolute URLs
 const makeAbsoluteUrl = (url: string | undefined | null): string | undefined => {
@@ -28,6 +29,9 @@ const transformQuestionUrls = (question: QuestionData | null): QuestionData | nu
     left_media: makeAbsoluteUrl(question.left_media),
     right_media: makeAbsoluteUrl(question.right_media),
     audio_media: makeAbsoluteUrl(question.audio_media),
+    audio_peaks: makeAbsoluteUrl(question.audio_peaks),
+    left_srcset: question.left_srcset?.map((v) => ({ ...v, url: makeAbsoluteUrl(v.url)! })),
+    right_srcset: question.right_srcset?.map((v) => ({ ...v, url: makeAbsoluteUrl(v.url)! })),
   };
 };
 
@@ -46,7 +50,13 @@ export interface QuestionData {
   difficulty: string;
   left_media?: string;
   right_media?: string;
+  left_srcset?: MediaVariant[];
+  right_srcset?: MediaVariant[];
   audio_media?: string;
+  audio_peaks?: string;
+  left_info?: MediaInfo | null;
+  right_info?: MediaInfo | null;
+  audio_info?: MediaInfo | null;
 }
 
 export interface AnswerData {
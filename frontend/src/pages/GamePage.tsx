@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { motion, AnimatePresence } from 'framer-motion';
 import { useQuery } from '@tanstack/react-query';
 import { Flame, Clock, CheckCircle, XCircle, Home } from 'lucide-react';
-import { gameApi, MediaPair, AnswerResponse } from '../services/api';
+import { gameApi, MediaPair, AnswerResponse, ManifestItem } from '../services/api';
 import MediaDisplay from '../components/MediaDisplay';
 import AudioDisplay from '../components/AudioDisplay';
 import Timer from '../components/Timer';
@@ -11,6 +11,21 @@ import ProgressBar from '../components/ProgressBar';
 import FeedbackOverlay from '../components/FeedbackOverlay';
 import LogoMIA from '../components/LogoMIA';
 
+// Précharge en basse priorité les médias d'une paire (pendant l'affichage de la précédente)
+const prefetchPairMedia = (item: ManifestItem) => {
+  item.media.forEach((media) => {
+    if (document.head.querySelector(`link[rel="prefetch"][href="${media.url}"]`)) return;
+    const link = document.createElement('link');
+    link.rel = 'prefetch';
+    link.href = media.url;
+    if (media.srcset && media.srcset.length > 0) {
+      link.setAttribute('imagesrcset', media.srcset.map((v) => `${v.url} ${v.width}w`).join(', '));
+      link.setAttribute('imagesizes', '(min-width: 768px) 50vw, 100vw');
+    }
+    document.head.appendChild(link);
+  });
+};
+
 export default function GamePage() {
   const { sessionKey } = useParams<{ sessionKey: string }>();
   const navigate = useNavigate();
@@ -22,6 +37,7 @@ export default function GamePage() {
   const [feedback, setFeedback] = useState<AnswerResponse | null>(null);
   const [showFeedback, setShowFeedback] = useState(false);
   const [pairs, setPairs] = useState<MediaPair[]>([]);
+  const [manifest, setManifest] = useState<ManifestItem[]>([]);
   const startTimeRef = useRef<number>(Date.now());
 
   // Fetch session data
@@ -45,6 +61,20 @@ export default function GamePage() {
     }
   }, [sessionKey, navigate]);
 
+  // Manifeste de préchargement (tailles, types, empreintes des médias)
+  useEffect(() => {
+    if (!sessionKey) return;
+    gameApi
+      .getManifest(sessionKey)
+      .then((response) => setManifest(response.data.manifest))
+      .catch(() => setManifest([]));
+  }, [sessionKey]);
+
+  useEffect(() => {
+    const next = manifest[currentIndex + 1];
+    if (next) prefetchPairMedia(next);
+  }, [manifest, currentIndex]);
+
   const currentPair = pairs[currentIndex];
 
   const handleQuit = useCallback(() => {
@@ -192,6 +222,7 @@ export default function GamePage() {
               >
                 <AudioDisplay
                   src={currentPair.audio_media}
+                  peaksUrl={currentPair.audio_peaks ?? undefined}
                   onAnswer={(choice) => handleAnswer(choice)}
                   disabled={isAnswering}
                   isCorrect={feedback?.is_correct}
@@ -216,6 +247,8 @@ export default function GamePage() {
               >
                 <MediaDisplay
                   src={currentPair.left_media!}
+                  srcSet={currentPair.left_srcset}
+                  info={currentPair.left_info}
                   type={currentPair.media_type as 'image' | 'video'}
                   label="A"
                   onClick={() => handleAnswer('left')}
@@ -240,6 +273,8 @@ export default function GamePage() {
               >
                 <MediaDisplay
                   src={currentPair.right_media!}
+                  srcSet={currentPair.right_srcset}
+                  info={currentPair.right_info}
                   type={currentPair.media_type as 'image' | 'video'}
                   label="B"
                   onClick={() => handleAnswer('right')}
@@ -478,6 +478,7 @@ export default function MultiplayerHostPage() {
                 <div className="max-w-2xl mx-auto">
                   <AudioDisplay
                     src={currentQuestion.audio_media}
+                    peaksUrl={currentQuestion.audio_peaks}
                     disabled={true}
                   />
                 </div>
@@ -485,12 +486,16 @@ export default function MultiplayerHostPage() {
                 <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
                   <MediaDisplay
                     src={currentQuestion.left_media!}
+                    srcSet={currentQuestion.left_srcset}
+                    info={currentQuestion.left_info}
                     type={currentQuestion.media_type as 'image' | 'video'}
                     label="A"
                     disabled={true}
                   />
                   <MediaDisplay
                     src={currentQuestion.right_media!}
+                    srcSet={currentQuestion.right_srcset}
+                    info={currentQuestion.right_info}
                     type={currentQuestion.media_type as 'image' | 'video'}
                     label="B"
                     disabled={true}
@@ -556,6 +561,7 @@ export default function MultiplayerHostPage() {
                 <div className="max-w-2xl mx-auto mb-8">
                   <AudioDisplay
                     src={currentQuestion.audio_media}
+                    peaksUrl={currentQuestion.audio_peaks}
                     disabled={true}
                     isCorrect={currentAnswer.ai_position === 'ai'}
                   />
@@ -564,6 +570,8 @@ export default function MultiplayerHostPage() {
                 <div className="grid grid-cols-1 md:grid-cols-2 gap-6 mb-8">
                   <MediaDisplay
                     src={currentQuestion.left_media!}
+                    srcSet={currentQuestion.left_srcset}
+                    info={currentQuestion.left_info}
                     type={currentQuestion.media_type as 'image' | 'video'}
                     label="A"
                     disabled={true}
@@ -572,6 +580,8 @@ export default function MultiplayerHostPage() {
                   />
                   <MediaDisplay
                     src={currentQuestion.right_media!}
+                    srcSet={currentQuestion.right_srcset}
+                    info={currentQuestion.right_info}
                     type={currentQuestion.media_type as 'image' | 'video'}
                     label="B"
                     disabled={true}
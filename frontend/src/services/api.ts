@@ -32,6 +32,19 @@ export interface Category {
   description: string;
 }
 
+export interface MediaVariant {
+  url: string;
+  width: number;
+}
+
+export interface MediaInfo {
+  bytes: number;
+  mime: string;
+  width: number | null;
+  height: number | null;
+  duration_ms: number | null;
+}
+
 export interface MediaPair {
   id: number;
   category: Category;
@@ -39,16 +52,42 @@ export interface MediaPair {
   difficulty: 'easy' | 'medium' | 'hard';
   left_media?: string;
   right_media?: string;
+  left_srcset?: MediaVariant[];
+  right_srcset?: MediaVariant[];
   audio_media?: string;
+  audio_peaks?: string | null;
+  left_info?: MediaInfo | null;
+  right_info?: MediaInfo | null;
+  audio_info?: MediaInfo | null;
   real_position?: 'left' | 'right' | 'real' | 'ai';
   is_real?: boolean;
 }
 
+export interface ManifestMedia {
+  role: 'left' | 'right' | 'audio' | 'audio_peaks';
+  url: string;
+  mime: string;
+  bytes?: number;
+  width?: number | null;
+  height?: number | null;
+  duration_ms?: number | null;
+  hash?: string;
+  srcset?: MediaVariant[];
+}
+
+export interface ManifestItem {
+  pair_id: number;
+  order: number;
+  media_type: 'image' | 'video' | 'audio';
+  media: ManifestMedia[];
+}
+
 export interface GameSession {
   session_key: string;
   quiz_name: string;
   pairs: MediaPair[];
   total_pairs: number;
+  manifest?: ManifestItem[];
 }
 
 export interface AnswerResponse {
@@ -103,6 +142,9 @@ export const gameApi = {
       response_time_ms: responseTimeMs,
     }),
 
+  getManifest: (sessionKey: string) =>
+    api.get<{ session_key: string; manifest: ManifestItem[] }>(`/game/sessions/${sessionKey}/manifest/`),
+
   getResult: (sessionKey: string) =>
     api.get<GameResult>(`/game/sessions/${sessionKey}/result/`),
 
@@ -146,6 +188,7 @@ export interface MediaPairAdmin {
   difficulty: string;
   hint: string;
   is_active: boolean;
+  media_info?: Record<string, MediaInfo>;
   stats: {
     total_attempts: number;
     correct_answers: number;
@@ -154,6 +197,62 @@ export interface MediaPairAdmin {
   created_at: string;
 }
 
+export interface MediaPairBulkAction {
+  action: 'activate' | 'deactivate' | 'set_difficulty' | 'set_category' | 'delete';
+  ids?: number[];
+  filter?: { category?: number; media_type?: string; difficulty?: string; is_active?: boolean };
+  difficulty?: 'easy' | 'medium' | 'hard';
+  category?: number;
+  dry_run?: boolean;
+}
+
+export interface MediaPairBulkResult {
+  action: MediaPairBulkAction['action'];
+  count: number;
+  dry_run: boolean;
+}
+
+export interface MediaPairImportResult {
+  event: 'done';
+  pairs_created: number;
+  pairs_skipped: number;
+  categories_created: string[];
+  unmatched: string[];
+  ignored: string[];
+}
+
+export interface MediaUpload {
+  id: string;
+  filename: string;
+  size: number;
+  offset: number;
+  created_at: string;
+  updated_at: string;
+}
+
+export type MediaUploadSide = 'real' | 'ai' | 'audio';
+
+// Pagination par clé de l'admin : suivre ``next`` / ``previous`` tels quels
+export interface KeysetPage<T> {
+  count?: number;
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface GameSessionAdmin {
+  id: number;
+  session_key: string;
+  pseudo: string;
+  audience_type: 'school' | 'public';
+  score: number;
+  streak_max: number;
+  time_total_ms: number;
+  total_pairs: number;
+  is_completed: boolean;
+  created_at: string;
+}
+
 export interface AudienceStats {
   success_rate: number;
   total_sessions: number;
@@ -177,6 +276,14 @@ export interface DashboardStats {
     audience_type: 'school' | 'public';
     created_at: string;
   }[];
+  pair_card_cache: {
+    size: number;
+    max_size: number;
+    hits: number;
+    misses: number;
+    evictions: number;
+    hit_rate: number;
+  };
 }
 
 export const adminApi = {
@@ -198,12 +305,76 @@ export const adminApi = {
       headers: { 'Content-Type': 'multipart/form-data' },
     }),
   deleteMediaPair: (id: number) => api.delete(`/admin/media-pairs/${id}/`),
+  bulkMediaPairs: (data: MediaPairBulkAction) =>
+    api.post<MediaPairBulkResult>('/admin/media-pairs/bulk/', data),
+  importMediaPairs: (archive: File) => {
+    const formData = new FormData();
+    formData.append('archive', archive);
+    return api.post<MediaPairImportResult>('/admin/media-pairs/import/?stream=0', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+
+  // Uploads par morceaux (reprenables)
+  createUpload: (filename: string, size: number) =>
+    api.post<MediaUpload>('/admin/uploads/', { filename, size }),
+  getUpload: (id: string) => api.get<MediaUpload>(`/admin/uploads/${id}/`),
+  uploadChunk: (id: string, offset: number, chunk: Blob) =>
+    api.patch<MediaUpload>(`/admin/uploads/${id}/`, chunk, {
+      headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': String(offset) },
+    }),
+  finalizeUpload: (id: string, pair: number, side: MediaUploadSide) =>
+    api.post<MediaPairAdmin>(`/admin/uploads/${id}/finalize/`, { pair, side }),
+  abortUpload: (id: string) => api.delete(`/admin/uploads/${id}/`),
 
   // Stats
   getStats: () => api.get<DashboardStats>('/admin/stats/'),
 
   // Sessions
+  getSessions: (params?: {
+    cursor?: string; page_size?: number; count?: 'exact' | 'estimate';
+    is_completed?: boolean; audience_type?: string;
+  }) => api.get<KeysetPage<GameSessionAdmin>>('/admin/sessions/', { params }),
+  getPage: <T>(url: string) => api.get<KeysetPage<T>>(url),
   deleteSession: (sessionId: number) => api.delete(`/admin/sessions/${sessionId}/`),
 };
 
+// Au plus FILE_UPLOAD_MAX_MEMORY_SIZE (2,5 Mo) : sous Daphne le corps reste en mémoire
+const UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024;
+const UPLOAD_MAX_RETRIES = 5;
+
+/**
+ * Envoie un fichier par morceaux puis le rattache à un côté d'une paire.
+ * Après une coupure, relit l'offset reçu par le serveur et reprend à partir de
+ * là ; passer ``uploadId`` pour reprendre un upload commencé précédemment.
+ */
+export async function uploadMediaResumable(
+  file: File,
+  pair: number,
+  side: MediaUploadSide,
+  onProgress?: (sent: number, total: number) => void,
+  uploadId?: string,
+) {
+  const upload = uploadId
+    ? (await adminApi.getUpload(uploadId)).data
+    : (await adminApi.createUpload(file.name, file.size)).data;
+  let offset = upload.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    try {
+      const response = await adminApi.uploadChunk(
+        upload.id, offset, file.slice(offset, offset + UPLOAD_CHUNK_SIZE),
+      );
+      offset = response.data.offset;
+      retries = 0;
+      onProgress?.(offset, file.size);
+    } catch (error) {
+      if (++retries > UPLOAD_MAX_RETRIES) throw error;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** retries));
+      offset = (await adminApi.getUpload(upload.id)).data.offset;
+    }
+  }
+  return adminApi.finalizeUpload(upload.id, pair, side);
+}
+
 export default api;
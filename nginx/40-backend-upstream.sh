@@ -0,0 +1,19 @@
+#!/bin/sh
+# Upstream "backend" : un serveur par worker ASGI (ASGI_WORKERS, ports
+# consécutifs à partir de 8000, voir run_asgi_workers). Les WebSockets durent
+# toute la partie : least_conn répartit les nouvelles connexions sur le
+# worker qui en a le moins.
+set -eu
+
+workers="${ASGI_WORKERS:-1}"
+
+{
+    echo "upstream backend {"
+    echo "    least_conn;"
+    i=0
+    while [ "$i" -lt "$workers" ]; do
+        echo "    server backend:$((8000 + i));"
+        i=$((i + 1))
+    done
+    echo "}"
+} > /etc/nginx/conf.d/backend-upstream.conf